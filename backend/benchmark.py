@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmarks for the prediction API
+
+Load test: realistic patients sampled from primary_dataset.csv are posted to
+/predict at increasing concurrency, either in-process (ASGI transport, no
+network) or against a running server with --url. Each level reports p50,
+p95 and p99 latency and throughput.
+
+Microbenchmarks time the request-path stages on their own:
+feature preparation, model inference and recommendation generation.
+
+Results are written as JSON; --compare prints the change against an
+earlier results file, to spot regressions between commits.
+
+Usage:
+    python benchmark.py [--url http://localhost:8000] [--concurrency 1,4,16] [--requests N]
+                        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATASET_PATH = "../ml_pipeline/primary_dataset.csv"
+DEFAULT_CONCURRENCY = "1,2,4,8,16,32"
+DEFAULT_REQUESTS = 1000
+DEFAULT_OUTPUT = "benchmark_results.json"
+PERCENTILES = (50, 95, 99)
+
+def sample_patients(dataset_path: str, n: int, seed: int = 42) -> List[Dict]:
+    """
+    Draw /predict payloads from real dataset rows
+
+    Rows are validated against the API's PatientData model. Optional fields
+    outside the API's accepted range are dropped so the API default applies;
+    rows whose required fields are invalid are skipped.
+
+    Args:
+        dataset_path: CSV with the primary_dataset schema
+        n: Number of distinct patients to return
+        seed: Sampling seed, for reproducible runs
+
+    Returns:
+        List of JSON-ready patient dictionaries
+    """
+    from pydantic import ValidationError
+    from main import PatientData
+
+    fields = list(PatientData.model_fields)
+    data = pd.read_csv(dataset_path)
+    data = data[[c for c in fields if c in data.columns]].sample(frac=1.0, random_state=seed)
+
+    patients = []
+    for record in data.to_dict('records'):
+        record = {k: v for k, v in record.items() if not (isinstance(v, float) and np.isnan(v))}
+        try:
+            patient = PatientData(**record)
+        except ValidationError as e:
+            for error in e.errors():
+                field = error['loc'][0]
+                if not PatientData.model_fields[field].is_required():
+                    record.pop(field, None)
+            try:
+                patient = PatientData(**record)
+            except ValidationError:
+                continue
+        patients.append(patient.model_dump(exclude_unset=True))
+        if len(patients) == n:
+            break
+    return patients
+
+def latency_summary(latencies_ms: List[float], wall_seconds: float, errors: int) -> Dict:
+    """Percentiles, mean and throughput for one batch of requests"""
+    latencies = np.asarray(latencies_ms)
+    summary = {f"p{p}_ms": round(float(np.percentile(latencies, p)), 3) for p in PERCENTILES}
+    summary.update({
+        'mean_ms': round(float(latencies.mean()), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall_seconds, 1),
+    })
+    return summary
+
+async def _run_level(client, patients: List[Dict], concurrency: int, n_requests: int) -> Dict:
+    """Post ``n_requests`` predictions from ``concurrency`` concurrent clients"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < n_requests:
+            patient = patients[next_index % len(patients)]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.post("/predict", json=patient)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - start, errors)
+
+async def run_load_test(patients: List[Dict], concurrency_levels: List[int], n_requests: int,
+                        url: Optional[str] = None, warmup: int = 50) -> List[Dict]:
+    """
+    Measure /predict at each concurrency level
+
+    Args:
+        patients: Request payloads, cycled through in order
+        concurrency_levels: Number of concurrent clients per level
+        n_requests: Requests per level
+        url: Base URL of a running server; None runs the app in-process
+        warmup: Untimed requests sent before each level
+
+    Returns:
+        One summary per concurrency level
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(concurrency_levels), max_keepalive_connections=max(concurrency_levels))
+    if url is None:
+        import main
+        await main.startup_event()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://benchmark",
+                                   limits=limits, timeout=60.0)
+    else:
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0)
+
+    results = []
+    try:
+        for concurrency in concurrency_levels:
+            await _run_level(client, patients, concurrency, warmup)
+            summary = await _run_level(client, patients, concurrency, n_requests)
+            summary['concurrency'] = concurrency
+            results.append(summary)
+            print(f"  concurrency {concurrency:>3}: p50 {summary['p50_ms']:7.2f} ms  p95 {summary['p95_ms']:7.2f} ms  "
+                  f"p99 {summary['p99_ms']:7.2f} ms  {summary['throughput_rps']:8.1f} req/s  "
+                  f"errors {summary['errors']}")
+    finally:
+        await client.aclose()
+        if url is None:
+            import main
+            await main.shutdown_event()
+    return results
+
+def time_calls(fn: Callable, args_list: List, repeat: int = 3) -> Dict:
+    """Per-call latency of ``fn`` over ``args_list``, best of ``repeat`` passes by median"""
+    best = None
+    for _ in range(repeat):
+        timings = np.empty(len(args_list))
+        for i, args in enumerate(args_list):
+            start = time.perf_counter()
+            fn(*args)
+            timings[i] = time.perf_counter() - start
+        if best is None or np.median(timings) < np.median(best):
+            best = timings
+    best = best * 1e6
+    return {
+        'calls': len(args_list),
+        'p50_us': round(float(np.percentile(best, 50)), 2),
+        'p99_us': round(float(np.percentile(best, 99)), 2),
+        'mean_us': round(float(best.mean()), 2),
+    }
+
+def run_microbenchmarks(predictor, patients: List[Dict], batch_size: int = 1000) -> Dict:
+    """
+    Time feature preparation, inference and recommendations on their own
+
+    Args:
+        predictor: Loaded RiskPredictor
+        patients: Patient dictionaries
+        batch_size: Patients per batched call
+
+    Returns:
+        Timings keyed by benchmark name
+    """
+    from models.recommendations import risk_tiers
+
+    singles = [(p,) for p in patients]
+    rows = [(predictor._prepare_features(p),) for p in patients]
+    batch = patients[:batch_size]
+    X_batch = predictor._prepare_features_batch(batch)
+    probabilities = predictor.score_matrix(X_batch)
+    deterioration = probabilities[:, 0] + 0.5 * probabilities[:, 2]
+    levels = predictor.label_encoder.classes_[probabilities.argmax(axis=1)]
+    tiers = risk_tiers(levels, deterioration)
+    recommendation_args = [(p, float(deterioration[i % len(batch)]), str(levels[i % len(batch)]))
+                           for i, p in enumerate(patients)]
+
+    results = {
+        'prepare_features': time_calls(predictor._prepare_features, singles),
+        'prepare_features_batch': time_calls(predictor._prepare_features_batch, [(batch,)] * 20),
+        'inference_single': time_calls(predictor.score_matrix, rows),
+        'inference_batch': time_calls(predictor.score_matrix, [(X_batch,)] * 20),
+        'generate_recommendations': time_calls(predictor._generate_recommendations, recommendation_args),
+        'generate_recommendations_batch': time_calls(predictor.recommendation_engine.generate,
+                                                     [(batch, tiers)] * 20),
+    }
+    for name, timing in results.items():
+        print(f"  {name:<32} p50 {timing['p50_us']:10.1f} us  p99 {timing['p99_us']:10.1f} us")
+    results['batch_size'] = batch_size
+    return results
+
+def git_commit() -> Optional[str]:
+    """Current commit hash, if run from a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(current: Dict, baseline: Dict):
+    """Print the relative change of each latency figure against a baseline run"""
+    def change(new, old):
+        return f"{(new - old) / old * 100:+6.1f}%" if old else "   n/a"
+
+    print(f"\n📊 Compared with {baseline['meta'].get('commit') or 'baseline'}:")
+    old_levels = {level['concurrency']: level for level in baseline.get('load', [])}
+    for level in current.get('load', []):
+        old = old_levels.get(level['concurrency'])
+        if old:
+            print(f"  concurrency {level['concurrency']:>3}: p50 {change(level['p50_ms'], old['p50_ms'])}  "
+                  f"p99 {change(level['p99_ms'], old['p99_ms'])}  "
+                  f"throughput {change(level['throughput_rps'], old['throughput_rps'])}")
+    for name, timing in current.get('micro', {}).items():
+        old = baseline.get('micro', {}).get(name)
+        if isinstance(timing, dict) and old:
+            print(f"  {name:<32} p50 {change(timing['p50_us'], old['p50_us'])}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the WellDoc prediction API")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default: run the app in-process)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH, help="Patients to sample (default: %(default)s)")
+    parser.add_argument("--patients", type=int, default=500, help="Distinct patients sampled (default: %(default)s)")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help="Comma-separated concurrency levels (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS,
+                        help="Requests per concurrency level (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42, help="Patient sampling seed (default: %(default)s)")
+    parser.add_argument("--skip-load", action="store_true", help="Only run the microbenchmarks")
+    parser.add_argument("--skip-micro", action="store_true", help="Only run the load test")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Results JSON file (default: %(default)s)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    patients = sample_patients(args.dataset, args.patients, args.seed)
+    print(f"✅ Sampled {len(patients)} patients from {args.dataset}")
+
+    from models.risk_predictor import get_risk_predictor
+    predictor = get_risk_predictor()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'target': args.url or "in-process",
+            'inference_backend': predictor.inference_backend,
+            'model_version': predictor.model_version,
+            'patients': len(patients),
+            'requests_per_level': args.requests,
+        },
+    }
+
+    if not args.skip_micro:
+        print("🔄 Microbenchmarks")
+        results['micro'] = run_microbenchmarks(predictor, patients)
+
+    if not args.skip_load:
+        levels = [int(c) for c in args.concurrency.split(",")]
+        print(f"🔄 Load test against {results['meta']['target']}")
+        results['load'] = asyncio.run(run_load_test(patients, levels, args.requests, args.url))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare_results(results, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Load an extracted feature CSV into the Parquet feature store
+
+Converts the step1 output (primary_dataset.csv) into the partitioned
+columnar store once, so cohort jobs read typed columns instead of
+re-parsing text.
+
+Usage:
+    python build_feature_store.py [features_csv] [store_dir] [--append]
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from models.risk_predictor import DEFAULT_MODEL_PATH
+from models.feature_store import FeatureStore, DEFAULT_BUCKETS
+
+DEFAULT_FEATURES_CSV = "../ml_pipeline/primary_dataset.csv"
+DEFAULT_STORE_DIR = "../ml_pipeline/feature_store"
+CSV_CHUNK_SIZE = 200000
+
+def build_feature_store(features_csv: str, store: FeatureStore, append: bool = False) -> int:
+    """Stream a feature CSV into the store in chunks, returning the row count"""
+    total = 0
+    reader = pd.read_csv(features_csv, dtype={'patient_id': str}, chunksize=CSV_CHUNK_SIZE)
+    for i, chunk in enumerate(reader):
+        total += store.write_features(chunk, overwrite=(i == 0 and not append))
+    return total
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the WellDoc Parquet feature store from a feature CSV")
+    parser.add_argument("features_csv", nargs="?", default=DEFAULT_FEATURES_CSV,
+                        help="Extracted features, e.g. primary_dataset.csv (default: %(default)s)")
+    parser.add_argument("store_dir", nargs="?", default=os.getenv("FEATURE_STORE_PATH", DEFAULT_STORE_DIR),
+                        help="Feature store directory (default: FEATURE_STORE_PATH or %(default)s)")
+    parser.add_argument("--model-path", default=os.getenv("MODEL_PATH", DEFAULT_MODEL_PATH),
+                        help="Model directory whose feature_metadata.json pins the schema")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS,
+                        help="Patient hash partitions when creating a new store (default: %(default)s)")
+    parser.add_argument("--append", action="store_true", help="Append instead of replacing stored features")
+    args = parser.parse_args()
+
+    store = FeatureStore.from_metadata(args.store_dir, args.model_path, num_buckets=args.buckets)
+    rows = build_feature_store(args.features_csv, store, append=args.append)
+    print(f"✅ Stored {rows:,} patients in {args.store_dir} ({store.stats()['features']['files']} files)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Export model artifacts into shareable, memory-mappable formats
+
+Writes the compiled tree arrays used by INFERENCE_BACKEND=native into
+<model_path>/compiled_trees so every API worker memory-maps one copy
+instead of compiling its own, and saves the booster in XGBoost's native
+UBJSON format (plus the label classes as JSON) so workers load it without
+unpickling the scikit-learn wrapper. Every export is stamped with the
+model's training_date; the predictor ignores exports whose stamp no longer
+matches model_metadata.json, so rerun this after retraining.
+
+Usage:
+    python export_artifacts.py [model_path]
+"""
+
+import argparse
+import os
+import sys
+
+from models.risk_predictor import RiskPredictor, DEFAULT_MODEL_PATH, COMPILED_TREES_DIR
+from models.native_trees import CompiledTreeEnsemble
+from models.booster_model import LabelClasses, NATIVE_MODEL_FILE, LABEL_CLASSES_FILE
+
+def export_compiled_trees(predictor: RiskPredictor) -> str:
+    """Compile the booster and save its arrays next to the pickled model"""
+    output_dir = os.path.join(predictor.model_path, COMPILED_TREES_DIR)
+    compiled = CompiledTreeEnsemble.from_booster(predictor.model.get_booster(), predictor._num_iterations())
+    compiled.training_date = predictor.model_version
+    compiled.save(output_dir)
+    print(f"✅ Compiled {compiled.num_trees} trees (depth {compiled.max_depth}) to {output_dir}")
+    return output_dir
+
+def export_native_model(predictor: RiskPredictor) -> str:
+    """Save the booster as UBJSON and the label classes as JSON next to the pickled model"""
+    model_file = os.path.join(predictor.model_path, NATIVE_MODEL_FILE)
+    booster = predictor.model.get_booster().copy()
+    booster.set_attr(training_date=predictor.model_version)
+    booster.save_model(model_file)
+    LabelClasses(predictor.label_encoder.classes_, predictor.model_version).save(
+        os.path.join(predictor.model_path, LABEL_CLASSES_FILE)
+    )
+    print(f"✅ Saved native booster to {model_file}")
+    return model_file
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export WellDoc model artifacts for shared loading")
+    parser.add_argument("model_path", nargs="?", default=os.getenv("MODEL_PATH", DEFAULT_MODEL_PATH),
+                        help="Production model directory (default: MODEL_PATH or %(default)s)")
+    args = parser.parse_args()
+
+    predictor = RiskPredictor(args.model_path)
+    export_compiled_trees(predictor)
+    export_native_model(predictor)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
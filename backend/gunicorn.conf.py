@@ -0,0 +1,79 @@
+"""
+Gunicorn configuration for multi-worker serving
+
+Usage:
+    gunicorn main:app -c gunicorn.conf.py
+
+The app and model artifacts are loaded once in the master process
+(``preload_app``) and inherited copy-on-write by every forked worker, so
+memory stays roughly flat as WEB_CONCURRENCY grows. Each worker is an
+independent uvicorn event loop with its own inference pool.
+"""
+
+import gc
+import math
+import os
+
+# Upper bound on the default worker count; every worker holds its own
+# inference pool and cohort analytics, so more needs an explicit WEB_CONCURRENCY
+MAX_DEFAULT_WORKERS = 4
+
+def available_cpus() -> int:
+    """
+    CPUs this container may actually use
+
+    os.cpu_count() reports the host's cores; the affinity mask and the
+    cgroup CPU quota (v2 cpu.max, or v1 cfs_quota_us/cfs_period_us) are
+    what limit a Fly/Render/Railway instance.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota_files = [("/sys/fs/cgroup/cpu.max", None),
+                   ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")]
+    for quota_file, period_file in quota_files:
+        try:
+            with open(quota_file) as f:
+                fields = f.read().split()
+            if period_file is not None:
+                with open(period_file) as f:
+                    fields.append(f.read().strip())
+            quota, period = fields[0], fields[1]
+        except (OSError, IndexError):
+            continue
+        if quota not in ("max", "-1"):
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+        break
+    return max(cpus, 1)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or min(available_cpus(), MAX_DEFAULT_WORKERS))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+loglevel = os.getenv("LOG_LEVEL", "info")
+accesslog = None
+
+# Native threads per worker for XGBoost; with one worker per core, letting
+# every worker use every core only oversubscribes the CPU. The model registry
+# applies this to every version it loads, including ones activated later.
+# Same for the inference pool: one inference thread per worker unless set
+# explicitly. Set here, before preload_app imports main, so the master and
+# every forked worker see them
+os.environ.setdefault("XGBOOST_NTHREAD", "1")
+os.environ.setdefault("INFERENCE_WORKERS", "1")
+
+def when_ready(server):
+    """Load model artifacts in the master before any worker is forked"""
+    from models.risk_predictor import get_risk_predictor
+
+    predictor = get_risk_predictor()
+    server.log.info(f"Model artifacts preloaded from {predictor.model_path}")
+
+    # Move everything allocated so far out of the GC's tracked generations,
+    # so collections in workers don't touch (and un-share) inherited pages
+    gc.collect()
+    gc.freeze()
@@ -1,20 +1,41 @@
-from fastapi import FastAPI, HTTPException, Depends
+# Imported first so the startup profile covers every import below
+from models.startup_profile import STARTUP_PROFILE
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import pandas as pd
-import numpy as np
 from datetime import datetime
 import uvicorn
+import asyncio
 import logging
+import os
+import time
 
 # Import our risk predictor
 from models.risk_predictor import get_risk_predictor, RiskPredictor
+from models.model_registry import get_model_registry, WARMUP_PATIENT
+from models.inference_pool import InferencePool, QueueFullError
+from models.micro_batcher import MicroBatcher
+from models.metrics import REGISTRY, LATENCY_BUCKETS, Counter, Gauge, Histogram
+from models.request_log import RequestLogger
+from models.cohort_analytics import CohortAnalytics, SORT_KEYS
+from models.response_encoder import PredictionResponseEncoder
+from models.shadow_scoring import ShadowScorer
+from models.warmup import StartupWarmup
+from models.bulk_scoring import BulkScorer, upload_format
+
+STARTUP_PROFILE.record("imports", time.perf_counter() - STARTUP_PROFILE.started_at)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "info").upper())
 logger = logging.getLogger(__name__)
 
+# One sampled JSON record per prediction request (REQUEST_LOG_SAMPLE_RATE)
+request_logger = RequestLogger.from_env()
+
 app = FastAPI(
     title="WellDoc AI Risk Prediction API", 
     version="2.0.0",
@@ -30,6 +51,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# HTTP-level metrics, labelled by route template so path parameters don't explode cardinality
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "welldoc_http_requests_total", "HTTP requests by endpoint and status", labelnames=("method", "endpoint", "status")
+))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "welldoc_http_request_errors_total", "HTTP requests that failed with a 5xx or exception", labelnames=("endpoint",)
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "welldoc_http_request_duration_seconds", LATENCY_BUCKETS, "HTTP request latency", labelnames=("endpoint",)
+))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per endpoint"""
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", request.url.path)
+        HTTP_LATENCY.observe(time.perf_counter() - start_time, endpoint=endpoint)
+        HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=status)
+        if status >= 500:
+            HTTP_ERRORS.inc(endpoint=endpoint)
+
 # Enhanced Pydantic models for request/response
 class PatientData(BaseModel):
     """Patient data for risk prediction (30-180 days of data)"""
@@ -113,6 +162,20 @@ class ModelInfo(BaseModel):
     model_version: str
     performance: Dict[str, float]
 
+class FeatureContribution(BaseModel):
+    """Single feature's SHAP contribution"""
+    feature: str
+    display_name: str
+    value: Optional[float]
+    contribution: float
+
+class Explanation(BaseModel):
+    """Per-patient SHAP explanation of the predicted risk level"""
+    explained_class: str
+    method: str
+    base_value: float
+    top_features: List[FeatureContribution]
+
 class RiskPrediction(BaseModel):
     """Complete risk prediction response"""
     patient_id: str
@@ -121,6 +184,20 @@ class RiskPrediction(BaseModel):
     recommendations: List[Recommendation]
     model_info: ModelInfo
     prediction_timestamp: str
+    explanation: Optional[Explanation] = None
+
+# Upper bound on patients per /predict/batch call; larger worklists should be chunked
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+class BatchPredictionRequest(BaseModel):
+    """Batch of patients to score in a single model call"""
+    patients: List[PatientData] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchRiskPrediction(BaseModel):
+    """Batch risk prediction response"""
+    predictions: List[RiskPrediction]
+    total_patients: int
+    processing_time_ms: float
 
 class HealthStatus(BaseModel):
     """API health status"""
@@ -131,17 +208,226 @@ class HealthStatus(BaseModel):
     features_count: int
     timestamp: str
 
+# Worker pool that keeps model inference off the event loop
+inference_pool: Optional[InferencePool] = None
+
+# Optional micro-batcher that coalesces concurrent /predict calls (MICROBATCH_ENABLED)
+micro_batcher: Optional[MicroBatcher] = None
+
+# Chunked CSV/NDJSON uploads scored through the inference pool (/predict/bulk)
+bulk_scorer: Optional[BulkScorer] = None
+
+# Synthetic warm-up traffic and latency check that gate /health/ready
+startup_warmup = StartupWarmup.from_env()
+
+# Optional candidate model scored on a sample of /predict traffic (SHADOW_MODEL_VERSION)
+shadow_scorer: Optional[ShadowScorer] = None
+
+# /predict responses: "fast" encodes trusted predictor output directly with orjson,
+# "validated" rebuilds and re-validates the Pydantic response models
+RESPONSE_SERIALIZATION = os.getenv("RESPONSE_SERIALIZATION", "fast").lower()
+response_encoder = PredictionResponseEncoder()
+
+# Scored population behind the /cohort endpoints (COHORT_DATA_PATH)
+COHORT_DATA_PATH = os.getenv("COHORT_DATA_PATH", "../ml_pipeline/primary_dataset.csv")
+cohort_analytics: Optional[CohortAnalytics] = None
+
+def _set_timing_headers(response: Response, timing: Dict[str, float]):
+    """Report queue wait separately from compute time"""
+    response.headers["X-Queue-Wait-Ms"] = f"{timing['queue_wait_ms']:.3f}"
+    response.headers["X-Compute-Ms"] = f"{timing['compute_ms']:.3f}"
+    if 'batch_size' in timing:
+        response.headers["X-Batch-Size"] = str(timing['batch_size'])
+    if timing.get('model_version'):
+        response.headers["X-Model-Version"] = timing['model_version']
+
+def _service_unavailable(e: QueueFullError) -> HTTPException:
+    logger.debug(f"⚠️ Rejecting request: {e}")
+    return HTTPException(
+        status_code=503,
+        detail="Prediction service is at capacity, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
+def _check_model_version(model_version: Optional[str]):
+    """404 unless a requested model version is loaded in this process"""
+    if model_version is not None and model_version not in get_model_registry().loaded_versions():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Model version {model_version!r} is not loaded (see /models; load it with POST /models/{{version}}/load)"
+        )
+
+# Seconds between checks of the registry's ACTIVE file / latest version (0 disables)
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "0"))
+
+async def _follow_registry():
+    """Activate the registry's desired version whenever it changes on disk"""
+    registry = get_model_registry()
+    last_desired = registry.desired_version()
+    while True:
+        await asyncio.sleep(MODEL_REGISTRY_POLL_SECONDS)
+        try:
+            desired = registry.desired_version()
+            if desired != last_desired:
+                last_desired = desired
+                if desired != registry.active_version:
+                    await registry.activate_async(desired)
+                    _refresh_cohort_analytics()
+        except Exception as e:
+            logger.error(f"❌ Model registry poll failed: {e}")
+
+def _start_shadow_scoring(scorer: ShadowScorer):
+    """Install a shadow scorer and load its candidate in the background"""
+    global shadow_scorer
+    registry = get_model_registry()
+    if scorer.candidate_version not in registry.available_versions():
+        scorer.shutdown()
+        raise KeyError(scorer.candidate_version)
+    previous, shadow_scorer = shadow_scorer, scorer
+    if previous is not None:
+        previous.shutdown()
+    REGISTRY.register(scorer.compute_histogram)
+    REGISTRY.register(scorer.probability_diff_histogram)
+    REGISTRY.register(scorer.comparisons)
+    
+    async def load():
+        try:
+            await registry.load_async(scorer.candidate_version)
+        except Exception as e:
+            logger.error(f"❌ Failed to load shadow model version {scorer.candidate_version}: {e}")
+    
+    asyncio.get_running_loop().create_task(load())
+    logger.info(f"✅ Shadow scoring {scorer.sample_rate:.0%} of /predict traffic with model version {scorer.candidate_version}")
+
+def _get_cohort() -> CohortAnalytics:
+    """Cohort analytics, or 503 while they are disabled or still loading"""
+    if cohort_analytics is None:
+        raise HTTPException(status_code=503, detail="Cohort analytics are not configured (set COHORT_DATA_PATH)")
+    if not cohort_analytics.ready:
+        raise HTTPException(status_code=503, detail="Cohort analytics are still loading", headers={"Retry-After": "5"})
+    return cohort_analytics
+
+def _start_cohort_analytics(predictor: RiskPredictor):
+    """Score the cohort in the background so startup isn't blocked (per worker, see DOCKER.md)"""
+    global cohort_analytics
+    if not COHORT_DATA_PATH or not os.path.exists(COHORT_DATA_PATH):
+        logger.warning(f"⚠️ Cohort data not found at {COHORT_DATA_PATH!r}; /cohort endpoints disabled")
+        return
+    cohort_analytics = CohortAnalytics()
+    
+    async def load():
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, cohort_analytics.load, COHORT_DATA_PATH, predictor, get_model_registry().active_version
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to load cohort analytics: {e}")
+    
+    asyncio.get_running_loop().create_task(load())
+
+def _refresh_cohort_analytics():
+    """Rescore the cohort in the background after the active model version changed"""
+    if cohort_analytics is None or not cohort_analytics.ready:
+        return
+    registry = get_model_registry()
+    
+    async def refresh():
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, cohort_analytics.refresh, registry.active(), registry.active_version
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to rescore cohort analytics: {e}")
+    
+    asyncio.get_running_loop().create_task(refresh())
+
+def _register_runtime_metrics(predictor: RiskPredictor):
+    """Expose pool, batcher and cache state as scrape-time gauges"""
+    REGISTRY.register(Gauge(
+        "welldoc_inference_in_flight", "Inference calls running or queued", callback=lambda: inference_pool.in_flight
+    ))
+    REGISTRY.register(Gauge(
+        "welldoc_inference_queue_depth", "Inference calls waiting for a worker", callback=lambda: inference_pool.queue_depth
+    ))
+    REGISTRY.register(Counter(
+        "welldoc_inference_rejected_total", "Inference calls rejected with 503", callback=lambda: inference_pool.rejected
+    ))
+    if micro_batcher is not None:
+        REGISTRY.register(micro_batcher.batch_size_histogram)
+        REGISTRY.register(micro_batcher.wait_time_histogram)
+    if predictor.prediction_cache is not None:
+        # Every model version has its own cache; report the active one's
+        cache = lambda: get_risk_predictor().prediction_cache
+        REGISTRY.register(Gauge("welldoc_prediction_cache_size", "Cached predictions", callback=lambda: len(cache())))
+        REGISTRY.register(Counter("welldoc_prediction_cache_hits_total", "Prediction cache hits", callback=lambda: cache().hits))
+        REGISTRY.register(Counter("welldoc_prediction_cache_misses_total", "Prediction cache misses", callback=lambda: cache().misses))
+        REGISTRY.register(Counter(
+            "welldoc_prediction_cache_evictions_total", "Prediction cache LRU evictions", callback=lambda: cache().evictions
+        ))
+    REGISTRY.register(Counter(
+        "welldoc_model_swaps_total", "Active model version swaps", callback=lambda: get_model_registry().swaps
+    ))
+
 # Simplified patient data for testing
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the risk predictor on startup"""
+    """Initialize the risk predictor and inference pool on startup"""
+    global inference_pool, micro_batcher, bulk_scorer
     try:
-        predictor = get_risk_predictor()
+        with STARTUP_PROFILE.stage("risk_predictor"):
+            predictor = get_risk_predictor()
         logger.info("✅ Risk predictor initialized successfully")
+        with STARTUP_PROFILE.stage("inference_pool"):
+            inference_pool = InferencePool.from_env()
+            if MicroBatcher.enabled_from_env():
+                micro_batcher = MicroBatcher.from_env(inference_pool)
+                micro_batcher.start()
+            # Empty optional fields in bulk uploads get the same defaults as /predict
+            defaults = {name: field.default for name, field in PatientData.model_fields.items()
+                        if not field.is_required() and isinstance(field.default, (int, float))}
+            # ... and are held to the same ranges
+            bounds = {name: [(op, getattr(constraint, op)) for constraint in field.metadata
+                             for op in ("gt", "ge", "lt", "le") if hasattr(constraint, op)]
+                      for name, field in PatientData.model_fields.items()}
+            bounds = {name: constraints for name, constraints in bounds.items() if constraints}
+            bulk_scorer = BulkScorer.from_env(inference_pool, predictor.feature_encoder.feature_names,
+                                              defaults, bounds)
+        _start_cohort_analytics(predictor)
+        _register_runtime_metrics(predictor)
+        if MODEL_REGISTRY_POLL_SECONDS > 0:
+            asyncio.get_running_loop().create_task(_follow_registry())
+        scorer = ShadowScorer.from_env()
+        if scorer is not None:
+            try:
+                _start_shadow_scoring(scorer)
+            except KeyError:
+                logger.warning(f"⚠️ Shadow model version {scorer.candidate_version!r} not found; shadow scoring disabled")
+        
+        # The first prediction pays for anything still loaded lazily
+        with STARTUP_PROFILE.stage("first_prediction"):
+            await inference_pool.run("predict_risk", PatientData(**WARMUP_PATIENT).dict())
+        STARTUP_PROFILE.finish()
+        STARTUP_PROFILE.log(logger)
+        
+        # Serve (and answer liveness probes) while warming up; readiness waits for it
+        startup_warmup.start(inference_pool, micro_batcher, response_encoder if RESPONSE_SERIALIZATION == "fast" else None)
     except Exception as e:
         logger.error(f"❌ Failed to initialize risk predictor: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain the micro-batcher and inference pool"""
+    await startup_warmup.stop()
+    if bulk_scorer is not None:
+        await bulk_scorer.shutdown()
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    if shadow_scorer is not None:
+        shadow_scorer.shutdown()
+    if inference_pool is not None:
+        inference_pool.shutdown()
+
 @app.get("/")
 @app.post("/")
 async def root():
@@ -153,7 +439,21 @@ async def root():
         "status": "running",
         "endpoints": {
             "/health": "Health check",
+            "/health/live": "Liveness probe (process is up)",
+            "/health/ready": "Readiness probe (503 until warm-up and latency check pass)",
             "/predict": "Risk prediction (comprehensive patient data)",
+            "/predict/batch": "Batch risk prediction (many patients, one model call)",
+            "/predict/bulk": "Streamed CSV/NDJSON upload scored in chunks, NDJSON results",
+            "/predict/bulk/jobs": "Background bulk scoring job with a downloadable result",
+            "/metrics": "Prometheus metrics",
+            "/batching/stats": "Micro-batching statistics",
+            "/cache/stats": "Prediction cache statistics",
+            "/startup/profile": "Startup time breakdown",
+            "/cohort/summary": "Cohort risk-level distribution",
+            "/cohort/conditions": "Cohort risk breakdown by condition",
+            "/cohort/worklist": "Paginated, sortable patient worklist",
+            "/models": "Model registry: versions on disk, loaded and active",
+            "/shadow/stats": "Candidate vs serving model agreement and latency",
             "/model/info": "Model information",
             "/model/features": "Required features information",
             "/docs": "API documentation"
@@ -171,9 +471,25 @@ async def health_check(predictor: RiskPredictor = Depends(get_risk_predictor)):
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail="Health check failed")
 
-@app.post("/predict", response_model=RiskPrediction)
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop is responsive"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 200 once warm-up has run and the latency check has passed, 503 until then"""
+    status = startup_warmup.status()
+    if not status['ready']:
+        return JSONResponse(status_code=503, content={"status": "not_ready", **status}, headers={"Retry-After": "5"})
+    return {"status": "ready", **status}
+
+@app.post("/predict", response_model=RiskPrediction, response_model_exclude_none=True)
 async def predict_risk(
     patient_data: PatientData, 
+    response: Response,
+    explain: bool = False,
+    model_version: Optional[str] = Query(None, description="Registry model version to score with (default: active)"),
     predictor: RiskPredictor = Depends(get_risk_predictor)
 ):
     """
@@ -183,34 +499,334 @@ async def predict_risk(
     - Deterioration probability
     - Risk level and urgency
     - Clinical recommendations
-    - Model explanations
+    - Model explanations (per-feature SHAP contributions with ?explain=true)
     """
+    _check_model_version(model_version)
+    start_time = time.perf_counter()
+    timing = None
     try:
-        logger.info(f"Processing risk prediction for patient: {patient_data.patient_id}")
+        logger.debug(f"Processing risk prediction for patient: {patient_data.patient_id}")
         
         # Convert Pydantic model to dict
         patient_dict = patient_data.dict()
         
-        # Get prediction
-        prediction = predictor.predict_risk(patient_dict)
+        # Get prediction without blocking the event loop
+        # Explained or version-pinned requests skip micro-batching so they don't slow down plain ones
+        if micro_batcher is not None and not explain and model_version is None:
+            prediction, timing = await micro_batcher.submit(patient_dict)
+        else:
+            prediction, timing = await inference_pool.run(
+                "predict_risk", patient_dict, model_version=model_version, explain=explain
+            )
+        _set_timing_headers(response, timing)
         
-        # Convert to response model
-        response = RiskPrediction(
-            patient_id=prediction['patient_id'],
-            risk_assessment=RiskAssessment(**prediction['risk_assessment']),
-            class_probabilities=ClassProbabilities(**prediction['class_probabilities']),
-            recommendations=[Recommendation(**rec) for rec in prediction['recommendations']],
-            model_info=ModelInfo(**prediction['model_info']),
-            prediction_timestamp=prediction['prediction_timestamp']
-        )
+        if RESPONSE_SERIALIZATION == "fast":
+            # Returning a Response skips response_model validation; the schema is unchanged
+            result = Response(content=response_encoder.encode(prediction), media_type="application/json")
+            _set_timing_headers(result, timing)
+        else:
+            # Convert to response model
+            result = RiskPrediction(
+                patient_id=prediction['patient_id'],
+                risk_assessment=RiskAssessment(**prediction['risk_assessment']),
+                class_probabilities=ClassProbabilities(**prediction['class_probabilities']),
+                recommendations=[Recommendation(**rec) for rec in prediction['recommendations']],
+                model_info=ModelInfo(**prediction['model_info']),
+                prediction_timestamp=prediction['prediction_timestamp'],
+                explanation=prediction.get('explanation')
+            )
         
-        logger.info(f"✅ Prediction completed: {response.risk_assessment.risk_level} risk")
-        return response
+        if cohort_analytics is not None and cohort_analytics.ready:
+            cohort_analytics.record_predictions([patient_dict], [prediction], timing.get('model_version'))
+        
+        # Queued for the candidate after the primary prediction is done; never awaited
+        if shadow_scorer is not None and not explain and model_version is None:
+            shadow_scorer.submit(patient_dict, prediction, timing)
         
+        request_logger.log(
+            "/predict", 200, (time.perf_counter() - start_time) * 1000, timing,
+            patient_id=patient_data.patient_id, risk_level=prediction['risk_assessment']['risk_level'], explain=explain
+        )
+        return result
+        
+    except QueueFullError as e:
+        request_logger.log("/predict", 503, (time.perf_counter() - start_time) * 1000, patient_id=patient_data.patient_id)
+        raise _service_unavailable(e)
     except Exception as e:
         logger.error(f"❌ Prediction error: {e}")
+        request_logger.log(
+            "/predict", 500, (time.perf_counter() - start_time) * 1000, timing,
+            patient_id=patient_data.patient_id, error=str(e)
+        )
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict/batch", response_model=BatchRiskPrediction, response_model_exclude_none=True)
+async def predict_risk_batch(
+    batch: BatchPredictionRequest,
+    response: Response,
+    explain: bool = False,
+    model_version: Optional[str] = Query(None, description="Registry model version to score with (default: active)"),
+    predictor: RiskPredictor = Depends(get_risk_predictor)
+):
+    """
+    Predict 90-day deterioration risk for a batch of patients
+    
+    All patients are scored with a single model call; predictions are
+    returned in the same order as the submitted patients.
+    """
+    _check_model_version(model_version)
+    start_time = time.perf_counter()
+    timing = None
+    try:
+        logger.debug(f"Processing batch risk prediction for {len(batch.patients)} patients")
+        
+        patients = [p.dict() for p in batch.patients]
+        predictions, timing = await inference_pool.run(
+            "predict_risk_batch", patients, model_version=model_version, explain=explain
+        )
+        _set_timing_headers(response, timing)
+        
+        if cohort_analytics is not None and cohort_analytics.ready:
+            cohort_analytics.record_predictions(patients, predictions, timing.get('model_version'))
+        
+        result = BatchRiskPrediction(
+            predictions=predictions,
+            total_patients=len(predictions),
+            processing_time_ms=(time.perf_counter() - start_time) * 1000
+        )
+        
+        request_logger.log(
+            "/predict/batch", 200, result.processing_time_ms, timing,
+            patients=len(predictions), explain=explain
+        )
+        return result
+        
+    except QueueFullError as e:
+        request_logger.log("/predict/batch", 503, (time.perf_counter() - start_time) * 1000, patients=len(batch.patients))
+        raise _service_unavailable(e)
+    except Exception as e:
+        logger.error(f"❌ Batch prediction error: {e}")
+        request_logger.log(
+            "/predict/batch", 500, (time.perf_counter() - start_time) * 1000, timing,
+            patients=len(batch.patients), error=str(e)
+        )
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+def _bulk_format(request: Request, format: Optional[str]) -> str:
+    """Upload format from ?format= or Content-Type, or 415"""
+    try:
+        return upload_format(request.headers.get("content-type"), format)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+@app.post("/predict/bulk")
+async def predict_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+    model_version: Optional[str] = Query(None, description="Registry model version to score with (default: active)")
+):
+    """
+    Score a streamed CSV (primary_dataset.csv layout) or NDJSON upload
+    
+    The request body is parsed in chunks as it arrives and each chunk is
+    scored with one model call. Results are returned as NDJSON, one record
+    per input row in input order; rows missing a required field get an
+    error record. For very large files, use /predict/bulk/jobs instead.
+    """
+    fmt = _bulk_format(request, format)
+    _check_model_version(model_version)
+    summary = {}
+    start_time = time.perf_counter()
+    try:
+        results = await bulk_scorer.score_upload(request.stream(), fmt, model_version, summary)
+    except ClientDisconnect:
+        logger.warning(f"⚠️ Bulk upload disconnected after {summary.get('rows', 0):,} rows")
+        return Response(status_code=400)
+    except ValueError as e:
+        # Arrow parse errors are ValueErrors
+        request_logger.log("/predict/bulk", 400, (time.perf_counter() - start_time) * 1000, error=str(e))
+        raise HTTPException(status_code=400, detail=f"Could not parse upload after {summary.get('rows', 0):,} rows: {e}")
+    except Exception as e:
+        logger.error(f"❌ Bulk scoring error: {e}")
+        request_logger.log("/predict/bulk", 500, (time.perf_counter() - start_time) * 1000, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Bulk scoring failed: {str(e)}")
+    
+    request_logger.log(
+        "/predict/bulk", 200, (time.perf_counter() - start_time) * 1000,
+        rows=summary['rows'], errors=summary['errors'], chunks=summary['chunks'], model_version=summary['model_version']
+    )
+    
+    def read_results():
+        with results:
+            while block := results.read(1 << 20):
+                yield block
+    
+    return StreamingResponse(read_results(), media_type="application/x-ndjson", headers={
+        "X-Rows": str(summary['rows']),
+        "X-Row-Errors": str(summary['errors']),
+        "X-Model-Version": summary['model_version'] or get_model_registry().active_version
+    })
+
+@app.post("/predict/bulk/jobs", status_code=202)
+async def create_bulk_job(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+    model_version: Optional[str] = Query(None, description="Registry model version to score with (default: active)")
+):
+    """Store an upload and score it in the background; poll the job and download its NDJSON result"""
+    fmt = _bulk_format(request, format)
+    _check_model_version(model_version)
+    status = await bulk_scorer.create_job(request.stream(), fmt, model_version)
+    return {
+        **status,
+        "status_url": f"/predict/bulk/jobs/{status['job_id']}",
+        "result_url": f"/predict/bulk/jobs/{status['job_id']}/result"
+    }
+
+@app.get("/predict/bulk/jobs/{job_id}")
+async def get_bulk_job(job_id: str):
+    """Progress of a bulk scoring job"""
+    status = bulk_scorer.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown bulk job {job_id!r}")
+    return status
+
+@app.get("/predict/bulk/jobs/{job_id}/result")
+async def get_bulk_job_result(job_id: str):
+    """Download a completed job's NDJSON result"""
+    status = bulk_scorer.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown bulk job {job_id!r}")
+    if status['state'] != "completed":
+        raise HTTPException(status_code=409, detail=f"Bulk job is {status['state']}", headers={"Retry-After": "5"})
+    return FileResponse(bulk_scorer.result_path(job_id), media_type="application/x-ndjson",
+                        filename=f"welldoc-scores-{job_id}.ndjson")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text-format metrics for this process"""
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/batching/stats")
+async def get_batching_stats():
+    """Micro-batch size and wait-time histograms for tuning MICROBATCH_* settings"""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+@app.get("/cache/stats")
+async def get_cache_stats(predictor: RiskPredictor = Depends(get_risk_predictor)):
+    """Prediction cache hit/miss/eviction counters"""
+    if predictor.prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.prediction_cache.stats()}
+
+@app.get("/startup/profile")
+async def startup_profile():
+    """How long this process took to start, stage by stage"""
+    return STARTUP_PROFILE.report()
+
+# The /cohort endpoints may apply buffered updates, so they run in the threadpool, off the event loop
+@app.get("/cohort/summary")
+def get_cohort_summary():
+    """Risk-level counts and deterioration probability distribution over the scored cohort"""
+    return _get_cohort().summary()
+
+@app.get("/cohort/conditions")
+def get_cohort_conditions():
+    """Risk-level breakdown for each tracked condition"""
+    return {"conditions": _get_cohort().condition_breakdown()}
+
+@app.get("/cohort/worklist")
+def get_cohort_worklist(
+    risk_level: str = Query("high", description="low, medium, high or all"),
+    condition: Optional[str] = Query(None, description="Only patients with this flag, e.g. has_diabetes"),
+    sort_by: str = Query("deterioration_probability", description=f"One of: {', '.join(SORT_KEYS)}"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500)
+):
+    """Paginated, sortable patient worklist (highest deterioration probability first by default)"""
+    cohort = _get_cohort()
+    try:
+        return cohort.worklist(
+            risk_level=None if risk_level == "all" else risk_level,
+            condition=condition,
+            sort_by=sort_by,
+            descending=order == "desc",
+            page=page,
+            page_size=page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/models")
+async def list_model_versions():
+    """Model versions on disk, the ones loaded in this process and the active one"""
+    return get_model_registry().stats()
+
+@app.post("/models/{version}/load")
+async def load_model_version(version: str):
+    """Load and warm up a version in the background without sending it traffic"""
+    registry = get_model_registry()
+    if version not in registry.available_versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}")
+    await registry.load_async(version)
+    return registry.stats()
+
+@app.post("/models/{version}/activate")
+async def activate_model_version(version: str):
+    """Load, warm up and atomically switch this process to a version; in-flight requests finish on the old one"""
+    registry = get_model_registry()
+    if version not in registry.available_versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}")
+    await registry.activate_async(version)
+    logger.info(f"✅ Model version {version} is now active")
+    _refresh_cohort_analytics()
+    return registry.stats()
+
+@app.delete("/models/{version}")
+async def unload_model_version(version: str):
+    """Unload a non-active version once its in-flight requests finish"""
+    registry = get_model_registry()
+    try:
+        registry.unload(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version!r} is not loaded")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return registry.stats()
+
+@app.get("/shadow/stats")
+async def get_shadow_stats():
+    """Agreement rate and latency difference between the shadow candidate and the serving model"""
+    if shadow_scorer is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow_scorer.stats()}
+
+@app.post("/shadow/{version}")
+async def start_shadow_scoring(version: str, sample_rate: float = Query(1.0, ge=0.0, le=1.0)):
+    """Score a fraction of /predict traffic with a candidate version; resets the comparison stats"""
+    try:
+        _start_shadow_scoring(ShadowScorer(version, sample_rate=sample_rate,
+                                           max_pending=int(os.getenv("SHADOW_MAX_PENDING", "256"))))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}")
+    return {"enabled": True, **shadow_scorer.stats()}
+
+@app.delete("/shadow")
+async def stop_shadow_scoring():
+    """Stop shadow scoring and return the final comparison stats"""
+    global shadow_scorer
+    if shadow_scorer is None:
+        raise HTTPException(status_code=404, detail="Shadow scoring is not running")
+    scorer, shadow_scorer = shadow_scorer, None
+    scorer.shutdown()
+    # A stopped scorer's series would otherwise keep being exported as if live
+    for metric in (scorer.compute_histogram, scorer.probability_diff_histogram, scorer.comparisons):
+        REGISTRY.unregister(metric)
+    return {"enabled": False, **scorer.stats()}
+
 @app.get("/model/info")
 async def get_model_info(predictor: RiskPredictor = Depends(get_risk_predictor)):
     """Get detailed model information including feature importance"""
@@ -245,7 +861,21 @@ async def catch_all(path: str):
         "available_endpoints": [
             "/",
             "/health", 
+            "/health/live",
+            "/health/ready",
             "/predict",
+            "/predict/batch",
+            "/predict/bulk",
+            "/predict/bulk/jobs",
+            "/metrics",
+            "/batching/stats",
+            "/cache/stats",
+            "/startup/profile",
+            "/cohort/summary",
+            "/cohort/conditions",
+            "/cohort/worklist",
+            "/models",
+            "/shadow/stats",
             "/model/info",
             "/model/features",
             "/docs"
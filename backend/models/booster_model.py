@@ -0,0 +1,62 @@
+"""
+Booster Model
+XGBClassifier stand-in backed by a booster saved in XGBoost's native format
+"""
+
+import json
+from typing import List, Optional
+
+import numpy as np
+
+# Written by export_artifacts.py next to the pickled model
+NATIVE_MODEL_FILE = "final_model_xgboost.ubj"
+LABEL_CLASSES_FILE = "label_classes.json"
+
+class BoosterClassifier:
+    """
+    The subset of the XGBClassifier API the predictor uses, over a raw Booster
+
+    Loading a UBJSON booster skips unpickling the scikit-learn wrapper and
+    its estimator state. Predictions go through the same ``inplace_predict``
+    call and iteration range as ``XGBClassifier.predict_proba``.
+    """
+
+    def __init__(self, booster):
+        self._booster = booster
+        best_iteration = booster.attr("best_iteration")
+        self.best_iteration = int(best_iteration) if best_iteration is not None else None
+        # Model version stamped on the booster by export_artifacts.py
+        self.training_date = booster.attr("training_date")
+
+    @classmethod
+    def load(cls, model_file: str) -> "BoosterClassifier":
+        import xgboost as xgb
+        return cls(xgb.Booster(model_file=model_file))
+
+    def get_booster(self):
+        return self._booster
+
+    def set_params(self, n_jobs: Optional[int] = None):
+        if n_jobs is not None:
+            self._booster.set_param({'nthread': n_jobs})
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        iteration_range = (0, self.best_iteration + 1) if self.best_iteration is not None else (0, 0)
+        return self._booster.inplace_predict(X, iteration_range=iteration_range, missing=np.nan)
+
+class LabelClasses:
+    """Class names in model output order, standing in for the pickled LabelEncoder"""
+
+    def __init__(self, classes: List[str], training_date: Optional[str] = None):
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.training_date = training_date
+
+    @classmethod
+    def load(cls, path: str) -> "LabelClasses":
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data['classes'], data.get('training_date'))
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'classes': [str(c) for c in self.classes_], 'training_date': self.training_date}, f, indent=2)
@@ -0,0 +1,472 @@
+"""
+Bulk Scoring
+Incremental CSV/NDJSON upload parsing and chunked scoring with NDJSON output
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import IO, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .inference_pool import InferencePool, QueueFullError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Content types accepted for uploads, by format
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+}
+
+# Fields a row must have, as for /predict
+REQUIRED_FIELDS = ("age", "bmi", "systolic_bp", "diastolic_bp")
+
+# Bound checks by PatientData constraint name, with the symbol used in error records
+BOUND_CHECKS = {
+    "gt": (np.greater, ">"),
+    "ge": (np.greater_equal, ">="),
+    "lt": (np.less, "<"),
+    "le": (np.less_equal, "<="),
+}
+
+# Files inside a job directory
+UPLOAD_FILE = "upload"
+RESULT_FILE = "result.ndjson"
+STATUS_FILE = "status.json"
+
+READ_BLOCK_BYTES = 1 << 20
+
+def upload_format(content_type: Optional[str], format_hint: Optional[str] = None) -> str:
+    """
+    Resolve the upload format from an explicit hint or the Content-Type header
+
+    Raises:
+        ValueError: If neither names a supported format
+    """
+    if format_hint:
+        if format_hint not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported format {format_hint!r} (use csv or ndjson)")
+        return format_hint
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported Content-Type {media_type or 'none'!r}; send text/csv or "
+                         f"application/x-ndjson, or pass ?format=csv|ndjson")
+    return CONTENT_TYPES[media_type]
+
+class RecordChunker:
+    """
+    Splits an incoming byte stream into blocks of whole records
+
+    Bytes are buffered until at least ``chunk_rows`` complete lines are
+    available, then every complete line is released as one block; a partial
+    trailing line waits for the next read. For CSV the header line is kept
+    and prepended to every block, so each block parses on its own. Records
+    must not contain embedded newlines (quoted multi-line CSV fields).
+    """
+
+    def __init__(self, chunk_rows: int, fmt: str):
+        self.chunk_rows = chunk_rows
+        self.fmt = fmt
+        self.header: Optional[bytes] = None
+        self._pieces: List[bytes] = []
+        self._lines = 0
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Add received bytes, yielding any blocks that are now complete"""
+        if not data:
+            return
+        if self.fmt == "csv" and self.header is None:
+            self._pieces.append(data)
+            buffered = b"".join(self._pieces)
+            end = buffered.find(b"\n")
+            if end < 0:
+                self._pieces = [buffered]
+                return
+            self.header = buffered[:end + 1].removeprefix(b"\xef\xbb\xbf")
+            data = buffered[end + 1:]
+            self._pieces = []
+        self._pieces.append(data)
+        self._lines += data.count(b"\n")
+        if self._lines >= self.chunk_rows:
+            buffered = b"".join(self._pieces)
+            end = buffered.rfind(b"\n") + 1
+            self._pieces = [buffered[end:]] if end < len(buffered) else []
+            self._lines = 0
+            yield buffered[:end]
+
+    def finish(self) -> Iterator[bytes]:
+        """Release whatever is left once the stream has ended"""
+        buffered = b"".join(self._pieces)
+        self._pieces = []
+        self._lines = 0
+        if buffered.strip():
+            yield buffered if buffered.endswith(b"\n") else buffered + b"\n"
+
+class BulkScorer:
+    """
+    Scores uploaded patient files chunk by chunk through the inference pool
+
+    Each block of records is parsed column-wise with Arrow (no per-row
+    dictionaries or validation models), optional fields that are empty in a
+    row or absent from the file get the same defaults as /predict, and the
+    whole block is scored with a single vectorized model call. Rows missing a
+    required field or outside the PatientData ranges come back as error
+    records instead. Output is NDJSON in input order, one record per row with
+    the same score columns as score_cohort.py, plus the row number.
+
+    At most one block is held in memory per upload, so memory stays bounded
+    by ``chunk_rows`` regardless of file size; results are spooled to a
+    temporary file rather than sent while the upload is still arriving,
+    since most HTTP/1.1 clients only read the response after sending the
+    whole body. When the pool is saturated, bulk chunks wait for capacity
+    rather than failing, so interactive requests keep priority.
+    """
+
+    def __init__(self, pool: InferencePool, feature_names: List[str], defaults: Dict[str, float],
+                 bounds: Optional[Dict[str, List[Tuple[str, float]]]] = None, chunk_rows: int = 10000, spool_bytes: int = 8 << 20, jobs_dir: Optional[str] = None,
+                 job_ttl_seconds: float = 86400.0):
+        """
+        Create the scorer
+
+        Args:
+            pool: Inference pool that runs the model calls
+            feature_names: Model features, in training column order
+            defaults: Values for optional fields a row leaves empty (PatientData defaults)
+            bounds: (constraint, limit) pairs per field, e.g. ``{"bmi": [("gt", 10), ("lt", 70)]}``,
+                with constraint one of gt/ge/lt/le as on PatientData
+            chunk_rows: Rows parsed and scored per model call
+            spool_bytes: Results kept in memory before spilling to a temporary file
+            jobs_dir: Directory for background job uploads and results
+            job_ttl_seconds: Age after which finished jobs are deleted
+        """
+        self.pool = pool
+        self.feature_names = list(feature_names)
+        self.defaults = defaults
+        self.bounds = bounds or {}
+        self.chunk_rows = chunk_rows
+        self.spool_bytes = spool_bytes
+        self.jobs_dir = jobs_dir
+        self.job_ttl_seconds = job_ttl_seconds
+        self._jobs: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls, pool: InferencePool, feature_names: List[str], defaults: Dict[str, float],
+                 bounds: Optional[Dict[str, List[Tuple[str, float]]]] = None) -> "BulkScorer":
+        """Create a scorer from BULK_CHUNK_ROWS, BULK_JOBS_DIR and BULK_JOB_TTL_HOURS"""
+        return cls(
+            pool, feature_names, defaults, bounds,
+            chunk_rows=int(os.getenv("BULK_CHUNK_ROWS", "10000")),
+            jobs_dir=os.getenv("BULK_JOBS_DIR") or os.path.join(tempfile.gettempdir(), "welldoc_bulk_jobs"),
+            job_ttl_seconds=float(os.getenv("BULK_JOB_TTL_HOURS", "24")) * 3600
+        )
+
+    def _parse_block(self, block: bytes, fmt: str, header: Optional[bytes]) -> Dict[str, np.ndarray]:
+        """Parse one block into patient_id plus float64 feature columns (NaN where empty)"""
+        import pyarrow as pa
+
+        if fmt == "csv":
+            import pyarrow.csv as pacsv
+            present = {name.strip().strip('"') for name in header.decode().strip().split(",")}
+            wanted = [name for name in ["patient_id"] + self.feature_names if name in present]
+            table = pacsv.read_csv(
+                io.BytesIO(header + block),
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=wanted,
+                    column_types={name: pa.string() if name == "patient_id" else pa.float64() for name in wanted}
+                )
+            )
+        else:
+            import pyarrow.json as pajson
+            schema = pa.schema([("patient_id", pa.string())] + [(name, pa.float64()) for name in self.feature_names])
+            table = pajson.read_json(io.BytesIO(block), parse_options=pajson.ParseOptions(
+                explicit_schema=schema, unexpected_field_behavior="ignore"
+            ))
+        return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+
+    def _prepare(self, block: bytes, fmt: str, header: Optional[bytes],
+                 first_row: int) -> Tuple[Dict[str, np.ndarray], np.ndarray, Dict[int, bytes]]:
+        """
+        Parse a block and split it into scoreable columns and error records
+
+        Returns:
+            Tuple of (columns of the valid rows, row numbers of the valid rows,
+            error record per invalid row number)
+        """
+        columns = self._parse_block(block, fmt, header)
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        rows = np.arange(first_row, first_row + n_rows)
+
+        patient_ids = columns.get("patient_id")
+        if patient_ids is None:
+            patient_ids = np.array([f"row-{row}" for row in rows], dtype=object)
+        else:
+            missing_ids = np.array([pid is None for pid in patient_ids])
+            if missing_ids.any():
+                patient_ids = patient_ids.copy()
+                patient_ids[missing_ids] = [f"row-{row}" for row in rows[missing_ids]]
+
+        missing = np.zeros((n_rows, len(REQUIRED_FIELDS)), dtype=bool)
+        for j, name in enumerate(REQUIRED_FIELDS):
+            values = columns.get(name)
+            missing[:, j] = True if values is None else np.isnan(values)
+
+        # Same ranges /predict enforces; empty values are left to the defaults above
+        checks = [(name, op, limit) for name, constraints in self.bounds.items() if name in columns
+                  for op, limit in constraints]
+        out_of_range = np.zeros((n_rows, len(checks)), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for j, (name, op, limit) in enumerate(checks):
+                values = columns[name]
+                out_of_range[:, j] = ~BOUND_CHECKS[op][0](values, limit) & ~np.isnan(values)
+        invalid = missing.any(axis=1) | out_of_range.any(axis=1)
+
+        errors = {}
+        for i in np.flatnonzero(invalid):
+            problems = []
+            fields = [name for j, name in enumerate(REQUIRED_FIELDS) if missing[i, j]]
+            if fields:
+                problems.append(f"missing required field(s): {', '.join(fields)}")
+            ranges = [f"{name} must be {BOUND_CHECKS[op][1]} {limit}"
+                      for j, (name, op, limit) in enumerate(checks) if out_of_range[i, j]]
+            if ranges:
+                problems.append(f"out of range: {', '.join(ranges)}")
+            errors[int(rows[i])] = json.dumps({
+                'row': int(rows[i]), 'patient_id': patient_ids[i], 'error': "; ".join(problems)
+            }, separators=(',', ':')).encode() + b"\n"
+
+        valid = ~invalid
+        n_valid = int(valid.sum())
+        scored = {'patient_id': patient_ids[valid]}
+        for name in self.feature_names:
+            values = columns.get(name)
+            default = self.defaults.get(name)
+            if values is None:
+                # A column the file leaves out entirely gets the PatientData default too,
+                # not the encoder's fallback (which differs, e.g. for has_bmi_data)
+                if default is not None:
+                    scored[name] = np.full(n_valid, default, dtype=np.float64)
+                continue
+            values = values[valid]
+            if default is not None:
+                values = np.where(np.isnan(values), default, values)
+            scored[name] = values
+        return scored, rows[valid], errors
+
+    @staticmethod
+    def _format(scores, rows: np.ndarray, errors: Dict[int, bytes]) -> bytes:
+        """Scores frame plus error records as NDJSON, in input row order"""
+        output = b""
+        if scores is not None and len(scores):
+            scores.insert(0, 'row', rows)
+            output = scores.to_json(orient='records', lines=True, double_precision=6).encode()
+            if not output.endswith(b"\n"):
+                output += b"\n"
+        if not errors:
+            return output
+        lines = output.splitlines(keepends=True)
+        merged = []
+        position = 0
+        for row, error in sorted(errors.items()):
+            # rows are consecutive, so everything scored before this error row comes first
+            scored_before = int(np.searchsorted(rows, row))
+            merged.extend(lines[position:scored_before])
+            merged.append(error)
+            position = scored_before
+        merged.extend(lines[position:])
+        return b"".join(merged)
+
+    async def _score_block(self, block: bytes, fmt: str, header: Optional[bytes], first_row: int,
+                           model_version: Optional[str]) -> Tuple[bytes, int, int, Optional[str]]:
+        """Parse, score and format one block; returns (NDJSON, rows, errors, model version)"""
+        loop = asyncio.get_running_loop()
+        columns, rows, errors = await loop.run_in_executor(None, self._prepare, block, fmt, header, first_row)
+        scores, served_by = None, model_version
+        if len(rows):
+            while True:
+                try:
+                    scores, timing = await self.pool.run("score_columns", columns, model_version=model_version)
+                    served_by = timing['model_version']
+                    break
+                except QueueFullError:
+                    # Interactive requests come first; retry once the pool has room
+                    await asyncio.sleep(0.05)
+        output = await loop.run_in_executor(None, self._format, scores, rows, errors)
+        return output, len(rows) + len(errors), len(errors), served_by
+
+    async def score_stream(self, chunks: AsyncIterator[bytes], fmt: str, model_version: Optional[str] = None,
+                           summary: Optional[Dict] = None) -> AsyncIterator[bytes]:
+        """
+        Score an upload as it arrives, yielding NDJSON for each block
+
+        Args:
+            chunks: Raw upload bytes, in order
+            fmt: "csv" or "ndjson"
+            model_version: Registry version to score with (None for the active one)
+            summary: Optional dict updated with rows, errors, chunks and model_version as scoring progresses
+
+        Yields:
+            NDJSON bytes, one record per input row
+        """
+        summary = summary if summary is not None else {}
+        summary.update({'rows': 0, 'errors': 0, 'chunks': 0, 'model_version': model_version})
+        chunker = RecordChunker(self.chunk_rows, fmt)
+
+        async def blocks() -> AsyncIterator[bytes]:
+            async for data in chunks:
+                for block in chunker.feed(data):
+                    yield block
+            for block in chunker.finish():
+                yield block
+
+        async for block in blocks():
+            output, rows, errors, served_by = await self._score_block(
+                block, fmt, chunker.header, summary['rows'], model_version
+            )
+            summary['rows'] += rows
+            summary['errors'] += errors
+            summary['chunks'] += 1
+            summary['model_version'] = served_by
+            if output:
+                yield output
+
+    async def score_upload(self, chunks: AsyncIterator[bytes], fmt: str, model_version: Optional[str] = None,
+                           summary: Optional[Dict] = None) -> IO[bytes]:
+        """
+        Score an upload as it arrives into a spooled NDJSON result
+
+        Returns:
+            Temporary file positioned at the start of the results; the caller closes it
+        """
+        results = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        try:
+            async for output in self.score_stream(chunks, fmt, model_version, summary):
+                results.write(output)
+        except BaseException:
+            results.close()
+            raise
+        results.seek(0)
+        return results
+
+    # Background jobs, for uploads too large to score within one request
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _write_status(self, job_id: str, status: Dict):
+        path = os.path.join(self._job_dir(job_id), STATUS_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(status, f)
+        os.replace(path + ".tmp", path)
+
+    def job_status(self, job_id: str) -> Optional[Dict]:
+        """A job's status, read from disk so any worker process can answer; None if unknown"""
+        try:
+            with open(os.path.join(self._job_dir(os.path.basename(job_id)), STATUS_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(os.path.basename(job_id)), RESULT_FILE)
+
+    def _cleanup_expired(self):
+        if not os.path.isdir(self.jobs_dir):
+            return
+        cutoff = time.time() - self.job_ttl_seconds
+        for job_id in os.listdir(self.jobs_dir):
+            status = self.job_status(job_id)
+            if status is not None and status['state'] in ("completed", "failed") and status['updated_at'] < cutoff:
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    async def create_job(self, chunks: AsyncIterator[bytes], fmt: str, model_version: Optional[str] = None) -> Dict:
+        """
+        Spool an upload to disk and score it in the background
+
+        The upload is written straight to the job directory, so it is never
+        held in memory; scoring starts once it has been received completely.
+
+        Returns:
+            The new job's status
+        """
+        self._cleanup_expired()
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        upload_bytes = 0
+        try:
+            with open(os.path.join(job_dir, UPLOAD_FILE), 'wb') as f:
+                async for data in chunks:
+                    f.write(data)
+                    upload_bytes += len(data)
+        except BaseException:
+            # An interrupted upload leaves no job behind
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        status = {'job_id': job_id, 'state': 'queued', 'format': fmt, 'upload_bytes': upload_bytes,
+                  'rows': 0, 'errors': 0, 'chunks': 0, 'model_version': model_version,
+                  'created_at': time.time(), 'updated_at': time.time(), 'error': None}
+        self._write_status(job_id, status)
+        task = asyncio.create_task(self._run_job(job_id, status))
+        self._jobs[job_id] = task
+        task.add_done_callback(lambda _: self._jobs.pop(job_id, None))
+        logger.info(f"🔄 Bulk job {job_id} queued ({upload_bytes:,} bytes, {fmt})")
+        return status
+
+    async def _run_job(self, job_id: str, status: Dict):
+        job_dir = self._job_dir(job_id)
+        upload_path = os.path.join(job_dir, UPLOAD_FILE)
+        loop = asyncio.get_running_loop()
+
+        async def read_upload() -> AsyncIterator[bytes]:
+            with open(upload_path, 'rb') as f:
+                while True:
+                    data = await loop.run_in_executor(None, f.read, READ_BLOCK_BYTES)
+                    if not data:
+                        break
+                    yield data
+
+        status['state'] = 'running'
+        start = time.perf_counter()
+        try:
+            with open(os.path.join(job_dir, RESULT_FILE + ".partial"), 'wb') as result:
+                async for output in self.score_stream(read_upload(), status['format'],
+                                                      status['model_version'], summary=status):
+                    result.write(output)
+                    status['updated_at'] = time.time()
+                    self._write_status(job_id, status)
+            os.replace(os.path.join(job_dir, RESULT_FILE + ".partial"), os.path.join(job_dir, RESULT_FILE))
+            status['state'] = 'completed'
+            logger.info(f"✅ Bulk job {job_id}: {status['rows']:,} rows in {time.perf_counter() - start:.1f}s")
+        except asyncio.CancelledError:
+            status['state'], status['error'] = 'failed', 'cancelled'
+            raise
+        except Exception as e:
+            status['state'], status['error'] = 'failed', str(e)
+            logger.error(f"❌ Bulk job {job_id} failed: {e}")
+        finally:
+            status['seconds'] = round(time.perf_counter() - start, 3)
+            status['updated_at'] = time.time()
+            self._write_status(job_id, status)
+            os.remove(upload_path)
+
+    async def shutdown(self):
+        """Cancel running jobs; they are reported as failed"""
+        for task in list(self._jobs.values()):
+            task.cancel()
+        if self._jobs:
+            await asyncio.gather(*self._jobs.values(), return_exceptions=True)
@@ -0,0 +1,514 @@
+"""
+Cohort Analytics
+Incrementally maintained risk aggregates and worklist indexes over the scored population
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RISK_LEVELS = ('low', 'medium', 'high')
+RISK_CODES = {level: code for code, level in enumerate(RISK_LEVELS)}
+
+CONDITION_FLAGS = [
+    'has_diabetes', 'has_hypertension', 'has_heart_disease', 'has_kidney_disease',
+    'has_stroke', 'has_copd', 'has_depression', 'has_cancer',
+]
+
+# Numeric columns kept per patient for display and sorting
+PATIENT_COLUMNS = ['age', 'comorbidity_count', 'medication_count']
+SORT_KEYS = ('deterioration_probability', *PATIENT_COLUMNS)
+
+PROBABILITY_BINS = 10
+LOAD_CHUNK_SIZE = 200000
+MAX_PENDING = 1024
+
+class CohortAnalytics:
+    """
+    In-memory analytics over every scored patient
+
+    Patients live in growable column arrays (one row per patient ID).
+    Aggregates (counts and probability histograms per risk level, per
+    condition risk breakdowns) are adjusted by each update's delta rather
+    than recomputed. Worklists are served from indexes kept sorted by
+    deterioration probability, one per risk level plus one overall, which
+    updates merge into with a binary search, so a page read is a slice.
+    Condition filters use the per-patient flag matrix as a bitmap index.
+
+    Updates from live predictions are buffered under a lock of their own and
+    applied in one batch by a background thread once MAX_PENDING accumulate
+    (or on the next read), so recording a prediction is an O(1) append that
+    never waits for an update in progress.
+
+    Every patient row records the model version that scored it. Live
+    predictions from any other version than the cohort's are ignored, and
+    after a model swap ``refresh`` rescores the source file; rows that could
+    not be rescored are reported as stale.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Create an empty cohort
+
+        Args:
+            capacity: Initial row capacity (grows by doubling)
+        """
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._row_of: Dict[str, int] = {}
+        self._size = 0
+        self._patient_ids = np.empty(capacity, dtype=object)
+        self._risk_codes = np.zeros(capacity, dtype=np.int8)
+        self._probabilities = np.zeros(capacity, dtype=np.float32)
+        self._values = np.zeros((capacity, len(PATIENT_COLUMNS)), dtype=np.float32)
+        self._flags = np.zeros((capacity, len(CONDITION_FLAGS)), dtype=bool)
+        self._version_codes = np.zeros(capacity, dtype=np.int16)
+
+        n_levels = len(RISK_LEVELS)
+        self._level_counts = np.zeros(n_levels, dtype=np.int64)
+        self._level_probability_sums = np.zeros(n_levels, dtype=np.float64)
+        self._histogram = np.zeros((n_levels, PROBABILITY_BINS), dtype=np.int64)
+        self._condition_counts = np.zeros((len(CONDITION_FLAGS), n_levels), dtype=np.int64)
+        self._condition_probability_sums = np.zeros(len(CONDITION_FLAGS), dtype=np.float64)
+        self._version_names: List[str] = []
+        self._version_counts = np.zeros(0, dtype=np.int64)
+
+        # Sorted indexes: row ids ordered by descending probability, with the
+        # negated probabilities alongside for binary search
+        self._indexes = {key: (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+                         for key in (*RISK_LEVELS, 'all')}
+
+        self._pending: List[Dict] = []
+        self._flush_requested = threading.Event()
+        self.ready = False
+        self.source = None
+        self.model_version: Optional[str] = None
+        self.updated_at = None
+        self.updates_applied = 0
+        self.refreshes = 0
+        threading.Thread(target=self._drain, name="cohort-drain", daemon=True).start()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load(self, path: str, predictor, model_version: Optional[str] = None, chunksize: int = LOAD_CHUNK_SIZE):
+        """
+        Score a feature file and add every patient to the cohort
+
+        Args:
+            path: Feature CSV, Parquet file/directory or feature store root
+            predictor: RiskPredictor used to score the patients
+            model_version: Registry version of ``predictor`` (defaults to its metadata version)
+            chunksize: Patients scored per model call
+        """
+        start = time.perf_counter()
+        self.model_version = model_version or predictor.model_version
+        for batch in self._score_chunks(path, predictor, chunksize):
+            with self._lock:
+                self._apply(*batch, self.model_version)
+        self.source = path
+        self.ready = True
+        logger.info(f"✅ Cohort analytics loaded {self._size:,} patients from {path} "
+                    f"with model version {self.model_version} in {time.perf_counter() - start:.2f}s")
+
+    @staticmethod
+    def _score_chunks(path: str, predictor, chunksize: int):
+        """Yield (patient_ids, risk_levels, probabilities, values, flags) per scored chunk"""
+        # pandas/pyarrow are only needed here, off the request path
+        from .feature_store import FeatureStore, read_feature_chunks
+
+        encoder = predictor.feature_encoder
+        for chunk in read_feature_chunks(path, encoder.feature_names, chunksize):
+            X = encoder.encode_columns(chunk, len(chunk))
+            scores = FeatureStore.scores_frame(
+                chunk['patient_id'].values, predictor.score_matrix(X),
+                predictor.label_encoder.classes_, predictor.model_version
+            )
+            yield (
+                scores['patient_id'].values,
+                scores['risk_level'].values,
+                scores['deterioration_probability'].values,
+                X[:, [encoder.column_index[name] for name in PATIENT_COLUMNS]],
+                X[:, [encoder.column_index[name] for name in CONDITION_FLAGS]] >= 0.5,
+            )
+
+    def refresh(self, predictor, model_version: str, chunksize: int = LOAD_CHUNK_SIZE):
+        """
+        Rescore the source file after the active model changed
+
+        Live predictions from ``model_version`` are accepted from now on;
+        patients the source does not contain keep their previous scores and
+        count as stale until they are predicted again.
+
+        Args:
+            predictor: The newly active RiskPredictor
+            model_version: Its registry version
+            chunksize: Patients scored per model call
+        """
+        if self.source is None or model_version == self.model_version:
+            return
+        logger.info(f"🔄 Rescoring cohort with model version {model_version}")
+        start = time.perf_counter()
+        with self._lock:
+            # Results buffered so far belong to the outgoing version
+            self._flush_pending()
+            self.model_version = model_version
+        # Score everything outside the lock, then swap it in as one batch so
+        # readers never see a half-rescored cohort
+        batches = list(self._score_chunks(self.source, predictor, chunksize))
+        if batches:
+            patient_ids, risk_levels, probabilities, values, flags = (
+                np.concatenate(parts) for parts in zip(*batches)
+            )
+            with self._lock:
+                self._apply(patient_ids, risk_levels, probabilities, values, flags, model_version,
+                            rebuild_indexes=True)
+        self.refreshes += 1
+        logger.info(f"✅ Cohort analytics rescored {self._size:,} patients with model version "
+                    f"{model_version} in {time.perf_counter() - start:.2f}s")
+
+    def record_predictions(self, patients: Sequence[Dict], predictions: Sequence[Dict],
+                           model_version: Optional[str] = None):
+        """
+        Queue live prediction results for the next aggregate update
+
+        Only appends to a buffer, so it is safe to call from the event loop.
+
+        Args:
+            patients: Patient feature dictionaries that were scored
+            predictions: RiskPredictor prediction dictionaries, same order
+            model_version: Registry version that produced the predictions;
+                results from a version other than the cohort's are ignored
+        """
+        if model_version is not None and model_version != self.model_version:
+            return
+        updates = [
+            {
+                'model_version': self.model_version,
+                'patient_id': prediction['patient_id'],
+                'risk_level': prediction['risk_assessment']['risk_level'],
+                'deterioration_probability': prediction['risk_assessment']['deterioration_probability'],
+                'values': [patient.get(name) or 0 for name in PATIENT_COLUMNS],
+                'flags': [bool(patient.get(name)) for name in CONDITION_FLAGS],
+            }
+            for patient, prediction in zip(patients, predictions)
+            if prediction.get('patient_id', 'unknown') != 'unknown'
+        ]
+        with self._pending_lock:
+            self._pending.extend(updates)
+            pending = len(self._pending)
+        if pending >= MAX_PENDING:
+            self._flush_requested.set()
+
+    def _drain(self):
+        """Background thread: apply buffered updates whenever enough have accumulated"""
+        while True:
+            self._flush_requested.wait()
+            self._flush_requested.clear()
+            try:
+                with self._lock:
+                    self._flush_pending()
+            except Exception as e:
+                logger.error(f"❌ Failed to apply cohort updates: {e}")
+
+    def _flush_pending(self):
+        """Apply buffered live updates (caller holds the lock)"""
+        # Taken while holding the main lock, so batches are applied in arrival order
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        # Drop results queued by a version the cohort has since moved on from
+        pending = [p for p in pending if p['model_version'] == self.model_version]
+        if not pending:
+            return
+        self._apply(
+            np.array([p['patient_id'] for p in pending], dtype=object),
+            np.array([p['risk_level'] for p in pending], dtype=object),
+            np.array([p['deterioration_probability'] for p in pending], dtype=np.float32),
+            np.array([p['values'] for p in pending], dtype=np.float32),
+            np.array([p['flags'] for p in pending], dtype=bool),
+            self.model_version,
+        )
+
+    def _grow(self, needed: int):
+        capacity = len(self._patient_ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_patient_ids', '_risk_codes', '_probabilities', '_values', '_flags', '_version_codes'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _aggregate(self, rows: np.ndarray, sign: int):
+        """Add (sign=1) or remove (sign=-1) rows' contributions to every aggregate"""
+        if len(rows) == 0:
+            return
+        codes = self._risk_codes[rows]
+        probabilities = self._probabilities[rows].astype(np.float64)
+        flags = self._flags[rows]
+        bins = np.minimum((probabilities * PROBABILITY_BINS).astype(np.int64), PROBABILITY_BINS - 1)
+
+        np.add.at(self._level_counts, codes, sign)
+        np.add.at(self._level_probability_sums, codes, sign * probabilities)
+        np.add.at(self._histogram, (codes, bins), sign)
+        flagged_rows, flagged_conditions = np.nonzero(flags)
+        np.add.at(self._condition_counts, (flagged_conditions, codes[flagged_rows]), sign)
+        self._condition_probability_sums += sign * (flags.T.astype(np.float64) @ probabilities)
+        version_counts = np.bincount(self._version_codes[rows], minlength=len(self._version_names))
+        self._version_counts += sign * version_counts
+
+    def _index_remove(self, key: str, rows: np.ndarray):
+        """Remove rows from an index, keeping the others in order"""
+        index, keys = self._indexes[key]
+        keep = ~np.isin(index, rows)
+        self._indexes[key] = (index[keep], keys[keep])
+
+    def _rebuild_indexes(self):
+        """Rebuild every sorted index from the row arrays with a single sort"""
+        keys = -self._probabilities[:self._size]
+        index = np.argsort(keys, kind='stable')
+        keys = keys[index]
+        self._indexes['all'] = (index, keys)
+        codes = self._risk_codes[index]
+        for code, level in enumerate(RISK_LEVELS):
+            in_level = codes == code
+            self._indexes[level] = (index[in_level], keys[in_level])
+
+    def _index_insert(self, key: str, rows: np.ndarray):
+        index, keys = self._indexes[key]
+        new_keys = -self._probabilities[rows]
+        order = np.argsort(new_keys, kind='stable')
+        positions = np.searchsorted(keys, new_keys[order], side='right')
+        self._indexes[key] = (np.insert(index, positions, rows[order]), np.insert(keys, positions, new_keys[order]))
+
+    def _version_code(self, model_version: str) -> int:
+        if model_version not in self._version_names:
+            self._version_names.append(model_version)
+            self._version_counts = np.append(self._version_counts, 0)
+        return self._version_names.index(model_version)
+
+    def _apply(self, patient_ids: np.ndarray, risk_levels: np.ndarray, probabilities: np.ndarray,
+               values: np.ndarray, flags: np.ndarray, model_version: str, rebuild_indexes: bool = False):
+        """
+        Upsert a batch of scored patients (caller holds the lock)
+
+        With ``rebuild_indexes`` the sorted indexes are rebuilt from scratch
+        instead of updated row by row, which is cheaper when the batch
+        rescores most of the cohort.
+        """
+        # Within one batch the last result for a patient wins
+        _, last_reversed = np.unique(patient_ids[::-1], return_index=True)
+        keep = np.sort(len(patient_ids) - 1 - last_reversed)
+        patient_ids, risk_levels = patient_ids[keep], risk_levels[keep]
+        probabilities, values, flags = probabilities[keep], values[keep], flags[keep]
+
+        rows = np.fromiter((self._row_of.get(pid, -1) for pid in patient_ids), dtype=np.int64, count=len(patient_ids))
+        existing = rows[rows >= 0]
+
+        # Retract the previous state of patients being re-scored
+        self._aggregate(existing, -1)
+        if not rebuild_indexes:
+            old_codes = self._risk_codes[existing]
+            for code, level in enumerate(RISK_LEVELS):
+                level_rows = existing[old_codes == code]
+                if len(level_rows):
+                    self._index_remove(level, level_rows)
+            if len(existing):
+                self._index_remove('all', existing)
+
+        new = rows < 0
+        n_new = int(new.sum())
+        if n_new:
+            self._grow(self._size + n_new)
+            rows[new] = np.arange(self._size, self._size + n_new)
+            for pid, row in zip(patient_ids[new], rows[new]):
+                self._row_of[pid] = int(row)
+            self._patient_ids[rows[new]] = patient_ids[new]
+            self._size += n_new
+
+        self._risk_codes[rows] = [RISK_CODES[level] for level in risk_levels]
+        self._probabilities[rows] = probabilities
+        self._values[rows] = values
+        self._flags[rows] = flags
+        self._version_codes[rows] = self._version_code(model_version)
+
+        self._aggregate(rows, 1)
+        if rebuild_indexes:
+            self._rebuild_indexes()
+        else:
+            codes = self._risk_codes[rows]
+            for code, level in enumerate(RISK_LEVELS):
+                level_rows = rows[codes == code]
+                if len(level_rows):
+                    self._index_insert(level, level_rows)
+            self._index_insert('all', rows)
+
+        self.updates_applied += len(rows)
+        self.updated_at = datetime.now().isoformat()
+
+    def summary(self) -> Dict:
+        """Population size, risk-level distribution and deterioration probability histogram"""
+        with self._lock:
+            self._flush_pending()
+            total = self._size
+            histogram = self._histogram.copy()
+            return {
+                'total_patients': total,
+                'risk_levels': {level: int(self._level_counts[code]) for code, level in enumerate(RISK_LEVELS)},
+                'risk_level_percentages': {
+                    level: float(self._level_counts[code] / total * 100) if total else 0.0
+                    for code, level in enumerate(RISK_LEVELS)
+                },
+                'average_deterioration_probability': float(self._level_probability_sums.sum() / total) if total else 0.0,
+                'average_deterioration_probability_by_level': {
+                    level: float(self._level_probability_sums[code] / self._level_counts[code])
+                    if self._level_counts[code] else 0.0
+                    for code, level in enumerate(RISK_LEVELS)
+                },
+                'risk_distribution': [
+                    {
+                        'range': f"{b / PROBABILITY_BINS:.1f}-{(b + 1) / PROBABILITY_BINS:.1f}",
+                        'count': int(histogram[:, b].sum()),
+                        **{level: int(histogram[code, b]) for code, level in enumerate(RISK_LEVELS)}
+                    }
+                    for b in range(PROBABILITY_BINS)
+                ],
+                'model_version': self.model_version,
+                'model_versions': self._model_version_counts(),
+                'stale_patients': int(total - self._current_version_count()),
+                'updated_at': self.updated_at,
+            }
+
+    def _model_version_counts(self) -> Dict[str, int]:
+        """Patients per scoring model version (caller holds the lock)"""
+        return {name: int(count) for name, count in zip(self._version_names, self._version_counts) if count}
+
+    def _current_version_count(self) -> int:
+        if self.model_version not in self._version_names:
+            return 0
+        return int(self._version_counts[self._version_names.index(self.model_version)])
+
+    def condition_breakdown(self) -> List[Dict]:
+        """Per-condition patient counts, risk-level split and average deterioration probability"""
+        with self._lock:
+            self._flush_pending()
+            breakdown = []
+            for c, condition in enumerate(CONDITION_FLAGS):
+                counts = self._condition_counts[c]
+                patients = int(counts.sum())
+                breakdown.append({
+                    'condition': condition,
+                    'patients': patients,
+                    'risk_levels': {level: int(counts[code]) for code, level in enumerate(RISK_LEVELS)},
+                    'high_risk_rate': float(counts[RISK_CODES['high']] / patients) if patients else 0.0,
+                    'average_deterioration_probability':
+                        float(self._condition_probability_sums[c] / patients) if patients else 0.0,
+                })
+            return breakdown
+
+    def worklist(self, risk_level: Optional[str] = 'high', condition: Optional[str] = None,
+                 sort_by: str = 'deterioration_probability', descending: bool = True,
+                 page: int = 1, page_size: int = 50) -> Dict:
+        """
+        One page of patients, filtered and sorted
+
+        Args:
+            risk_level: 'low', 'medium', 'high', or None for everyone
+            condition: Optional condition flag the patients must have (e.g. 'has_diabetes')
+            sort_by: One of SORT_KEYS
+            descending: Sort order
+            page: 1-based page number
+            page_size: Patients per page
+
+        Returns:
+            Dictionary with total, pages and the page's patients
+
+        Raises:
+            ValueError: On an unknown risk level, condition or sort key
+        """
+        if risk_level is not None and risk_level not in RISK_CODES:
+            raise ValueError(f"Unknown risk level: {risk_level}")
+        if condition is not None and condition not in CONDITION_FLAGS:
+            raise ValueError(f"Unknown condition: {condition}")
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}")
+
+        with self._lock:
+            self._flush_pending()
+            index, _ = self._indexes[risk_level or 'all']
+            if condition is not None:
+                index = index[self._flags[index, CONDITION_FLAGS.index(condition)]]
+
+            total = len(index)
+            start = (page - 1) * page_size
+            end = min(start + page_size, total)
+            if start >= total:
+                page_rows = index[:0]
+            elif sort_by == 'deterioration_probability':
+                # The index is already in descending probability order
+                page_rows = index[start:end] if descending else index[::-1][start:end]
+            else:
+                keys = self._values[index, PATIENT_COLUMNS.index(sort_by)]
+                keys = -keys if descending else keys
+                # Only rows up to the end of the page (plus ties) need ordering;
+                # a stable sort keeps ties in the index's probability order
+                if end < total:
+                    threshold = np.partition(keys, end - 1)[end - 1]
+                    candidates = np.flatnonzero(keys <= threshold)
+                else:
+                    candidates = np.arange(total)
+                ordered = candidates[np.argsort(keys[candidates], kind='stable')]
+                page_rows = index[ordered[start:end]]
+
+            patients = [self._patient_record(row) for row in page_rows]
+
+        return {
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'pages': -(-total // page_size) if page_size else 0,
+            'risk_level': risk_level,
+            'condition': condition,
+            'sort_by': sort_by,
+            'order': 'desc' if descending else 'asc',
+            'patients': patients,
+        }
+
+    def _patient_record(self, row: int) -> Dict:
+        values = self._values[row]
+        return {
+            'patient_id': self._patient_ids[row],
+            'risk_level': RISK_LEVELS[self._risk_codes[row]],
+            'deterioration_probability': float(self._probabilities[row]),
+            'model_version': self._version_names[self._version_codes[row]],
+            **{name: float(values[j]) for j, name in enumerate(PATIENT_COLUMNS)},
+            'conditions': [name for c, name in enumerate(CONDITION_FLAGS) if self._flags[row, c]],
+        }
+
+    def stats(self) -> Dict:
+        """Size, update counters and scoring model versions"""
+        with self._lock:
+            model_versions = self._model_version_counts()
+            stale = self._size - self._current_version_count()
+        return {
+            'ready': self.ready,
+            'source': self.source,
+            'patients': self._size,
+            'model_version': self.model_version,
+            'model_versions': model_versions,
+            'stale_patients': int(stale),
+            'refreshes': self.refreshes,
+            'pending_updates': len(self._pending),
+            'updates_applied': self.updates_applied,
+            'updated_at': self.updated_at,
+        }
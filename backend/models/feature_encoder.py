@@ -0,0 +1,123 @@
+"""
+Feature Encoder
+Turns patient dictionaries into the model's feature matrix without pandas
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Values used when a patient record does not supply a feature at all.
+# Anything not listed here defaults to 0 (absent condition / zero count).
+DEFAULT_FEATURE_VALUES = {
+    'age': 50,
+    'gender_male': 0,
+    'bmi': 25.0,
+    'systolic_bp': 120.0,
+    'diastolic_bp': 80.0,
+    'heart_rate': 70.0,
+    'glucose': 100.0,
+    'hba1c': 6.0,
+    'cholesterol': 200.0
+}
+
+class FeatureEncoder:
+    """
+    Precompiled encoder from patient dictionaries to a float32 feature matrix
+
+    Column order, defaults and dtype are fixed once from feature_metadata.json,
+    so encoding a request is a single pass over the feature list per patient.
+    Explicit ``None`` values are encoded as NaN, which XGBoost treats as missing.
+    """
+
+    dtype = np.float32
+
+    def __init__(self, feature_names: List[str]):
+        """
+        Build the encoder for a fixed feature order
+
+        Args:
+            feature_names: Model feature names, in training column order
+        """
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.column_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.default_vector = np.array(
+            [DEFAULT_FEATURE_VALUES.get(name, 0) for name in self.feature_names],
+            dtype=self.dtype
+        )
+        self._feature_defaults = [
+            (name, DEFAULT_FEATURE_VALUES.get(name, 0)) for name in self.feature_names
+        ]
+
+    @classmethod
+    def from_metadata(cls, feature_metadata: Dict) -> "FeatureEncoder":
+        """Create an encoder from the contents of feature_metadata.json"""
+        return cls(feature_metadata['feature_names'])
+
+    def encode(self, patient_data: Dict) -> np.ndarray:
+        """
+        Encode a single patient
+
+        Args:
+            patient_data: Dictionary with patient features
+
+        Returns:
+            Feature matrix of shape (1, n_features)
+        """
+        return self.encode_batch([patient_data])
+
+    def encode_batch(self, patients: List[Dict], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode a list of patients into one contiguous matrix
+
+        Args:
+            patients: List of dictionaries with patient features
+            out: Optional preallocated float32 buffer of shape
+                (len(patients), n_features) to write into
+
+        Returns:
+            Feature matrix of shape (n_patients, n_features)
+        """
+        n_patients = len(patients)
+        if out is None:
+            out = np.empty((n_patients, self.n_features), dtype=self.dtype)
+        elif out.shape != (n_patients, self.n_features) or out.dtype != self.dtype:
+            raise ValueError(
+                f"Output buffer must be {self.dtype.__name__} with shape "
+                f"({n_patients}, {self.n_features}), got {out.dtype} {out.shape}"
+            )
+
+        feature_defaults = self._feature_defaults
+        for i, patient in enumerate(patients):
+            out[i] = [patient.get(name, default) for name, default in feature_defaults]
+
+        return out
+
+    def encode_columns(self, columns: Any, n_rows: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode column-oriented data (e.g. a DataFrame chunk) without building dictionaries
+
+        Args:
+            columns: Mapping of feature name -> 1-D array of length n_rows;
+                a pandas DataFrame works. Missing features get their defaults.
+            n_rows: Number of patients
+            out: Optional preallocated float32 buffer of shape (n_rows, n_features)
+
+        Returns:
+            Feature matrix of shape (n_rows, n_features)
+        """
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=self.dtype)
+        elif out.shape != (n_rows, self.n_features) or out.dtype != self.dtype:
+            raise ValueError(
+                f"Output buffer must be {self.dtype.__name__} with shape "
+                f"({n_rows}, {self.n_features}), got {out.dtype} {out.shape}"
+            )
+
+        for j, (name, default) in enumerate(self._feature_defaults):
+            if name in columns:
+                out[:, j] = np.asarray(columns[name], dtype=self.dtype)
+            else:
+                out[:, j] = default
+
+        return out
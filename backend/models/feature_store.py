@@ -0,0 +1,329 @@
+"""
+Feature Store
+Partitioned, compressed Parquet storage for patient features and scored outputs
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEATURES_DIR = "features"
+SCORES_DIR = "scores"
+SCHEMA_FILE = "_schema.json"
+DEFAULT_BUCKETS = 16
+ROW_GROUP_SIZE = 65536
+
+# Optional training target carried alongside the features (step1 output)
+TARGET_FIELDS = [
+    pa.field('risk_score', pa.int32()),
+    pa.field('risk_level', pa.string()),
+]
+
+SCORE_SCHEMA = pa.schema([
+    pa.field('patient_id', pa.string(), nullable=False),
+    pa.field('model_version', pa.string()),
+    pa.field('risk_level', pa.string()),
+    pa.field('deterioration_probability', pa.float32()),
+    pa.field('high_risk', pa.float32()),
+    pa.field('medium_risk', pa.float32()),
+    pa.field('low_risk', pa.float32()),
+    pa.field('scored_at', pa.timestamp('ms', tz='UTC')),
+])
+
+# Filters use the pyarrow/pandas DNF tuple form, e.g.
+# [('has_diabetes', '==', 1), ('age', '>=', 65)]
+Filters = Union[List[Tuple], List[List[Tuple]], ds.Expression, None]
+
+def patient_buckets(patient_ids: Sequence[str], num_buckets: int = DEFAULT_BUCKETS) -> np.ndarray:
+    """Stable hash partition of each patient ID into ``num_buckets`` buckets"""
+    hashes = pd.util.hash_pandas_object(pd.Series(patient_ids, dtype=object), index=False).values
+    return (hashes % np.uint64(num_buckets)).astype(np.int32)
+
+def read_feature_chunks(path: str, feature_names: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Read patient_id plus the model features in chunks of at most ``chunksize`` rows
+
+    Accepts a CSV with the primary_dataset.csv schema, a Parquet file, a
+    Parquet directory or a feature store root (its features/ are read). Features absent
+    from the file are simply not returned. Chunk boundaries depend only on
+    the input, so re-reading the same input yields the same chunks.
+    """
+    wanted = ['patient_id'] + list(feature_names)
+    if os.path.isdir(os.path.join(path, FEATURES_DIR)):
+        path = os.path.join(path, FEATURES_DIR)
+    if os.path.isdir(path) or path.endswith((".parquet", ".pq")):
+        dataset = ds.dataset(path, format='parquet', partitioning='hive' if os.path.isdir(path) else None)
+        columns = [name for name in wanted if name in dataset.schema.names]
+        for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    else:
+        dtypes = {'patient_id': str, **{name: 'float32' for name in feature_names}}
+        yield from pd.read_csv(path, usecols=lambda c: c in set(wanted), dtype=dtypes, chunksize=chunksize)
+
+class FeatureStore:
+    """
+    Columnar store for the primary dataset and model outputs
+
+    Layout under ``root``::
+
+        _schema.json                 feature order pinned from feature_metadata.json
+        features/bucket=NN/*.parquet patient_id + model features (+ optional target)
+        scores/bucket=NN/*.parquet   appended scoring runs
+
+    Rows are hash-partitioned by patient ID and written as zstd-compressed
+    Parquet with bounded row groups, so filters on partition or feature
+    columns skip whole files and row groups via their statistics. Feature
+    columns are stored as float32, the dtype the model consumes, so loading
+    the inference matrix reads Arrow buffers directly instead of re-parsing
+    text.
+    """
+
+    def __init__(self, root: str, feature_names: List[str], num_buckets: int = DEFAULT_BUCKETS):
+        """
+        Open (or initialise) a store
+
+        Args:
+            root: Store directory
+            feature_names: Model feature names, in training column order
+            num_buckets: Patient hash partitions for new stores
+
+        Raises:
+            ValueError: If the store was created for a different feature list
+        """
+        self.root = root
+        self.feature_names = list(feature_names)
+        self.num_buckets = num_buckets
+        self.feature_schema = pa.schema(
+            [pa.field('patient_id', pa.string(), nullable=False)]
+            + [pa.field(name, pa.float32()) for name in self.feature_names]
+        )
+        self._pin_schema()
+
+    @classmethod
+    def from_metadata(cls, root: str, model_path: str, num_buckets: int = DEFAULT_BUCKETS) -> "FeatureStore":
+        """Open a store whose schema is pinned to <model_path>/feature_metadata.json"""
+        with open(os.path.join(model_path, "feature_metadata.json"), 'r') as f:
+            feature_metadata = json.load(f)
+        return cls(root, feature_metadata['feature_names'], num_buckets=num_buckets)
+
+    @property
+    def features_path(self) -> str:
+        return os.path.join(self.root, FEATURES_DIR)
+
+    @property
+    def scores_path(self) -> str:
+        return os.path.join(self.root, SCORES_DIR)
+
+    def _pin_schema(self):
+        """Record the feature order on first use and refuse mismatched stores afterwards"""
+        schema_path = os.path.join(self.root, SCHEMA_FILE)
+        if os.path.exists(schema_path):
+            with open(schema_path, 'r') as f:
+                pinned = json.load(f)
+            if pinned['feature_names'] != self.feature_names:
+                raise ValueError(
+                    f"Feature store at {self.root} was written for a different feature list "
+                    f"({len(pinned['feature_names'])} features); rebuild it for the current model"
+                )
+            self.num_buckets = pinned['num_buckets']
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        with open(schema_path, 'w') as f:
+            json.dump({'feature_names': self.feature_names, 'num_buckets': self.num_buckets}, f, indent=2)
+
+    def _to_table(self, data: Union[pd.DataFrame, pa.Table], schema: pa.Schema) -> pa.Table:
+        """Select and cast columns to a pinned schema, adding the bucket column"""
+        table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+        missing = [name for name in schema.names if name not in table.column_names]
+        if missing:
+            raise ValueError(f"Missing columns for feature store: {missing}")
+
+        table = table.select(schema.names).cast(schema)
+        buckets = patient_buckets(table.column('patient_id').to_numpy(zero_copy_only=False), self.num_buckets)
+        return table.append_column('bucket', pa.array(buckets, type=pa.int32()))
+
+    def _write(self, table: pa.Table, base_dir: str):
+        parquet_format = ds.ParquetFileFormat()
+        ds.write_dataset(
+            table,
+            base_dir,
+            format=parquet_format,
+            partitioning=ds.partitioning(pa.schema([('bucket', pa.int32())]), flavor='hive'),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            file_options=parquet_format.make_write_options(compression='zstd'),
+            existing_data_behavior='overwrite_or_ignore',
+            max_rows_per_group=ROW_GROUP_SIZE,
+        )
+
+    def write_features(self, data: Union[pd.DataFrame, pa.Table], overwrite: bool = True) -> int:
+        """
+        Persist patient features (e.g. the step1 primary dataset)
+
+        Args:
+            data: Frame with patient_id and every model feature; risk_score
+                  and risk_level are kept when present
+            overwrite: Replace existing features instead of appending
+
+        Returns:
+            Number of rows written
+        """
+        columns = data.column_names if isinstance(data, pa.Table) else list(data.columns)
+        schema = self.feature_schema
+        for field in TARGET_FIELDS:
+            if field.name in columns:
+                schema = schema.append(field)
+
+        table = self._to_table(data, schema)
+        if overwrite and os.path.exists(self.features_path):
+            shutil.rmtree(self.features_path)
+        self._write(table, self.features_path)
+        logger.info(f"✅ Wrote {table.num_rows:,} patient feature rows to {self.features_path}")
+        return table.num_rows
+
+    def append_scores(self, scores: Union[pd.DataFrame, pa.Table]) -> int:
+        """
+        Append one scoring run to the store
+
+        Args:
+            scores: Frame with the SCORE_SCHEMA columns; scored_at defaults to now
+
+        Returns:
+            Number of rows appended
+        """
+        if isinstance(scores, pd.DataFrame) and 'scored_at' not in scores.columns:
+            scores = scores.assign(scored_at=pd.Timestamp(datetime.now(timezone.utc)).floor('ms'))
+        table = self._to_table(scores, SCORE_SCHEMA)
+        self._write(table, self.scores_path)
+        return table.num_rows
+
+    @staticmethod
+    def scores_frame(patient_ids: Sequence[str], probabilities: np.ndarray, class_names: Sequence[str],
+                     model_version: str) -> pd.DataFrame:
+        """
+        Build an append_scores frame from a class-probability matrix
+
+        Args:
+            patient_ids: Patient ID per probability row
+            probabilities: Array of shape (n_patients, n_classes)
+            class_names: Label encoder classes, in column order
+            model_version: Version tag of the model that produced the scores
+        """
+        columns = {name: probabilities[:, i] for i, name in enumerate(class_names)}
+        return pd.DataFrame({
+            'patient_id': list(patient_ids),
+            'model_version': model_version,
+            'risk_level': np.asarray(class_names)[np.argmax(probabilities, axis=1)],
+            'deterioration_probability': columns['high'] + 0.5 * columns['medium'],
+            'high_risk': columns['high'],
+            'medium_risk': columns['medium'],
+            'low_risk': columns['low'],
+        })
+
+    def _dataset(self, base_dir: str) -> Optional[ds.Dataset]:
+        if not os.path.exists(base_dir):
+            return None
+        return ds.dataset(base_dir, format='parquet', partitioning='hive')
+
+    @staticmethod
+    def _expression(filters: Filters) -> Optional[ds.Expression]:
+        if filters is None or isinstance(filters, ds.Expression):
+            return filters
+        return pq.filters_to_expression(filters)
+
+    def _read(self, base_dir: str, columns: Optional[List[str]], filters: Filters) -> Optional[pa.Table]:
+        dataset = self._dataset(base_dir)
+        if dataset is None:
+            return None
+        return dataset.to_table(columns=columns, filter=self._expression(filters))
+
+    def load_features(self, filters: Filters = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load patient features as a DataFrame
+
+        Args:
+            filters: Predicate pushed down to partitions and row groups
+            columns: Columns to read (default: everything except the bucket)
+        """
+        if columns is None:
+            dataset = self._dataset(self.features_path)
+            columns = [name for name in dataset.schema.names if name != 'bucket'] if dataset else []
+        table = self._read(self.features_path, columns, filters)
+        if table is None:
+            return pd.DataFrame(columns=self.feature_schema.names)
+        return table.to_pandas()
+
+    def load_matrix(self, filters: Filters = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load features straight into the model's input matrix
+
+        Each float32 Arrow column is viewed without conversion and written
+        once into a preallocated C-ordered matrix in model column order; no
+        intermediate DataFrame is built.
+
+        Args:
+            filters: Predicate pushed down to partitions and row groups
+
+        Returns:
+            Tuple of (patient_ids, float32 matrix of shape (n_patients, n_features))
+        """
+        table = self._read(self.features_path, ['patient_id'] + self.feature_names, filters)
+        if table is None:
+            return np.array([], dtype=object), np.empty((0, len(self.feature_names)), dtype=np.float32)
+
+        X = np.empty((table.num_rows, len(self.feature_names)), dtype=np.float32)
+        offset = 0
+        for batch in table.to_batches():
+            end = offset + batch.num_rows
+            for j, name in enumerate(self.feature_names):
+                X[offset:end, j] = batch.column(name).to_numpy(zero_copy_only=False)
+            offset = end
+        patient_ids = table.column('patient_id').to_numpy(zero_copy_only=False)
+        return patient_ids, X
+
+    def load_scores(self, filters: Filters = None, latest_only: bool = False) -> pd.DataFrame:
+        """
+        Load appended scoring runs
+
+        Args:
+            filters: Predicate pushed down to partitions and row groups
+            latest_only: Keep only each patient's most recent score
+        """
+        table = self._read(self.scores_path, SCORE_SCHEMA.names, filters)
+        if table is None:
+            return pd.DataFrame(columns=SCORE_SCHEMA.names)
+        if latest_only and table.num_rows:
+            order = pc.sort_indices(table, sort_keys=[('patient_id', 'ascending'), ('scored_at', 'descending')])
+            table = table.take(order)
+            ids = table.column('patient_id').to_numpy(zero_copy_only=False)
+            first = np.ones(len(ids), dtype=bool)
+            first[1:] = ids[1:] != ids[:-1]
+            table = table.filter(pa.array(first))
+        return table.to_pandas()
+
+    def stats(self) -> Dict:
+        """Row and file counts for each section of the store"""
+        result = {'root': self.root, 'num_buckets': self.num_buckets, 'features_count': len(self.feature_names)}
+        for section, base_dir in ((FEATURES_DIR, self.features_path), (SCORES_DIR, self.scores_path)):
+            dataset = self._dataset(base_dir)
+            result[section] = {
+                'rows': dataset.count_rows() if dataset else 0,
+                'files': len(dataset.files) if dataset else 0,
+            }
+        return result
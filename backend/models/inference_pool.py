@@ -0,0 +1,173 @@
+"""
+Inference Worker Pool
+Runs RiskPredictor calls off the asyncio event loop with bounded queueing
+"""
+
+import asyncio
+import os
+import time
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from .model_registry import get_model_registry
+from .metrics import REGISTRY, LATENCY_BUCKETS, Histogram, collect_stages, observe_stages
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "welldoc_inference_queue_wait_seconds", LATENCY_BUCKETS, "Time calls waited for an inference worker"
+))
+COMPUTE_TIME = REGISTRY.register(Histogram(
+    "welldoc_inference_compute_seconds", LATENCY_BUCKETS, "Time calls spent running in an inference worker"
+))
+
+class QueueFullError(RuntimeError):
+    """Raised when the inference queue is at capacity and a call is rejected"""
+
+def _init_worker_process():
+    """Load the predictor once per worker process instead of per call"""
+    get_model_registry().active()
+
+def _run_predictor_method(method_name: str, payload: Any, options: Dict[str, Any], model_version: Optional[str],
+                          follow_active: bool, submitted_at: float) -> Tuple[Any, str, float, float, Dict[str, float]]:
+    """
+    Execute a RiskPredictor method inside a pool worker
+
+    Module-level so it can be pickled for process workers. ``time.monotonic``
+    is system-wide, so the queue wait is meaningful across processes too.
+    The model version is held for the whole call, so a concurrent swap never
+    unloads it mid-request. With ``follow_active``, ``model_version`` is the
+    API process's active version and this worker switches to it as well.
+
+    Returns:
+        Tuple of (result, model version, queue wait seconds, compute seconds, stage seconds)
+    """
+    started_at = time.monotonic()
+    registry = get_model_registry()
+    if follow_active and registry.active_version != model_version:
+        registry.activate(model_version, warm_up=False)
+    with registry.use(model_version) as predictor, collect_stages() as stages:
+        result = getattr(predictor, method_name)(payload, **options)
+    finished_at = time.monotonic()
+    return (result, model_version or registry.active_version, started_at - submitted_at,
+            finished_at - started_at, dict(stages))
+
+class InferencePool:
+    """
+    Bounded worker pool for model inference
+
+    At most ``max_workers`` calls run at once and at most ``max_queue_depth``
+    more wait for a worker; anything beyond that is rejected immediately with
+    QueueFullError so the API can shed load instead of piling up latency.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None, max_queue_depth: int = 64):
+        """
+        Create the worker pool
+
+        Args:
+            mode: "thread" or "process"
+            max_workers: Number of workers (defaults to the CPU count)
+            max_queue_depth: Calls allowed to wait for a free worker
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference pool mode: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_depth = max_queue_depth
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = self._create_executor()
+
+        logger.info(f"✅ Inference pool ready: {self.max_workers} {mode} workers, queue depth {max_queue_depth}")
+
+    @classmethod
+    def from_env(cls) -> "InferencePool":
+        """Create a pool from INFERENCE_POOL_MODE, INFERENCE_WORKERS and INFERENCE_MAX_QUEUE"""
+        workers = os.getenv("INFERENCE_WORKERS")
+        return cls(
+            mode=os.getenv("INFERENCE_POOL_MODE", "thread").lower(),
+            max_workers=int(workers) if workers else None,
+            max_queue_depth=int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+        )
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker_process)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls currently waiting for a worker"""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, method_name: str, payload: Any, model_version: Optional[str] = None,
+                  **options) -> Tuple[Any, Dict[str, float]]:
+        """
+        Run a RiskPredictor method in the pool
+
+        Must be called from the event loop thread; the in-flight counter is
+        only touched there, so it needs no lock.
+
+        Args:
+            method_name: RiskPredictor method to call, e.g. "predict_risk"
+            payload: Single positional argument for the method
+            model_version: Registry version to run on (None for the active one)
+            **options: Keyword arguments for the method, e.g. explain=True
+
+        Returns:
+            Tuple of (method result, timing dict with queue_wait_ms, compute_ms,
+            per-stage stages_ms and the model_version that served the call)
+
+        Raises:
+            QueueFullError: If the pool is saturated and the queue is full
+        """
+        if self.in_flight >= self.max_workers + self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(f"Inference queue full ({self.max_queue_depth} waiting)")
+
+        # Process workers have their own registries; name the version so they follow this one's swaps
+        follow_active = model_version is None and self.mode == "process"
+        if follow_active:
+            model_version = get_model_registry().active_version
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, served_by, queue_wait, compute, stages = await loop.run_in_executor(
+                self._executor, _run_predictor_method, method_name, payload, options, model_version,
+                follow_active, time.monotonic()
+            )
+        finally:
+            self.in_flight -= 1
+
+        # Observed here rather than in the worker so process workers are counted too
+        QUEUE_WAIT.observe(queue_wait)
+        COMPUTE_TIME.observe(compute)
+        observe_stages(stages)
+
+        return result, {
+            'queue_wait_ms': queue_wait * 1000,
+            'compute_ms': compute * 1000,
+            'stages_ms': {stage: elapsed * 1000 for stage, elapsed in stages.items()},
+            'model_version': served_by
+        }
+
+    def stats(self) -> Dict:
+        """Current pool configuration and load"""
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running calls to finish"""
+        self._executor.shutdown(wait=True)
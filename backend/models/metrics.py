@@ -0,0 +1,260 @@
+"""
+Lightweight Metrics
+In-process counters, gauges and histograms with Prometheus text exposition
+"""
+
+import bisect
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds, from sub-millisecond model calls to slow batches
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Shared name/description/label handling"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, description: str = "", labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count, optionally split by labels
+
+    With a ``callback`` the unlabelled total is read from it at scrape time
+    instead, for counts another component already keeps.
+    """
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str = "", labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        if self._callback is not None:
+            return self._callback()
+        with self._lock:
+            return self._values.get(self._label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        if self._callback is not None:
+            return lines + [f"{self.name} {_format_value(self._callback())}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or read from a callback at scrape time"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, description: str = "", callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, description)
+        self._value = 0.0
+        self._callback = callback
+
+    def set(self, value: float):
+        self._value = value
+
+    def value(self) -> float:
+        return self._callback() if self._callback is not None else self._value
+
+    def render(self) -> List[str]:
+        return super().render() + [f"{self.name} {_format_value(self.value())}"]
+
+class Histogram(_Metric):
+    """
+    Cumulative bucket histogram, safe to observe from any thread
+
+    Buckets are upper bounds (Prometheus-style "le"); an implicit +Inf bucket
+    catches everything above the last bound.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, buckets: Sequence[float], description: str = "", labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self.buckets: List[float] = sorted(buckets)
+        # label key -> [bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _cumulative(self, counts: List[int]) -> Dict[str, int]:
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative['+Inf'] = running + counts[-1]
+        return cumulative
+
+    def snapshot(self, **labels) -> Dict:
+        """Cumulative bucket counts, total count and sum for one label set"""
+        with self._lock:
+            series = self._series.get(self._label_key(labels))
+            counts, total_sum, total_count = (
+                (list(series[0]), series[1], series[2]) if series else ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+
+        return {
+            'buckets': self._cumulative(counts),
+            'count': total_count,
+            'sum': total_sum,
+            'mean': total_sum / total_count if total_count else 0.0
+        }
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        for key, counts, total_sum, total_count in items:
+            for bound, count in self._cumulative(counts).items():
+                le = 'le="+Inf"' if bound == '+Inf' else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {total_count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric, replacing any previous one with the same name"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, metric: _Metric):
+        """Remove a metric so /metrics stops exporting it"""
+        with self._lock:
+            if self._metrics.get(metric.name) is metric:
+                del self._metrics[metric.name]
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry served by /metrics
+REGISTRY = MetricsRegistry()
+
+def _resident_memory_bytes() -> float:
+    """Current RSS from /proc on Linux, falling back to peak RSS elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+PROCESS_START_TIME = time.time()
+
+REGISTRY.register(Gauge(
+    "process_resident_memory_bytes", "Resident memory size in bytes", callback=_resident_memory_bytes
+))
+REGISTRY.register(Counter(
+    "process_cpu_seconds_total", "Total user and system CPU time in seconds", callback=time.process_time
+))
+REGISTRY.register(Gauge(
+    "process_start_time_seconds", "Start time of the process since unix epoch", callback=lambda: PROCESS_START_TIME
+))
+
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "welldoc_model_load_seconds", "Time taken to load the model artifacts"
+))
+
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "welldoc_predictor_stage_duration_seconds", LATENCY_BUCKETS,
+    "RiskPredictor time per internal stage", labelnames=("stage",)
+))
+
+# Per-thread collector so one request's stage timings can be reported together
+_stage_collector = threading.local()
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    Time one predictor stage
+
+    Inside ``collect_stages`` the duration is added to that request's
+    collection (and observed by whoever owns it); otherwise it is observed
+    straight into STAGE_DURATION.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stages = getattr(_stage_collector, 'stages', None)
+        if stages is None:
+            STAGE_DURATION.observe(elapsed, stage=stage)
+        else:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    """Collect stage durations (seconds) recorded on this thread"""
+    _stage_collector.stages = {}
+    try:
+        yield _stage_collector.stages
+    finally:
+        _stage_collector.stages = None
+
+def observe_stages(stages: Dict[str, float]):
+    """Record collected stage durations into STAGE_DURATION"""
+    for stage, elapsed in stages.items():
+        STAGE_DURATION.observe(elapsed, stage=stage)
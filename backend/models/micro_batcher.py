@@ -0,0 +1,186 @@
+"""
+Dynamic Micro-Batching
+Coalesces concurrent single-patient predictions into one model call
+"""
+
+import asyncio
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .inference_pool import InferencePool, QueueFullError
+from .metrics import Histogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_TIME_MS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+class MicroBatcher:
+    """
+    Server-side micro-batcher in front of the inference pool
+
+    Single requests are queued; a collector task takes the first waiting
+    request and keeps gathering more until either ``max_batch_size`` is
+    reached or ``max_wait_ms`` has passed since that first request arrived.
+    The batch is scored with one ``predict_risk_batch`` call and each result
+    is handed back to the request that submitted it.
+    """
+
+    def __init__(self, pool: InferencePool, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 max_pending: Optional[int] = None):
+        """
+        Create the batcher
+
+        Args:
+            pool: Inference pool that runs the batched model calls
+            max_batch_size: Largest batch sent to the model
+            max_wait_ms: Longest time the first request in a batch waits for company
+            max_pending: Requests allowed to queue before rejecting
+                (defaults to enough to fill every pool slot with a full batch)
+        """
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_pending = max_pending or max_batch_size * (pool.max_workers + pool.max_queue_depth)
+
+        self.batch_size_histogram = Histogram(
+            "welldoc_microbatch_size", BATCH_SIZE_BUCKETS, "Requests per model call"
+        )
+        self.wait_time_histogram = Histogram(
+            "welldoc_microbatch_wait_milliseconds", WAIT_TIME_MS_BUCKETS, "Time a request waited for its batch to close"
+        )
+        self.batches_dispatched = 0
+        self.requests_rejected = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatches = set()
+
+    @classmethod
+    def from_env(cls, pool: InferencePool) -> "MicroBatcher":
+        """Create a batcher from MICROBATCH_MAX_SIZE and MICROBATCH_MAX_WAIT_MS"""
+        return cls(
+            pool,
+            max_batch_size=int(os.getenv("MICROBATCH_MAX_SIZE", "32")),
+            max_wait_ms=float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2.0"))
+        )
+
+    @staticmethod
+    def enabled_from_env() -> bool:
+        """Whether MICROBATCH_ENABLED turns batching on for /predict"""
+        return os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+
+    def start(self):
+        """Start the collector task on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._collector = asyncio.create_task(self._collect())
+        logger.info(f"✅ Micro-batching enabled: max batch {self.max_batch_size}, max wait {self.max_wait_ms} ms")
+
+    async def stop(self):
+        """Stop collecting and wait for in-flight batches"""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    async def submit(self, patient_data: Dict) -> Tuple[Dict, Dict[str, float]]:
+        """
+        Queue one patient and wait for its prediction
+
+        Args:
+            patient_data: Dictionary with patient features
+
+        Returns:
+            Tuple of (prediction dict, timing dict). ``queue_wait_ms`` includes
+            both the batching wait and the wait for a pool worker.
+
+        Raises:
+            QueueFullError: If too many requests are already waiting
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((patient_data, future, time.monotonic()))
+        except asyncio.QueueFull:
+            self.requests_rejected += 1
+            raise QueueFullError(f"Micro-batch queue full ({self.max_pending} waiting)")
+        return await future
+
+    async def _collect(self):
+        """Form batches from the queue and hand them off for scoring"""
+        wait_seconds = self.max_wait_ms / 1000
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0][2] + wait_seconds
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # asyncio.timeout rather than wait_for: wait_for can swallow the
+                # cancel from stop() when a request arrives at the same moment
+                try:
+                    async with asyncio.timeout(remaining):
+                        batch.append(await self._queue.get())
+                except TimeoutError:
+                    break
+
+            # Drain anything that is already waiting without blocking further
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Score in the background so the next batch can start forming
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Dict, asyncio.Future, float]]):
+        """Score one batch and resolve each request's future"""
+        closed_at = time.monotonic()
+        self.batches_dispatched += 1
+        self.batch_size_histogram.observe(len(batch))
+
+        batch_waits_ms = []
+        for _, _, enqueued_at in batch:
+            wait_ms = (closed_at - enqueued_at) * 1000
+            batch_waits_ms.append(wait_ms)
+            self.wait_time_histogram.observe(wait_ms)
+
+        try:
+            predictions, timing = await self.pool.run(
+                "predict_risk_batch", [patient_data for patient_data, _, _ in batch]
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), prediction, wait_ms in zip(batch, predictions, batch_waits_ms):
+            if not future.done():
+                future.set_result((prediction, {
+                    'queue_wait_ms': wait_ms + timing['queue_wait_ms'],
+                    'compute_ms': timing['compute_ms'],
+                    'stages_ms': timing['stages_ms'],
+                    'model_version': timing['model_version'],
+                    'batch_size': len(batch)
+                }))
+
+    def stats(self) -> Dict:
+        """Batch-size and wait-time histograms plus counters"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches_dispatched': self.batches_dispatched,
+            'requests_rejected': self.requests_rejected,
+            'pending': self._queue.qsize() if self._queue is not None else 0,
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'wait_time_ms': self.wait_time_histogram.snapshot()
+        }
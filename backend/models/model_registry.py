@@ -0,0 +1,368 @@
+"""
+Model Registry
+Versioned model artifact directories with background loading and atomic swaps
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .risk_predictor import RiskPredictor, DEFAULT_MODEL_PATH
+from .prediction_cache import PredictionCache
+from .warmup import DEFAULT_BATCH_SIZES, batch_sizes_from_env, warm_up_predictor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A version directory is any subdirectory holding the model metadata
+VERSION_MARKER = "model_metadata.json"
+
+# Optional file in the registry root naming the version every process should serve
+ACTIVE_FILE = "ACTIVE"
+
+# Synthetic patient used to warm up a freshly loaded model before it serves traffic
+WARMUP_PATIENT = {
+    "patient_id": "warmup",
+    "age": 65,
+    "bmi": 28.0,
+    "systolic_bp": 130.0,
+    "diastolic_bp": 80.0
+}
+
+class LoadedModel:
+    """A loaded version, with the requests currently running on it"""
+
+    def __init__(self, name: str, path: str, predictor: RiskPredictor, load_seconds: float):
+        self.name = name
+        self.path = path
+        self.predictor = predictor
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now().isoformat()
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+        self.requests = 0
+        self.retired = False
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'model_version': self.predictor.model_version,
+            'loaded_at': self.loaded_at,
+            'load_seconds': round(self.load_seconds, 3),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'retired': self.retired,
+        }
+
+class ModelRegistry:
+    """
+    Tracks model versions on disk and the ones loaded in this process
+
+    Each subdirectory of ``root`` holding model artifacts is a version, named
+    after the directory; an ``ACTIVE`` file in the root can name the version
+    to serve. Without a root, the single ``MODEL_PATH`` directory is the only
+    version. New versions are loaded and warmed up off the
+    request path, then made active with a single reference swap; requests
+    already running keep the predictor they started with. Replaced versions
+    are retired and released as soon as their last request finishes.
+    """
+
+    def __init__(self, root: Optional[str] = None, model_path: str = DEFAULT_MODEL_PATH,
+                 inference_backend: str = "xgboost", shap_approximate: bool = False,
+                 initial_version: Optional[str] = None, keep_previous: int = 0, max_loaded: int = 3,
+                 warmup_batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, num_threads: Optional[int] = None):
+        """
+        Create the registry; nothing is loaded until first use
+
+        Args:
+            root: Directory of version subdirectories (None to serve ``model_path`` only)
+            model_path: Single model directory used when there is no root
+            inference_backend: Backend every version is loaded with
+            shap_approximate: Explain with Saabas approximation instead of exact TreeSHAP
+            initial_version: Version to activate first when there is no ACTIVE file
+                (defaults to the latest by name)
+            keep_previous: Replaced versions kept loaded for per-request selection or rollback
+            max_loaded: Upper bound on loaded versions; least recently used idle ones are unloaded
+            warmup_batch_sizes: Synthetic batch sizes a new version is warmed up with
+            num_threads: XGBoost threads for every version loaded (None for XGBoost's default)
+        """
+        self.root = root
+        self.model_path = model_path
+        self.inference_backend = inference_backend
+        self.shap_approximate = shap_approximate
+        self.initial_version = initial_version
+        self.keep_previous = keep_previous
+        self.max_loaded = max(max_loaded, keep_previous + 1)
+        self.warmup_batch_sizes = list(warmup_batch_sizes)
+        self.num_threads = num_threads
+
+        self._loaded: Dict[str, LoadedModel] = {}
+        self._active: Optional[LoadedModel] = None
+        self._previous: List[str] = []
+        self._lock = threading.RLock()
+        self._init_lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.swaps = 0
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        """Create a registry from MODEL_REGISTRY_PATH, MODEL_PATH, MODEL_VERSION, XGBOOST_NTHREAD and related settings"""
+        return cls(
+            root=os.getenv("MODEL_REGISTRY_PATH") or None,
+            model_path=os.getenv("MODEL_PATH", DEFAULT_MODEL_PATH),
+            inference_backend=os.getenv("INFERENCE_BACKEND", "xgboost"),
+            shap_approximate=os.getenv("SHAP_MODE", "exact").lower() == "approx",
+            initial_version=os.getenv("MODEL_VERSION") or None,
+            keep_previous=int(os.getenv("MODEL_REGISTRY_KEEP_PREVIOUS", "0")),
+            max_loaded=int(os.getenv("MODEL_REGISTRY_MAX_LOADED", "3")),
+            warmup_batch_sizes=batch_sizes_from_env(),
+            num_threads=int(os.getenv("XGBOOST_NTHREAD")) if os.getenv("XGBOOST_NTHREAD") else None
+        )
+
+    def available_versions(self) -> Dict[str, str]:
+        """Version name -> artifact directory, for every version on disk"""
+        if self.root is None:
+            path = os.path.normpath(self.model_path)
+            return {os.path.basename(path): path}
+        versions = {}
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if os.path.isfile(os.path.join(path, VERSION_MARKER)):
+                versions[name] = path
+        return versions
+
+    def latest_version(self) -> str:
+        """Newest version on disk, by directory name"""
+        versions = self.available_versions()
+        if not versions:
+            raise FileNotFoundError(f"No model versions found in {self.root or self.model_path}")
+        return sorted(versions)[-1]
+
+    def desired_version(self) -> str:
+        """Version named by the ACTIVE file, else the initial version, else the latest"""
+        if self.root is not None:
+            active_file = os.path.join(self.root, ACTIVE_FILE)
+            if os.path.isfile(active_file):
+                with open(active_file, 'r') as f:
+                    name = f.read().strip()
+                if name in self.available_versions():
+                    return name
+                logger.warning(f"⚠️ {active_file} names unknown version {name!r}; ignoring it")
+        return self.initial_version or self.latest_version()
+
+    @property
+    def active_version(self) -> str:
+        """Name of the version serving requests that don't ask for one"""
+        return self._ensure_active().name
+
+    def _ensure_active(self) -> LoadedModel:
+        if self._active is None:
+            with self._init_lock:
+                if self._active is None:
+                    self.activate(self.desired_version(), warm_up=False)
+        return self._active
+
+    def active(self) -> RiskPredictor:
+        """The active predictor, loading the initial version on first call"""
+        return self._ensure_active().predictor
+
+    def loaded_versions(self) -> List[str]:
+        with self._lock:
+            return [name for name, model in self._loaded.items() if not model.retired]
+
+    def get(self, name: str) -> RiskPredictor:
+        """A loaded version's predictor; KeyError if it is not loaded"""
+        with self._lock:
+            model = self._loaded.get(name)
+            if model is None or model.retired:
+                raise KeyError(name)
+            return model.predictor
+
+    def load(self, name: str, warm_up: bool = True) -> RiskPredictor:
+        """
+        Load a version (if not already loaded) without activating it
+
+        Safe to call from several threads; each version is loaded once.
+
+        Args:
+            name: Version directory name
+            warm_up: Run warm-up predictions before returning
+
+        Returns:
+            The version's predictor
+        """
+        with self._lock:
+            model = self._loaded.get(name)
+            if model is not None and not model.retired:
+                return model.predictor
+            path = self.available_versions().get(name)
+            if path is None:
+                raise KeyError(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                model = self._loaded.get(name)
+                if model is not None and not model.retired:
+                    return model.predictor
+
+            logger.info(f"🔄 Loading model version {name} from {path}")
+            start = time.perf_counter()
+            # Each version gets its own cache, so versions never share entries
+            predictor = RiskPredictor(path, inference_backend=self.inference_backend,
+                                      shap_approximate=self.shap_approximate,
+                                      prediction_cache=PredictionCache.from_env())
+            if self.num_threads is not None:
+                predictor.set_num_threads(self.num_threads)
+            if warm_up:
+                self.warm_up(predictor)
+            model = LoadedModel(name, path, predictor, time.perf_counter() - start)
+
+            with self._lock:
+                self._loaded[name] = model
+                self._evict_idle()
+            logger.info(f"✅ Model version {name} loaded in {model.load_seconds:.2f}s")
+            return predictor
+
+    def warm_up(self, predictor: RiskPredictor):
+        """Run one synthetic call per warm-up batch size so lazy initialization happens now"""
+        warm_up_predictor(predictor, self.warmup_batch_sizes)
+
+    def activate(self, name: str, warm_up: bool = True) -> RiskPredictor:
+        """
+        Load (if needed), warm up and atomically make a version active
+
+        Args:
+            name: Version directory name
+            warm_up: Warm the version up before it takes traffic
+
+        Returns:
+            The newly active predictor
+        """
+        predictor = self.load(name, warm_up=warm_up)
+        with self._lock:
+            model = self._loaded[name]
+            previous = self._active
+            if previous is model:
+                return predictor
+            self._active = model
+            self.swaps += 1
+
+            if previous is not None:
+                logger.info(f"🔄 Active model version {previous.name} -> {name}")
+                self._previous = [v for v in self._previous if v != previous.name and v != name]
+                self._previous.insert(0, previous.name)
+                for old_name in self._previous[self.keep_previous:]:
+                    self._retire(old_name)
+                self._previous = self._previous[:self.keep_previous]
+        return predictor
+
+    async def activate_async(self, name: str) -> RiskPredictor:
+        """activate() on a worker thread, so loading never blocks the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.activate, name)
+
+    async def load_async(self, name: str) -> RiskPredictor:
+        """load() on a worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.load, name)
+
+    def unload(self, name: str):
+        """Retire a loaded version; its memory is released once in-flight requests finish"""
+        with self._lock:
+            if self._active is not None and self._active.name == name:
+                raise ValueError(f"Version {name} is active; activate another version first")
+            if name not in self._loaded:
+                raise KeyError(name)
+            self._previous = [v for v in self._previous if v != name]
+            self._retire(name)
+
+    def _retire(self, name: str):
+        model = self._loaded.get(name)
+        if model is None or model is self._active:
+            return
+        model.retired = True
+        if model.in_flight == 0:
+            self._release(model)
+
+    def _release(self, model: LoadedModel):
+        if self._loaded.get(model.name) is model:
+            del self._loaded[model.name]
+        # Dropping the last reference frees the model; a full gc.collect() here
+        # would stall the request releasing it and everyone waiting on the lock
+        model.predictor = None
+        logger.info(f"🗑️ Model version {model.name} unloaded")
+
+    def _evict_idle(self):
+        """Keep at most max_loaded versions, dropping the least recently used idle ones"""
+        candidates = sorted(
+            (m for m in self._loaded.values() if m is not self._active and not m.retired and m.in_flight == 0),
+            key=lambda m: m.last_used
+        )
+        excess = sum(1 for m in self._loaded.values() if not m.retired) - self.max_loaded
+        for model in candidates[:max(excess, 0)]:
+            self._previous = [v for v in self._previous if v != model.name]
+            self._retire(model.name)
+
+    @contextmanager
+    def use(self, name: Optional[str] = None) -> Iterator[RiskPredictor]:
+        """
+        Hold a version for the duration of one request
+
+        Args:
+            name: Version to use (None for the active one). A version that is
+                not loaded in this process is loaded on demand, which is how
+                process-pool workers follow the API process's active version.
+
+        Yields:
+            The version's predictor, which stays valid until the block exits
+        """
+        if name is None:
+            self._ensure_active()
+        while True:
+            with self._lock:
+                model = self._active if name is None else self._loaded.get(name)
+                if model is not None and not model.retired:
+                    model.in_flight += 1
+                    model.requests += 1
+                    model.last_used = time.monotonic()
+                    predictor = model.predictor
+                    break
+            self.load(name, warm_up=False)
+        try:
+            yield predictor
+        finally:
+            with self._lock:
+                model.in_flight -= 1
+                if model.retired and model.in_flight == 0:
+                    self._release(model)
+
+    def stats(self) -> Dict:
+        """Versions on disk, loaded versions and the active one"""
+        with self._lock:
+            return {
+                'root': self.root or self.model_path,
+                'active_version': self._active.name if self._active is not None else None,
+                'available_versions': list(self.available_versions()),
+                'loaded': {name: model.stats() for name, model in self._loaded.items()},
+                'swaps': self.swaps,
+                'keep_previous': self.keep_previous,
+                'max_loaded': self.max_loaded,
+            }
+
+# Process-wide registry
+model_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the process-wide model registry"""
+    global model_registry
+    if model_registry is None:
+        with _registry_lock:
+            if model_registry is None:
+                model_registry = ModelRegistry.from_env()
+    return model_registry
@@ -0,0 +1,215 @@
+"""
+Native Tree Evaluator
+Flat-array export of the XGBoost booster for low-latency NumPy inference
+"""
+
+import json
+import os
+import numpy as np
+from typing import Dict, Optional
+
+class CompiledTreeEnsemble:
+    """
+    XGBoost multi:softprob model compiled to padded node arrays
+
+    Every tree is stored as one row of fixed-width arrays (split feature,
+    threshold, left/right child, default direction, leaf value). Leaves point
+    to themselves, so a batch of rows can be pushed through all trees at once
+    with ``max_depth`` rounds of vectorised gathers and no per-tree Python
+    loop. The split rule matches XGBoost: go left when ``x < threshold``,
+    follow the default direction when ``x`` is NaN.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, tree_class: np.ndarray,
+                 base_score: float, num_class: int, max_depth: int, training_date: Optional[str] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.tree_class = tree_class
+        self.base_score = base_score
+        self.num_class = num_class
+        self.max_depth = max_depth
+        # Model version the arrays were exported from (set by export_artifacts.py)
+        self.training_date = training_date
+        self.num_trees, self.max_nodes = feature.shape
+
+        # Flattened views indexed by global node id (tree * max_nodes + node);
+        # children are interleaved so the next node is children[2 * id + go_right]
+        self._feature_flat = feature.ravel()
+        self._threshold_flat = threshold.ravel()
+        self._default_left_flat = default_left.ravel()
+        self._value_flat = value.ravel()
+        offsets = (np.arange(self.num_trees, dtype=np.int32) * self.max_nodes)[:, np.newaxis]
+        self._children_flat = np.stack([left + offsets, right + offsets], axis=-1).ravel()
+        self._roots = offsets.ravel()
+        self._class_onehot = (tree_class[:, np.newaxis] == np.arange(num_class)).astype(np.float64)
+
+    @classmethod
+    def from_booster(cls, booster, num_iterations: Optional[int] = None) -> "CompiledTreeEnsemble":
+        """
+        Export an xgboost.Booster into flat arrays
+
+        Args:
+            booster: Trained booster with a multi:softprob objective
+            num_iterations: Only use the first N boosting rounds (e.g. best_iteration + 1)
+
+        Raises:
+            NotImplementedError: For objectives or split types this evaluator does not handle
+        """
+        return cls.from_json(json.loads(booster.save_raw(raw_format="json")), num_iterations)
+
+    @classmethod
+    def from_json(cls, model_json: Dict, num_iterations: Optional[int] = None) -> "CompiledTreeEnsemble":
+        """Export from the parsed JSON form of a saved booster"""
+        learner = model_json['learner']
+        objective = learner['objective']['name']
+        if objective != 'multi:softprob':
+            raise NotImplementedError(f"Native evaluator does not support objective {objective}")
+
+        model = learner['gradient_booster']['model']
+        trees = model['trees']
+        tree_info = model['tree_info']
+        if num_iterations is not None:
+            end = model['iteration_indptr'][num_iterations]
+            trees, tree_info = trees[:end], tree_info[:end]
+
+        num_trees = len(trees)
+        max_nodes = max(int(tree['tree_param']['num_nodes']) for tree in trees)
+
+        # Padding nodes are self-referencing leaves with value 0; they are never reached
+        feature = np.zeros((num_trees, max_nodes), dtype=np.int32)
+        threshold = np.zeros((num_trees, max_nodes), dtype=np.float32)
+        left = np.tile(np.arange(max_nodes, dtype=np.int32), (num_trees, 1))
+        right = left.copy()
+        default_left = np.zeros((num_trees, max_nodes), dtype=bool)
+        value = np.zeros((num_trees, max_nodes), dtype=np.float32)
+        max_depth = 0
+
+        for t, tree in enumerate(trees):
+            if any(split_type != 0 for split_type in tree['split_type']):
+                raise NotImplementedError("Native evaluator does not support categorical splits")
+
+            tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+            tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            n = len(tree_left)
+            is_leaf = tree_left == -1
+            node_ids = np.arange(n, dtype=np.int32)
+
+            feature[t, :n] = np.where(is_leaf, 0, tree['split_indices'])
+            threshold[t, :n] = conditions
+            left[t, :n] = np.where(is_leaf, node_ids, tree_left)
+            right[t, :n] = np.where(is_leaf, node_ids, tree_right)
+            default_left[t, :n] = np.asarray(tree['default_left'], dtype=bool)
+            # XGBoost stores the leaf weight in split_conditions for leaf nodes
+            value[t, :n] = np.where(is_leaf, conditions, 0.0)
+
+            max_depth = max(max_depth, cls._tree_depth(tree_left, tree_right))
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=right,
+            default_left=default_left,
+            value=value,
+            tree_class=np.asarray(tree_info, dtype=np.int32),
+            base_score=float(learner['learner_model_param']['base_score']),
+            num_class=int(learner['learner_model_param']['num_class']),
+            max_depth=max_depth
+        )
+
+    _ARRAY_FIELDS = ("feature", "threshold", "left", "right", "default_left", "value", "tree_class")
+
+    def save(self, directory: str):
+        """
+        Write the compiled arrays as .npy files plus a small JSON header
+
+        The .npy files can be memory-mapped by ``load``, so every worker
+        process on a host shares one copy of the trees in the page cache.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for field in self._ARRAY_FIELDS:
+            np.save(os.path.join(directory, f"{field}.npy"), getattr(self, field))
+        with open(os.path.join(directory, "ensemble.json"), "w") as f:
+            json.dump({
+                'base_score': self.base_score,
+                'num_class': self.num_class,
+                'max_depth': self.max_depth,
+                'training_date': self.training_date
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "CompiledTreeEnsemble":
+        """
+        Load arrays written by ``save``
+
+        Args:
+            directory: Directory containing the .npy files and ensemble.json
+            mmap: Memory-map the arrays read-only instead of reading them into private memory
+        """
+        with open(os.path.join(directory, "ensemble.json")) as f:
+            header = json.load(f)
+        arrays = {
+            field: np.load(os.path.join(directory, f"{field}.npy"), mmap_mode="r" if mmap else None)
+            for field in cls._ARRAY_FIELDS
+        }
+        return cls(**arrays, **header)
+
+    @staticmethod
+    def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+        """Depth of the deepest leaf, counted in edges from the root"""
+        depth = 0
+        frontier = [0]
+        while True:
+            children = [c for node in frontier for c in (left[node], right[node]) if c != -1]
+            if not children:
+                return depth
+            frontier = children
+            depth += 1
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        """
+        Raw per-class scores before softmax
+
+        Args:
+            X: Feature matrix of shape (n_rows, n_features), float32
+
+        Returns:
+            Array of shape (n_rows, num_class)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        X_flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[:, np.newaxis]
+        node = np.broadcast_to(self._roots, (n_rows, self.num_trees))
+
+        for _ in range(self.max_depth):
+            x = X_flat.take(row_offsets + self._feature_flat.take(node))
+            go_left = x < self._threshold_flat.take(node)
+            missing = np.isnan(x)
+            if missing.any():
+                go_left |= missing & self._default_left_flat.take(node)
+            node = self._children_flat.take(2 * node + ~go_left)
+
+        leaf_values = self._value_flat.take(node).astype(np.float64)
+        return leaf_values @ self._class_onehot + self.base_score
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities, matching XGBClassifier.predict_proba
+
+        Args:
+            X: Feature matrix of shape (n_rows, n_features), float32
+
+        Returns:
+            float32 array of shape (n_rows, num_class)
+        """
+        margin = self.predict_margin(X)
+        margin -= margin.max(axis=1, keepdims=True)
+        exp = np.exp(margin)
+        return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
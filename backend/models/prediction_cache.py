@@ -0,0 +1,129 @@
+"""
+Prediction Cache
+Size-bounded LRU/TTL cache of model outputs keyed by encoded feature vector
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with optional time-to-live
+
+    Keys are a hash of the model version plus the exact float32 feature row
+    the model sees, so two requests share an entry only when the model would
+    produce identical output for them. Binding a different model version
+    drops every entry at once.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 300.0):
+        """
+        Create the cache
+
+        Args:
+            max_size: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Entry lifetime in seconds (None keeps entries until evicted)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model_version = None
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._key_prefix = b""
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["PredictionCache"]:
+        """Create a cache from PREDICTION_CACHE_SIZE / PREDICTION_CACHE_TTL (size 0 disables it)"""
+        max_size = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+        if max_size <= 0:
+            return None
+        ttl = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+        return cls(max_size=max_size, ttl_seconds=ttl if ttl > 0 else None)
+
+    def bind_model_version(self, model_version: str):
+        """Key entries to a model version, clearing the cache if the version changed"""
+        with self._lock:
+            if model_version != self.model_version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.model_version = model_version
+                self._key_prefix = f"{model_version}|".encode()
+
+    def key(self, features: np.ndarray, variant: str = "") -> bytes:
+        """
+        Cache key for one encoded feature row
+
+        Args:
+            features: Encoded float32 feature vector
+            variant: Distinguishes different outputs for the same row (e.g. explained)
+        """
+        return hashlib.blake2b(
+            self._key_prefix + variant.encode() + b"|" + features.tobytes(), digest_size=16
+        ).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: Any):
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'model_version': self.model_version,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
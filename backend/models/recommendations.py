@@ -0,0 +1,154 @@
+"""
+Recommendation Rules
+Declarative clinical recommendation table evaluated over a whole batch at once
+"""
+
+import functools
+import operator
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+# Risk tiers, in the order used by the tier index arrays below
+TIER_IMMEDIATE, TIER_FOLLOW_UP, TIER_ROUTINE = 0, 1, 2
+
+# Below this many patients, building NumPy columns costs more than comparing scalars
+VECTORIZE_MIN_BATCH = 16
+
+# Templated recommendations kept for reuse, across all rules (least recently used are dropped)
+INTERN_CACHE_SIZE = 4096
+
+class FrozenRecommendation(dict):
+    """
+    Read-only recommendation dictionary
+
+    Instances are shared between responses, so every mutating method raises.
+    It is still a plain dict for equality, JSON encoding and ``**`` unpacking.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Recommendations are shared between responses and cannot be modified")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        # Rebuild from a plain dict when sent to/from process pool workers
+        return (FrozenRecommendation, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+def _recommendation(category: str, recommendation: str, priority: str, rationale: str) -> FrozenRecommendation:
+    return FrozenRecommendation(category=category, recommendation=recommendation,
+                                priority=priority, rationale=rationale)
+
+# Base recommendations by risk tier
+TIER_RECOMMENDATIONS = (
+    (
+        _recommendation("IMMEDIATE_ACTION", "Schedule immediate clinical review within 24 hours",
+                        "CRITICAL", "High risk of deterioration detected"),
+        _recommendation("CARE_COORDINATION", "Contact patient to assess current status",
+                        "HIGH", "Proactive monitoring required"),
+        _recommendation("MEDICATION_REVIEW", "Review all medications for optimization",
+                        "HIGH", "Medication adjustment may reduce risk"),
+    ),
+    (
+        _recommendation("FOLLOW_UP", "Schedule follow-up appointment within 2 weeks",
+                        "MEDIUM", "Moderate risk requires monitoring"),
+        _recommendation("CARE_PLAN_REVIEW", "Review care plan and medication adherence",
+                        "MEDIUM", "Optimization may prevent deterioration"),
+    ),
+    (
+        _recommendation("ROUTINE_CARE", "Continue current care plan with routine monitoring",
+                        "LOW", "Low risk allows standard care approach"),
+    ),
+)
+
+class RecommendationRule(NamedTuple):
+    """One feature-specific rule: fires when ``compare(value, threshold)`` holds"""
+    feature: str
+    default: Any
+    compare: Callable
+    threshold: float
+    category: str
+    recommendation: str
+    priority: str
+    rationale: str  # str.format template; {value} is the patient's raw feature value
+
+# Feature-specific recommendations, appended in table order after the tier ones
+FEATURE_RULES = (
+    RecommendationRule('bmi', 25, operator.gt, 30, "LIFESTYLE", "Refer to weight management program",
+                       "MEDIUM", "BMI {value:.1f} indicates obesity risk"),
+    RecommendationRule('systolic_bp', 120, operator.gt, 140, "BLOOD_PRESSURE", "Optimize blood pressure management",
+                       "HIGH", "Systolic BP {value:.0f} above target"),
+    RecommendationRule('hba1c', 6.0, operator.gt, 8.0, "DIABETES_MANAGEMENT", "Intensify diabetes management",
+                       "HIGH", "HbA1c {value:.1f}% indicates poor glucose control"),
+    RecommendationRule('has_diabetes', 0, operator.eq, 1, "DIABETES_MONITORING", "Monitor glucose levels closely",
+                       "MEDIUM", "Diabetes requires ongoing management"),
+    RecommendationRule('comorbidity_count', 0, operator.ge, 3, "CARE_COORDINATION", "Coordinate multi-specialty care",
+                       "HIGH", "{value} comorbidities require coordination"),
+)
+
+class RecommendationEngine:
+    """
+    Evaluates TIER_RECOMMENDATIONS and FEATURE_RULES for a batch of patients
+
+    Each rule is one vectorized comparison over the batch's feature column.
+    Recommendation objects are immutable and shared: static ones are built
+    once, and templated ones are interned by their formatted rationale in an
+    LRU cache of ``intern_cache_size`` entries, so memory stays bounded
+    however many distinct values a long-running server sees.
+    """
+
+    def __init__(self, rules: Sequence[RecommendationRule] = FEATURE_RULES,
+                 tiers: Sequence[Sequence[FrozenRecommendation]] = TIER_RECOMMENDATIONS,
+                 intern_cache_size: int = INTERN_CACHE_SIZE):
+        self.rules = tuple(rules)
+        self.tiers = tuple(tuple(tier) for tier in tiers)
+        self._interned = functools.lru_cache(maxsize=intern_cache_size)(self._build_recommendation)
+
+    def _build_recommendation(self, rule_index: int, rationale: str) -> FrozenRecommendation:
+        rule = self.rules[rule_index]
+        return _recommendation(rule.category, rule.recommendation, rule.priority, rationale)
+
+    def _rule_recommendation(self, rule_index: int, value: Any) -> FrozenRecommendation:
+        return self._interned(rule_index, self.rules[rule_index].rationale.format(value=value))
+
+    def generate(self, patients: Sequence[Dict], tiers: np.ndarray) -> List[List[FrozenRecommendation]]:
+        """
+        Recommendations for every patient in a batch
+
+        Args:
+            patients: Patient feature dictionaries
+            tiers: Risk tier index per patient (TIER_IMMEDIATE, TIER_FOLLOW_UP or TIER_ROUTINE)
+
+        Returns:
+            One recommendation list per patient
+        """
+        recommendations = [list(self.tiers[tier]) for tier in tiers.tolist()]
+
+        if len(patients) < VECTORIZE_MIN_BATCH:
+            for patient, patient_recommendations in zip(patients, recommendations):
+                for rule_index, rule in enumerate(self.rules):
+                    value = patient.get(rule.feature, rule.default)
+                    if value is not None and rule.compare(value, rule.threshold):
+                        patient_recommendations.append(self._rule_recommendation(rule_index, value))
+            return recommendations
+
+        for rule_index, rule in enumerate(self.rules):
+            raw = [patient.get(rule.feature, rule.default) for patient in patients]
+            # Explicit None values become NaN, which never satisfies a rule
+            values = np.array(raw, dtype=np.float64)
+            for i in np.flatnonzero(rule.compare(values, rule.threshold)).tolist():
+                recommendations[i].append(self._rule_recommendation(rule_index, raw[i]))
+
+        return recommendations
+
+def risk_tiers(risk_levels: np.ndarray, deterioration_probability: np.ndarray) -> np.ndarray:
+    """Risk tier index per patient from predicted level and deterioration probability"""
+    immediate = (deterioration_probability >= 0.7) | (risk_levels == 'high')
+    follow_up = ~immediate & ((deterioration_probability >= 0.3) | (risk_levels == 'medium'))
+    return np.where(immediate, TIER_IMMEDIATE, np.where(follow_up, TIER_FOLLOW_UP, TIER_ROUTINE))
@@ -0,0 +1,94 @@
+"""
+Structured Request Logging
+One sampled JSON record per API request, including stage timings
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+class JsonFormatter(logging.Formatter):
+    """Render a log record as a single JSON object"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            payload.update(fields)
+        else:
+            payload['message'] = record.getMessage()
+        return json.dumps(payload, default=str, separators=(',', ':'))
+
+class RequestLogger:
+    """
+    Sampled structured request log
+
+    Requests are written with probability ``sample_rate``; server errors
+    are always written, except 503 load shedding, which is sampled like
+    success so an overload does not also flood the log pipeline. Records
+    go to their own logger with a JSON handler so they can be routed
+    separately from application logs.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, logger_name: str = "welldoc.requests"):
+        """
+        Create the request logger
+
+        Args:
+            sample_rate: Fraction of successful requests to log (0.0 - 1.0)
+            logger_name: Name of the underlying logging.Logger
+        """
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.logger = logging.getLogger(logger_name)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(JsonFormatter())
+            self.logger.addHandler(handler)
+
+    @classmethod
+    def from_env(cls) -> "RequestLogger":
+        """Create a request logger from REQUEST_LOG_SAMPLE_RATE"""
+        return cls(sample_rate=float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0")))
+
+    def log(self, endpoint: str, status: int, latency_ms: float, timing: Optional[Dict] = None, **fields):
+        """
+        Write one record for a finished request, subject to sampling
+
+        Args:
+            endpoint: Route that served the request
+            status: HTTP status code returned
+            latency_ms: Total handler latency
+            timing: Inference timing dict from the pool (queue wait, compute, stages)
+            **fields: Extra request attributes (patient_id, risk_level, ...)
+        """
+        is_error = status >= 500
+        always_log = is_error and status != 503
+        if not always_log and (self.sample_rate <= 0.0 or random.random() >= self.sample_rate):
+            return
+
+        record = {
+            'event': 'request',
+            'endpoint': endpoint,
+            'status': status,
+            'latency_ms': round(latency_ms, 3),
+        }
+        if timing:
+            record.update({
+                key: {stage: round(ms, 3) for stage, ms in value.items()} if isinstance(value, dict)
+                else round(value, 3) if isinstance(value, float) else value
+                for key, value in timing.items()
+            })
+        record.update(fields)
+
+        level = logging.INFO if not is_error else logging.WARNING if status == 503 else logging.ERROR
+        self.logger.log(level, endpoint, extra={'fields': record})
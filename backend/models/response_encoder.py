@@ -0,0 +1,67 @@
+"""
+Response Encoder
+Fast JSON encoding of trusted prediction dictionaries for /predict
+"""
+
+from typing import Dict
+
+import orjson
+
+# RiskPrediction field order; model_info is spliced in between from a pre-encoded copy
+HEAD_FIELDS = ('patient_id', 'risk_assessment', 'class_probabilities', 'recommendations')
+TAIL_FIELDS = ('prediction_timestamp', 'explanation')
+
+class PredictionResponseEncoder:
+    """
+    Encodes RiskPredictor output straight to the RiskPrediction JSON schema
+
+    The predictor's dictionaries are built by our own code with the exact
+    field names and types of the response models, so re-validating them
+    through Pydantic on every request only costs time. This encoder writes
+    the same document with orjson, drops ``None`` fields the way
+    ``response_model_exclude_none=True`` does, and reuses one pre-encoded
+    ``model_info`` block per model version.
+    """
+
+    def __init__(self):
+        self._model_info: Dict[str, bytes] = {}
+
+    def _encoded_model_info(self, model_info: Dict) -> bytes:
+        version = model_info['model_version']
+        encoded = self._model_info.get(version)
+        if encoded is None:
+            encoded = self._model_info.setdefault(version, orjson.dumps(model_info))
+        return encoded
+
+    @staticmethod
+    def _without_none(explanation: Dict) -> Dict:
+        """Explanation with unknown feature values omitted, as exclude_none does"""
+        if all(item['value'] is not None for item in explanation['top_features']):
+            return explanation
+        return {
+            **explanation,
+            'top_features': [
+                {k: v for k, v in item.items() if v is not None} for item in explanation['top_features']
+            ],
+        }
+
+    def encode(self, prediction: Dict) -> bytes:
+        """
+        Encode one prediction dictionary as a RiskPrediction JSON document
+
+        Args:
+            prediction: Output of RiskPredictor.predict_risk
+
+        Returns:
+            UTF-8 JSON bytes
+        """
+        head = orjson.dumps({field: prediction[field] for field in HEAD_FIELDS})
+
+        tail_fields = {'prediction_timestamp': prediction['prediction_timestamp']}
+        explanation = prediction.get('explanation')
+        if explanation is not None:
+            tail_fields['explanation'] = self._without_none(explanation)
+        tail = orjson.dumps(tail_fields)
+
+        return b"".join((head[:-1], b',"model_info":', self._encoded_model_info(prediction['model_info']),
+                         b",", tail[1:]))
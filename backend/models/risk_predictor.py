@@ -3,68 +3,137 @@ Risk Prediction Model Service
 Integrates the trained XGBoost model for 90-day deterioration prediction
 """
 
-import joblib
 import json
-import pandas as pd
 import numpy as np
 import os
+import threading
 import time
 import asyncio
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+from .feature_encoder import FeatureEncoder
+from .native_trees import CompiledTreeEnsemble
+from .booster_model import BoosterClassifier, LabelClasses, NATIVE_MODEL_FILE, LABEL_CLASSES_FILE
+from .prediction_cache import PredictionCache
+from .startup_profile import STARTUP_PROFILE
+from .recommendations import RecommendationEngine, risk_tiers
+from .metrics import MODEL_LOAD_SECONDS, track_stage
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_PATH = "../ml_pipeline/production_models"
+
+# Subdirectory of the model path holding CompiledTreeEnsemble.save() output
+COMPILED_TREES_DIR = "compiled_trees"
+
 class RiskPredictor:
     """
     Production-ready risk prediction service using trained XGBoost model
     """
     
-    def __init__(self, model_path: str = "../ml_pipeline/production_models"):
+    INFERENCE_BACKENDS = ("xgboost", "native")
+    
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, inference_backend: str = "xgboost",
+                 shap_approximate: bool = False, prediction_cache: Optional[PredictionCache] = None):
         """
         Initialize the risk predictor with trained model artifacts
         
         Args:
             model_path: Path to the production model directory
+            inference_backend: "xgboost" to call the XGBoost model, or
+                "native" to evaluate a flat-array export of its trees with NumPy
+                (lower latency for single rows and small batches)
+            shap_approximate: Explain with XGBoost's fast Saabas approximation
+                instead of exact TreeSHAP
+            prediction_cache: Optional cache of model outputs keyed by encoded
+                features; it is re-bound to this model's version on load
         """
+        if inference_backend not in self.INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend: {inference_backend}")
+        
         self.model_path = model_path
-        self.model = None
-        self.scaler = None
+        self.inference_backend = inference_backend
+        self.shap_approximate = shap_approximate
+        self.prediction_cache = prediction_cache
+        self.compiled_model = None
         self.label_encoder = None
         self.feature_metadata = None
         self.model_metadata = None
         self.clinical_mapping = None
+        self.feature_encoder = None
+        self.recommendation_engine = RecommendationEngine()
+        
+        # XGBoost model, scaler and explainer are loaded on first use: the native
+        # backend with exported trees never needs them (nor the xgboost import)
+        # unless a request asks for an explanation
+        self._model = None
+        self._scaler = None
+        self._explainer = None
+        self._num_threads = None
+        self._lazy_lock = threading.RLock()
         
         # Load all artifacts
         self._load_model_artifacts()
         
     def _load_model_artifacts(self):
-        """Load all necessary model artifacts"""
+        """Load the artifacts every request needs"""
+        load_start = time.perf_counter()
         try:
-            # Load trained model
-            model_file = os.path.join(self.model_path, "final_model_xgboost.pkl")
-            self.model = joblib.load(model_file)
-            logger.info(f"✅ Model loaded from {model_file}")
+            # Load metadata
+            with STARTUP_PROFILE.stage("metadata"):
+                with open(os.path.join(self.model_path, "feature_metadata.json"), 'r') as f:
+                    self.feature_metadata = json.load(f)
+                
+                with open(os.path.join(self.model_path, "model_metadata.json"), 'r') as f:
+                    self.model_metadata = json.load(f)
+                
+                # Extract clinical mapping
+                self.clinical_mapping = self.feature_metadata.get('clinical_mapping', {})
+                
+                # Compile the feature encoder once for all requests
+                self.feature_encoder = FeatureEncoder.from_metadata(self.feature_metadata)
             
             # Load preprocessors
-            self.scaler = joblib.load(os.path.join(self.model_path, "feature_scaler.pkl"))
-            self.label_encoder = joblib.load(os.path.join(self.model_path, "label_encoder.pkl"))
+            with STARTUP_PROFILE.stage("label_encoder"):
+                classes_file = os.path.join(self.model_path, LABEL_CLASSES_FILE)
+                label_classes = LabelClasses.load(classes_file) if os.path.exists(classes_file) else None
+                if label_classes is not None and self._export_is_current(classes_file, label_classes.training_date):
+                    self.label_encoder = label_classes
+                else:
+                    import joblib
+                    self.label_encoder = joblib.load(os.path.join(self.model_path, "label_encoder.pkl"))
             logger.info("✅ Preprocessors loaded")
             
-            # Load metadata
-            with open(os.path.join(self.model_path, "feature_metadata.json"), 'r') as f:
-                self.feature_metadata = json.load(f)
+            if self.inference_backend == "native":
+                compiled_dir = os.path.join(self.model_path, COMPILED_TREES_DIR)
+                if os.path.isdir(compiled_dir):
+                    # Pre-exported arrays are memory-mapped and shared between worker processes
+                    with STARTUP_PROFILE.stage("compiled_trees"):
+                        compiled = CompiledTreeEnsemble.load(compiled_dir, mmap=True)
+                    if self._export_is_current(compiled_dir, compiled.training_date):
+                        self.compiled_model = compiled
+                        logger.info(f"✅ Native tree evaluator memory-mapped from {compiled_dir}")
+                if self.compiled_model is None:
+                    booster = self.model.get_booster()
+                    with STARTUP_PROFILE.stage("compile_trees"):
+                        self.compiled_model = CompiledTreeEnsemble.from_booster(booster, self._num_iterations())
+                    logger.info(f"✅ Native tree evaluator compiled ({self.compiled_model.num_trees} trees)")
+            else:
+                # Every request on this backend needs the XGBoost model, so don't defer it
+                _ = self.model
             
-            with open(os.path.join(self.model_path, "model_metadata.json"), 'r') as f:
-                self.model_metadata = json.load(f)
-                
-            # Extract clinical mapping
-            self.clinical_mapping = self.feature_metadata.get('clinical_mapping', {})
+            # Cached outputs from any other model version must not be served
+            if self.prediction_cache is not None:
+                self.prediction_cache.bind_model_version(self.model_version)
+            
+            load_seconds = time.perf_counter() - load_start
+            MODEL_LOAD_SECONDS.set(load_seconds)
             
-            logger.info("✅ Metadata loaded")
+            logger.info(f"✅ Metadata loaded (artifacts loaded in {load_seconds:.2f}s)")
             logger.info(f"📊 Model: {self.model_metadata['model_name']}")
             logger.info(f"📈 Performance: AUROC {self.model_metadata['performance_metrics']['auroc']:.3f}")
             
@@ -72,6 +141,124 @@ class RiskPredictor:
             logger.error(f"❌ Error loading model artifacts: {e}")
             raise
     
+    @property
+    def model(self):
+        """
+        The XGBoost classifier, loaded on first access
+        
+        Prefers the native booster written by export_artifacts.py
+        (final_model_xgboost.ubj) over unpickling the scikit-learn wrapper,
+        as long as it was exported from the model in model_metadata.json.
+        """
+        if self._model is None:
+            with self._lazy_lock:
+                if self._model is None:
+                    native_file = os.path.join(self.model_path, NATIVE_MODEL_FILE)
+                    with STARTUP_PROFILE.stage("model"):
+                        model = BoosterClassifier.load(native_file) if os.path.exists(native_file) else None
+                        if model is not None and self._export_is_current(native_file, model.training_date):
+                            logger.info(f"✅ Model loaded from {native_file} (native booster)")
+                        else:
+                            import joblib
+                            model_file = os.path.join(self.model_path, "final_model_xgboost.pkl")
+                            model = joblib.load(model_file)
+                            logger.info(f"✅ Model loaded from {model_file}")
+                    if self._num_threads is not None:
+                        model.set_params(n_jobs=self._num_threads)
+                    self._model = model
+        return self._model
+    
+    @property
+    def scaler(self):
+        """Feature scaler from training; XGBoost doesn't use it, so it is only loaded on request"""
+        if self._scaler is None:
+            with self._lazy_lock:
+                if self._scaler is None:
+                    import joblib
+                    self._scaler = joblib.load(os.path.join(self.model_path, "feature_scaler.pkl"))
+        return self._scaler
+    
+    @property
+    def explainer(self):
+        """SHAP explainer, built on the first explained request"""
+        if self._explainer is None:
+            with self._lazy_lock:
+                if self._explainer is None:
+                    from .explainer import ShapExplainer
+                    
+                    # Explainer state is patient-independent, so build it once
+                    self._explainer = ShapExplainer(
+                        self.model.get_booster(),
+                        self.feature_encoder.feature_names,
+                        self.clinical_mapping,
+                        self.label_encoder.classes_,
+                        iteration_range=(0, self._num_iterations() or 0),
+                        approximate=self.shap_approximate
+                    )
+        return self._explainer
+    
+    @property
+    def model_version(self) -> str:
+        """Version tag of the loaded model (its training date)"""
+        return self.model_metadata['training_date']
+    
+    def _export_is_current(self, path: str, training_date: Optional[str]) -> bool:
+        """Whether an export_artifacts.py output was made from the model this directory now holds"""
+        if training_date == self.model_version:
+            return True
+        logger.warning(f"⚠️ Ignoring {path}: exported from model {training_date or 'unknown'}, "
+                       f"but model_metadata.json is {self.model_version}; rerun export_artifacts.py")
+        return False
+    
+    def set_num_threads(self, n_threads: int):
+        """Limit XGBoost's native threads (e.g. one per pre-forked worker)"""
+        self._num_threads = n_threads
+        if self._model is not None:
+            self._model.set_params(n_jobs=n_threads)
+    
+    def _num_iterations(self) -> Optional[int]:
+        """Boosting rounds predict_proba uses (all of them unless early stopping set best_iteration)"""
+        best_iteration = getattr(self.model, 'best_iteration', None)
+        return best_iteration + 1 if best_iteration is not None else None
+    
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities from the selected inference backend"""
+        if self.compiled_model is not None:
+            return self.compiled_model.predict_proba(X)
+        return self.model.predict_proba(X)
+    
+    def score_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for an already encoded feature matrix
+        
+        Bypasses the prediction cache; meant for offline bulk scoring where
+        every row is scored once.
+        
+        Args:
+            X: Encoded feature matrix of shape (n_patients, n_features)
+            
+        Returns:
+            Array of shape (n_patients, n_classes), columns in label_encoder.classes_ order
+        """
+        with track_stage("inference"):
+            return self._predict_proba(X)
+    
+    def score_columns(self, columns: Dict[str, np.ndarray]):
+        """
+        Score column-oriented patients, e.g. one parsed chunk of a bulk upload
+        
+        Args:
+            columns: 'patient_id' plus feature name -> 1-D array; missing features get their defaults
+            
+        Returns:
+            DataFrame in the FeatureStore.scores_frame layout, one row per patient
+        """
+        from .feature_store import FeatureStore
+        patient_ids = columns['patient_id']
+        X = self.feature_encoder.encode_columns(columns, len(patient_ids))
+        return FeatureStore.scores_frame(patient_ids, self.score_matrix(X), self.label_encoder.classes_,
+                                         self.model_version)
+    
     def _prepare_features(self, patient_data: Dict) -> np.ndarray:
         """
         Prepare patient data for model prediction
@@ -82,123 +269,200 @@ class RiskPredictor:
         Returns:
             Processed feature array ready for prediction
         """
-        # Get expected features from metadata
-        feature_names = self.feature_metadata['feature_names']
-        
-        # Create DataFrame with correct feature order
-        df = pd.DataFrame([patient_data])
-        
-        # Ensure all required features are present
-        for feature in feature_names:
-            if feature not in df.columns:
-                # Set default values for missing features
-                default_values = {
-                    'age': 50,
-                    'gender_male': 0,
-                    'bmi': 25.0,
-                    'systolic_bp': 120.0,
-                    'diastolic_bp': 80.0,
-                    'heart_rate': 70.0,
-                    'glucose': 100.0,
-                    'hba1c': 6.0,
-                    'cholesterol': 200.0
-                }
-                df[feature] = default_values.get(feature, 0)
-                
-        # Select and order features correctly
-        X = df[feature_names].values
+        # XGBoost doesn't need scaling; the model was trained on raw features
+        return self.feature_encoder.encode(patient_data)
+    
+    def _prepare_features_batch(self, patients: List[Dict]) -> np.ndarray:
+        """
+        Prepare a batch of patients as one contiguous feature matrix
         
-        # Apply scaling (XGBoost doesn't need scaling, but we keep for consistency)
-        # Note: For XGBoost, we typically don't scale, but our model was trained this way
-        return X
+        Args:
+            patients: List of dictionaries with patient features
+            
+        Returns:
+            Feature matrix of shape (n_patients, n_features)
+        """
+        return self.feature_encoder.encode_batch(patients)
     
-    def predict_risk(self, patient_data: Dict) -> Dict:
+    def predict_risk(self, patient_data: Dict, explain: bool = False) -> Dict:
         """
         Predict 90-day deterioration risk for a patient
         
         Args:
             patient_data: Dictionary with patient features
+            explain: Include per-feature SHAP contributions
             
         Returns:
             Dictionary with risk prediction, probability, level, and recommendations
         """
         try:
-            logger.info("🔄 Starting clinical data validation...")
+            logger.debug("🔄 Starting clinical data validation...")
             
-            logger.info("🔄 Preprocessing patient features...")
+            logger.debug("🔄 Preprocessing patient features...")
             # Prepare features
-            X = self._prepare_features(patient_data)
-            
-            logger.info("🔄 Running XGBoost model inference...")
-            # Make prediction
-            probabilities = self.model.predict_proba(X)[0]
-            
-            logger.info("🔄 Computing SHAP explanations...")
-            # TODO: Add real SHAP computation here
+            with track_stage("preprocessing"):
+                X = self._prepare_features(patient_data)
             
-            logger.info("🔄 Generating clinical recommendations...")
+            logger.debug("🔄 Running XGBoost model inference...")
+            # Make prediction (with SHAP explanations if requested), reusing cached outputs
+            probabilities, explanations = self._score(X, explain)
             
-            # Get risk probabilities for each class
-            # Classes: ['high', 'low', 'medium'] -> [0, 1, 2]
-            high_risk_prob = probabilities[0]  # Class 0 = 'high'
-            low_risk_prob = probabilities[1]   # Class 1 = 'low' 
-            medium_risk_prob = probabilities[2] # Class 2 = 'medium'
+            logger.debug("🔄 Generating clinical recommendations...")
+            with track_stage("recommendations"):
+                return self._build_predictions([patient_data], probabilities, explanations)[0]
             
-            # Determine overall risk level based on highest probability
-            predicted_class = np.argmax(probabilities)
-            risk_level = self.label_encoder.classes_[predicted_class]
+        except Exception as e:
+            logger.error(f"❌ Prediction error: {e}")
+            raise
+    
+    def predict_risk_batch(self, patients: List[Dict], explain: bool = False) -> List[Dict]:
+        """
+        Predict 90-day deterioration risk for many patients in one model call
+        
+        Args:
+            patients: List of dictionaries with patient features
+            explain: Include per-feature SHAP contributions, computed for the
+                whole batch in one call
             
-            # Calculate 90-day deterioration probability
-            # High risk = high probability of deterioration
-            # Medium risk = medium probability
-            # Low risk = low probability
-            deterioration_probability = high_risk_prob + 0.5 * medium_risk_prob
+        Returns:
+            List of prediction dictionaries, in the same order as the input
+        """
+        if not patients:
+            return []
+        
+        try:
+            with track_stage("preprocessing"):
+                X = self._prepare_features_batch(patients)
+            probabilities, explanations = self._score(X, explain)
+            with track_stage("recommendations"):
+                return self._build_predictions(patients, probabilities, explanations)
             
-            # Determine urgency
-            if deterioration_probability >= 0.7 or risk_level == 'high':
-                urgency = "IMMEDIATE"
-                priority = "HIGH"
-            elif deterioration_probability >= 0.3 or risk_level == 'medium':
-                urgency = "WITHIN 2 WEEKS"
-                priority = "MEDIUM"
-            else:
-                urgency = "ROUTINE MONITORING"
-                priority = "LOW"
+        except Exception as e:
+            logger.error(f"❌ Batch prediction error ({len(patients)} patients): {e}")
+            raise
+    
+    def _score(self, X: np.ndarray, explain: bool = False) -> Tuple[np.ndarray, Optional[List[Dict]]]:
+        """
+        Model probabilities (and optional explanations) for a feature matrix
+        
+        Rows already in the prediction cache are served from it; only the
+        remaining rows go through the model, in a single call.
+        
+        Args:
+            X: Encoded feature matrix of shape (n_patients, n_features)
+            explain: Also compute SHAP explanations
             
-            # Generate recommendations
-            recommendations = self._generate_recommendations(
-                patient_data, deterioration_probability, risk_level
-            )
+        Returns:
+            Tuple of (probabilities array, explanations list or None)
+        """
+        if self.prediction_cache is None:
+            with track_stage("inference"):
+                probabilities = self._predict_proba(X)
+            explanations = None
+            if explain:
+                with track_stage("shap"):
+                    explanations = self.explainer.explain(X, np.argmax(probabilities, axis=1))
+            return probabilities, explanations
+        
+        with track_stage("cache"):
+            variant = "explain" if explain else ""
+            keys = [self.prediction_cache.key(row, variant) for row in X]
+            cached = [self.prediction_cache.get(key) for key in keys]
+            misses = [i for i, entry in enumerate(cached) if entry is None]
+        
+        if misses:
+            X_miss = X[misses]
+            with track_stage("inference"):
+                miss_probabilities = self._predict_proba(X_miss)
+            miss_explanations = None
+            if explain:
+                with track_stage("shap"):
+                    miss_explanations = self.explainer.explain(X_miss, np.argmax(miss_probabilities, axis=1))
+            for j, i in enumerate(misses):
+                entry = (miss_probabilities[j].copy(), miss_explanations[j] if explain else None)
+                self.prediction_cache.put(keys[i], entry)
+                cached[i] = entry
+        
+        probabilities = np.vstack([entry[0] for entry in cached])
+        explanations = [entry[1] for entry in cached] if explain else None
+        return probabilities, explanations
+    
+    def _build_predictions(self, patients: List[Dict], probabilities: np.ndarray,
+                           explanations: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Turn a matrix of class probabilities into prediction dictionaries
+        
+        Args:
+            patients: Patient feature dictionaries, one per probability row
+            probabilities: Array of shape (n_patients, n_classes)
+            explanations: Optional SHAP explanation per patient
             
-            return {
+        Returns:
+            List of prediction dictionaries
+        """
+        # Get risk probabilities for each class
+        # Classes: ['high', 'low', 'medium'] -> [0, 1, 2]
+        high_risk_prob = probabilities[:, 0]  # Class 0 = 'high'
+        low_risk_prob = probabilities[:, 1]   # Class 1 = 'low' 
+        medium_risk_prob = probabilities[:, 2] # Class 2 = 'medium'
+        
+        # Determine overall risk level based on highest probability
+        predicted_class = np.argmax(probabilities, axis=1)
+        risk_levels = self.label_encoder.classes_[predicted_class]
+        confidence = np.max(probabilities, axis=1)
+        
+        # Calculate 90-day deterioration probability
+        # High risk = high probability of deterioration
+        # Medium risk = medium probability
+        # Low risk = low probability
+        deterioration_probability = high_risk_prob + 0.5 * medium_risk_prob
+        
+        # Determine urgency
+        tiers = risk_tiers(risk_levels, deterioration_probability)
+        urgency = np.array(["IMMEDIATE", "WITHIN 2 WEEKS", "ROUTINE MONITORING"])[tiers]
+        priority = np.array(["HIGH", "MEDIUM", "LOW"])[tiers]
+        recommendations = self.recommendation_engine.generate(patients, tiers)
+        
+        model_info = self._model_info()
+        prediction_timestamp = datetime.now().isoformat()
+        
+        predictions = []
+        for i, patient_data in enumerate(patients):
+            risk_level = str(risk_levels[i])
+            prediction = {
                 'patient_id': patient_data.get('patient_id', 'unknown'),
                 'risk_assessment': {
-                    'deterioration_probability': float(deterioration_probability),
+                    'deterioration_probability': float(deterioration_probability[i]),
                     'risk_level': risk_level,
-                    'priority': priority,
-                    'urgency': urgency,
-                    'confidence': float(np.max(probabilities))
+                    'priority': str(priority[i]),
+                    'urgency': str(urgency[i]),
+                    'confidence': float(confidence[i])
                 },
                 'class_probabilities': {
-                    'high_risk': float(high_risk_prob),
-                    'medium_risk': float(medium_risk_prob), 
-                    'low_risk': float(low_risk_prob)
-                },
-                'recommendations': recommendations,
-                'model_info': {
-                    'model_name': self.model_metadata['model_name'],
-                    'model_version': self.model_metadata['training_date'],
-                    'performance': {
-                        'auroc': self.model_metadata['performance_metrics']['auroc'],
-                        'accuracy': self.model_metadata['performance_metrics']['test_accuracy']
-                    }
+                    'high_risk': float(high_risk_prob[i]),
+                    'medium_risk': float(medium_risk_prob[i]), 
+                    'low_risk': float(low_risk_prob[i])
                 },
-                'prediction_timestamp': datetime.now().isoformat()
+                'recommendations': recommendations[i],
+                'model_info': dict(model_info),
+                'prediction_timestamp': prediction_timestamp
             }
-            
-        except Exception as e:
-            logger.error(f"❌ Prediction error: {e}")
-            raise
+            if explanations is not None:
+                prediction['explanation'] = explanations[i]
+            predictions.append(prediction)
+        
+        return predictions
+    
+    def _model_info(self) -> Dict:
+        """Model name, version and headline metrics attached to every prediction"""
+        return {
+            'model_name': self.model_metadata['model_name'],
+            'model_version': self.model_version,
+            'performance': {
+                'auroc': self.model_metadata['performance_metrics']['auroc'],
+                'accuracy': self.model_metadata['performance_metrics']['test_accuracy']
+            }
+        }
     
     def _generate_recommendations(self, patient_data: Dict, risk_prob: float, risk_level: str) -> List[Dict]:
         """
@@ -212,100 +476,8 @@ class RiskPredictor:
         Returns:
             List of clinical recommendations
         """
-        recommendations = []
-        
-        # Base recommendations by risk level
-        if risk_level == "high" or risk_prob >= 0.7:
-            recommendations.extend([
-                {
-                    "category": "IMMEDIATE_ACTION",
-                    "recommendation": "Schedule immediate clinical review within 24 hours",
-                    "priority": "CRITICAL",
-                    "rationale": "High risk of deterioration detected"
-                },
-                {
-                    "category": "CARE_COORDINATION", 
-                    "recommendation": "Contact patient to assess current status",
-                    "priority": "HIGH",
-                    "rationale": "Proactive monitoring required"
-                },
-                {
-                    "category": "MEDICATION_REVIEW",
-                    "recommendation": "Review all medications for optimization",
-                    "priority": "HIGH", 
-                    "rationale": "Medication adjustment may reduce risk"
-                }
-            ])
-        elif risk_level == "medium" or risk_prob >= 0.3:
-            recommendations.extend([
-                {
-                    "category": "FOLLOW_UP",
-                    "recommendation": "Schedule follow-up appointment within 2 weeks",
-                    "priority": "MEDIUM",
-                    "rationale": "Moderate risk requires monitoring"
-                },
-                {
-                    "category": "CARE_PLAN_REVIEW",
-                    "recommendation": "Review care plan and medication adherence",
-                    "priority": "MEDIUM",
-                    "rationale": "Optimization may prevent deterioration"
-                }
-            ])
-        else:
-            recommendations.append({
-                "category": "ROUTINE_CARE",
-                "recommendation": "Continue current care plan with routine monitoring",
-                "priority": "LOW",
-                "rationale": "Low risk allows standard care approach"
-            })
-        
-        # Feature-specific recommendations
-        bmi = patient_data.get('bmi', 25)
-        if bmi > 30:
-            recommendations.append({
-                "category": "LIFESTYLE",
-                "recommendation": "Refer to weight management program",
-                "priority": "MEDIUM",
-                "rationale": f"BMI {bmi:.1f} indicates obesity risk"
-            })
-        
-        systolic_bp = patient_data.get('systolic_bp', 120)
-        if systolic_bp > 140:
-            recommendations.append({
-                "category": "BLOOD_PRESSURE",
-                "recommendation": "Optimize blood pressure management",
-                "priority": "HIGH",
-                "rationale": f"Systolic BP {systolic_bp:.0f} above target"
-            })
-        
-        hba1c = patient_data.get('hba1c', 6.0)
-        if hba1c > 8.0:
-            recommendations.append({
-                "category": "DIABETES_MANAGEMENT",
-                "recommendation": "Intensify diabetes management",
-                "priority": "HIGH",
-                "rationale": f"HbA1c {hba1c:.1f}% indicates poor glucose control"
-            })
-        
-        has_diabetes = patient_data.get('has_diabetes', 0)
-        if has_diabetes == 1:
-            recommendations.append({
-                "category": "DIABETES_MONITORING",
-                "recommendation": "Monitor glucose levels closely",
-                "priority": "MEDIUM",
-                "rationale": "Diabetes requires ongoing management"
-            })
-        
-        comorbidity_count = patient_data.get('comorbidity_count', 0)
-        if comorbidity_count >= 3:
-            recommendations.append({
-                "category": "CARE_COORDINATION",
-                "recommendation": "Coordinate multi-specialty care",
-                "priority": "HIGH",
-                "rationale": f"{comorbidity_count} comorbidities require coordination"
-            })
-        
-        return recommendations
+        tiers = risk_tiers(np.array([risk_level]), np.array([risk_prob]))
+        return self.recommendation_engine.generate([patient_data], tiers)[0]
     
     def get_feature_importance(self) -> Dict:
         """
@@ -329,19 +501,14 @@ class RiskPredictor:
         """
         return {
             'status': 'healthy',
-            'model_loaded': self.model is not None,
+            'model_loaded': self._model is not None or self.compiled_model is not None,
             'model_name': self.model_metadata.get('model_name', 'unknown'),
             'model_version': self.model_metadata.get('training_date', 'unknown'),
             'features_count': len(self.feature_metadata.get('feature_names', [])),
             'timestamp': datetime.now().isoformat()
         }
 
-# Global instance for FastAPI
-risk_predictor = None
-
 def get_risk_predictor() -> RiskPredictor:
-    """Get or create the global risk predictor instance"""
-    global risk_predictor
-    if risk_predictor is None:
-        risk_predictor = RiskPredictor()
-    return risk_predictor
+    """Get the active risk predictor from the process-wide model registry"""
+    from .model_registry import get_model_registry
+    return get_model_registry().active()
@@ -0,0 +1,171 @@
+"""
+Score State
+Per-patient feature fingerprints and last scores for incremental re-scoring
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STATE_FILE = "_state.json"
+FINGERPRINT_COLUMNS = ['fingerprint_hi', 'fingerprint_lo']
+
+# 64-bit multiply/xor-shift mixing constants (splitmix64 / murmur3 finalizer)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+def patient_keys(patient_ids: Sequence[str]) -> np.ndarray:
+    """64-bit hash of each patient ID, used instead of the string as the lookup key"""
+    return pd.util.hash_array(np.asarray(patient_ids, dtype=object))
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    h = (h ^ (h >> np.uint64(30))) * _MIX_1
+    h = (h ^ (h >> np.uint64(27))) * _MIX_2
+    return h ^ (h >> np.uint64(31))
+
+def feature_fingerprints(X: np.ndarray, model_version: str) -> np.ndarray:
+    """
+    128-bit fingerprint of each encoded feature row, salted with the model version
+
+    The hash is computed over the exact float32 bits the model sees, one
+    column at a time, so it is vectorized over patients. Because the model
+    version is part of the seed, every fingerprint changes after a model upgrade.
+
+    Args:
+        X: Encoded float32 feature matrix (n_patients, n_features)
+        model_version: Version tag of the model that will score the rows
+
+    Returns:
+        uint64 array of shape (n_patients, 2)
+    """
+    words = np.ascontiguousarray(X, dtype=np.float32).view(np.uint32)
+    seed = np.frombuffer(hashlib.blake2b(model_version.encode(), digest_size=16).digest(), dtype=np.uint64)
+
+    fingerprints = np.empty((len(words), 2), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for lane in range(2):
+            h = np.full(len(words), seed[lane], dtype=np.uint64)
+            for j in range(words.shape[1]):
+                h = _mix(h ^ (words[:, j].astype(np.uint64) + np.uint64(j + 1)))
+            fingerprints[:, lane] = h
+    return fingerprints
+
+class ScoreState:
+    """
+    Fingerprints and class probabilities from the previous scoring run
+
+    Stored as a directory of Parquet parts keyed by hashed patient ID, plus a
+    small JSON file with the model version. Held in memory as arrays sorted
+    by key, so a chunk of patients is matched with one searchsorted call.
+    """
+
+    def __init__(self, keys: np.ndarray, fingerprints: np.ndarray, probabilities: np.ndarray,
+                 class_names: Sequence[str], model_version: Optional[str]):
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.fingerprints = fingerprints[order]
+        self.probabilities = probabilities[order]
+        self.class_names = list(class_names)
+        self.model_version = model_version
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def empty(cls, class_names: Sequence[str]) -> "ScoreState":
+        return cls(np.empty(0, dtype=np.uint64), np.empty((0, 2), dtype=np.uint64),
+                   np.empty((0, len(class_names)), dtype=np.float32), class_names, None)
+
+    @classmethod
+    def load(cls, path: str, class_names: Sequence[str]) -> "ScoreState":
+        """Load a saved state directory; a missing directory gives an empty state"""
+        state_file = os.path.join(path, STATE_FILE)
+        if not os.path.exists(state_file):
+            return cls.empty(class_names)
+
+        with open(state_file, 'r') as f:
+            info = json.load(f)
+        if list(info['class_names']) != list(class_names):
+            # Probabilities from a model with other classes cannot be carried forward
+            return cls.empty(class_names)
+
+        table = pq.read_table(path)
+        return cls(
+            table.column('patient_key').to_numpy(),
+            np.column_stack([table.column(c).to_numpy() for c in FINGERPRINT_COLUMNS]),
+            np.column_stack([table.column(f"prob_{c}").to_numpy() for c in class_names]).astype(np.float32),
+            class_names,
+            info['model_version'],
+        )
+
+    def match(self, keys: np.ndarray, fingerprints: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find patients whose fingerprint is unchanged since the saved run
+
+        Args:
+            keys: Hashed patient IDs of the chunk
+            fingerprints: Current fingerprints of the chunk
+
+        Returns:
+            (unchanged mask, positions of the matched rows in this state)
+        """
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.intp)
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        unchanged = (self.keys[positions] == keys) & (self.fingerprints[positions] == fingerprints).all(axis=1)
+        return unchanged, positions
+
+class ScoreStateWriter:
+    """Writes the next run's state beside the current one and swaps it in when complete"""
+
+    def __init__(self, path: str, class_names: Sequence[str], model_version: str, resume: bool):
+        self.path = path.rstrip(os.sep)
+        self.staging_path = self.path + ".new"
+        self.class_names = list(class_names)
+        self.model_version = model_version
+
+        if not resume and os.path.exists(self.staging_path):
+            shutil.rmtree(self.staging_path)
+        os.makedirs(self.staging_path, exist_ok=True)
+
+    def write(self, chunk_index: int, keys: np.ndarray, fingerprints: np.ndarray, probabilities: np.ndarray):
+        """Durably write the state rows of one chunk"""
+        columns: Dict[str, np.ndarray] = {
+            'patient_key': keys,
+            FINGERPRINT_COLUMNS[0]: fingerprints[:, 0],
+            FINGERPRINT_COLUMNS[1]: fingerprints[:, 1],
+        }
+        for i, name in enumerate(self.class_names):
+            columns[f"prob_{name}"] = probabilities[:, i].astype(np.float32)
+
+        part_path = os.path.join(self.staging_path, f"part-{chunk_index:06d}.parquet")
+        pq.write_table(pa.table(columns), part_path + ".tmp", compression='zstd')
+        os.replace(part_path + ".tmp", part_path)
+
+    def commit(self, chunks: int, rows: int):
+        """Replace the previous state with the one just written"""
+        # Parts beyond the final chunk are leftovers from a longer interrupted run
+        for part in glob.glob(os.path.join(self.staging_path, "part-*.parquet")):
+            if int(os.path.basename(part)[5:11]) >= chunks:
+                os.remove(part)
+
+        with open(os.path.join(self.staging_path, STATE_FILE), 'w') as f:
+            json.dump({'model_version': self.model_version, 'class_names': self.class_names, 'rows': rows}, f, indent=2)
+
+        backup_path = self.path + ".old"
+        if os.path.exists(backup_path):
+            shutil.rmtree(backup_path)
+        if os.path.exists(self.path):
+            os.replace(self.path, backup_path)
+        os.replace(self.staging_path, self.path)
+        if os.path.exists(backup_path):
+            shutil.rmtree(backup_path)
@@ -0,0 +1,188 @@
+"""
+Shadow Scoring
+Scores a sample of live traffic with a candidate model version off the request path
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from .metrics import Counter, Histogram, collect_stages
+from .model_registry import ModelRegistry, get_model_registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPUTE_MS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+PROBABILITY_DIFF_BUCKETS = (0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+# PatientData.patient_id default for requests that don't identify the patient
+ANONYMOUS_PATIENT_ID = "unknown"
+
+class ShadowScorer:
+    """
+    Compares a candidate model version with the one serving traffic
+
+    After a /predict response has been computed, the same patient is queued
+    for the candidate on a dedicated background thread, so the response never
+    waits for it and the inference pool's capacity is untouched. Patients are
+    selected by a hash of their ID, so a given patient is either always or
+    never in the sample (``sample_rate=1.0`` shadows all traffic); requests
+    without a real ID are sampled at random instead. When the backlog is
+    full, new work is dropped rather than queued.
+
+    Per comparison, risk-level agreement, the deterioration probability
+    difference and both models' per-patient compute time are recorded.
+    """
+
+    def __init__(self, candidate_version: str, sample_rate: float = 1.0, max_pending: int = 256,
+                 workers: int = 1, registry: Optional[ModelRegistry] = None):
+        """
+        Create the scorer
+
+        Args:
+            candidate_version: Registry version to compare against the serving one
+            sample_rate: Fraction of patients also scored by the candidate (0.0 - 1.0)
+            max_pending: Candidate scorings allowed to wait before new ones are dropped
+            workers: Background threads scoring the candidate
+            registry: Model registry (defaults to the process-wide one)
+        """
+        self.candidate_version = candidate_version
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_pending = max_pending
+        self.registry = registry or get_model_registry()
+
+        self.compute_histogram = Histogram(
+            "welldoc_shadow_compute_milliseconds", COMPUTE_MS_BUCKETS,
+            "Per-patient compute time of shadowed predictions", labelnames=("model",)
+        )
+        self.probability_diff_histogram = Histogram(
+            "welldoc_shadow_probability_abs_difference", PROBABILITY_DIFF_BUCKETS,
+            "Absolute deterioration probability difference between candidate and primary"
+        )
+        self.comparisons = Counter(
+            "welldoc_shadow_comparisons_total", "Shadowed predictions by risk-level agreement",
+            labelnames=("agreement",)
+        )
+
+        self.started_at = time.time()
+        self.dropped = 0
+        self.errors = 0
+        self._pending = 0
+        # primary risk level -> candidate risk level -> count
+        self._confusion: Dict[str, Dict[str, int]] = {}
+        self._max_probability_diff = 0.0
+        self._compute_diff_ms_sum = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shadow")
+
+    @classmethod
+    def from_env(cls) -> Optional["ShadowScorer"]:
+        """Create a scorer from SHADOW_MODEL_VERSION and SHADOW_SAMPLE_RATE; None when unset"""
+        candidate_version = os.getenv("SHADOW_MODEL_VERSION")
+        if not candidate_version:
+            return None
+        return cls(
+            candidate_version,
+            sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "1.0")),
+            max_pending=int(os.getenv("SHADOW_MAX_PENDING", "256"))
+        )
+
+    def selected(self, patient_id: Optional[str]) -> bool:
+        """Whether this patient falls in the shadowed fraction"""
+        if self.sample_rate >= 1.0:
+            return True
+        # Anonymous requests all share one ID, which would hash to a single all-or-nothing bucket
+        if patient_id is None or patient_id == ANONYMOUS_PATIENT_ID:
+            return random.random() < self.sample_rate
+        return zlib.crc32(str(patient_id).encode()) / 2**32 < self.sample_rate
+
+    def submit(self, patient_data: Dict, prediction: Dict, timing: Dict):
+        """
+        Queue one served prediction for comparison; returns immediately
+
+        Args:
+            patient_data: Patient dictionary the primary model scored
+            prediction: Primary prediction that was returned to the client
+            timing: Primary timing dict from the inference pool or micro-batcher
+        """
+        if timing.get('model_version') == self.candidate_version or not self.selected(patient_data.get('patient_id')):
+            return
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending += 1
+        # Batched calls report the whole batch's compute time
+        primary_ms = timing['compute_ms'] / timing.get('batch_size', 1)
+        self._executor.submit(self._score, patient_data, prediction, primary_ms)
+
+    def _score(self, patient_data: Dict, prediction: Dict, primary_ms: float):
+        try:
+            # Collect (and discard) stage timings so they don't mix with the primary model's
+            with self.registry.use(self.candidate_version) as predictor, collect_stages():
+                start = time.perf_counter()
+                candidate = predictor.predict_risk(patient_data)
+                candidate_ms = (time.perf_counter() - start) * 1000
+            self._record(prediction, candidate, primary_ms, candidate_ms)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.debug(f"⚠️ Shadow scoring with {self.candidate_version} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record(self, primary: Dict, candidate: Dict, primary_ms: float, candidate_ms: float):
+        primary_level = primary['risk_assessment']['risk_level']
+        candidate_level = candidate['risk_assessment']['risk_level']
+        probability_diff = abs(candidate['risk_assessment']['deterioration_probability']
+                               - primary['risk_assessment']['deterioration_probability'])
+
+        self.comparisons.inc(agreement="agree" if primary_level == candidate_level else "disagree")
+        self.probability_diff_histogram.observe(probability_diff)
+        self.compute_histogram.observe(primary_ms, model="primary")
+        self.compute_histogram.observe(candidate_ms, model="candidate")
+        with self._lock:
+            row = self._confusion.setdefault(primary_level, {})
+            row[candidate_level] = row.get(candidate_level, 0) + 1
+            self._max_probability_diff = max(self._max_probability_diff, probability_diff)
+            self._compute_diff_ms_sum += candidate_ms - primary_ms
+
+    def shutdown(self):
+        """Stop the background threads without waiting for queued comparisons"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        """Agreement rate, probability differences and compute time of candidate vs primary"""
+        agreed = self.comparisons.value(agreement="agree")
+        compared = agreed + self.comparisons.value(agreement="disagree")
+        probability_diff = self.probability_diff_histogram.snapshot()
+        with self._lock:
+            return {
+                'candidate_version': self.candidate_version,
+                'sample_rate': self.sample_rate,
+                'started_at': self.started_at,
+                'compared': int(compared),
+                'agreement_rate': round(agreed / compared, 4) if compared else None,
+                'risk_level_confusion': {level: dict(row) for level, row in self._confusion.items()},
+                'probability_abs_difference': {
+                    'mean': round(probability_diff['mean'], 6),
+                    'max': round(self._max_probability_diff, 6),
+                    'buckets': probability_diff['buckets'],
+                },
+                'compute_ms': {
+                    'primary': self.compute_histogram.snapshot(model="primary"),
+                    'candidate': self.compute_histogram.snapshot(model="candidate"),
+                    'mean_difference': round(self._compute_diff_ms_sum / compared, 4) if compared else None,
+                },
+                'pending': self._pending,
+                'dropped': self.dropped,
+                'errors': self.errors,
+            }
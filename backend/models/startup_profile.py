@@ -0,0 +1,72 @@
+"""
+Startup Profile
+Wall-clock breakdown of process startup, from module imports to the first prediction
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Modules that dominate import time; the report shows which ones startup pulled in
+HEAVY_MODULES = ("xgboost", "sklearn", "scipy", "pandas", "pyarrow", "joblib")
+
+class StartupProfile:
+    """
+    Ordered startup stages and their durations
+
+    Stages are recorded until ``finish()`` is called, so models reloaded or
+    loaded by offline tools later do not add to the startup report.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self._stages: List[Tuple[str, float]] = []
+        self._modules: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            if self.finished_at is None:
+                self._stages.append((name, seconds))
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one startup stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def finish(self):
+        """Close the profile once the service can answer its first prediction"""
+        with self._lock:
+            if self.finished_at is None:
+                self.finished_at = time.perf_counter()
+                self._modules = {name: name in sys.modules for name in HEAVY_MODULES}
+
+    def report(self) -> Dict:
+        """Stage durations, total time since the profile started and heavy modules imported"""
+        with self._lock:
+            end = self.finished_at if self.finished_at is not None else time.perf_counter()
+            return {
+                'complete': self.finished_at is not None,
+                'total_seconds': round(end - self.started_at, 4),
+                'stages': [{'stage': name, 'seconds': round(seconds, 4)} for name, seconds in self._stages],
+                'heavy_modules_loaded': dict(self._modules) or {name: name in sys.modules for name in HEAVY_MODULES},
+            }
+
+    def log(self, logger):
+        """Write the report to ``logger``, one line per stage"""
+        report = self.report()
+        logger.info(f"🚀 Startup took {report['total_seconds']:.2f}s")
+        for stage in report['stages']:
+            logger.info(f"   {stage['stage']:<24} {stage['seconds'] * 1000:8.1f} ms")
+        loaded = [name for name, imported in report['heavy_modules_loaded'].items() if imported]
+        logger.info(f"   Heavy modules imported: {', '.join(loaded) or 'none'}")
+
+# Process-wide profile, started when this module is first imported
+STARTUP_PROFILE = StartupProfile()
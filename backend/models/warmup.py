@@ -0,0 +1,273 @@
+"""
+Inference Warm-up
+Synthetic traffic through the full prediction path before a process reports ready
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = (1, 8, 32, 128)
+
+def synthetic_patients(n: int, seed: int = 0) -> List[Dict]:
+    """
+    Plausible, varied patients for warm-up traffic
+
+    Values are spread across the API's accepted ranges so every risk level
+    and recommendation rule gets exercised, and no two patients share a
+    prediction cache entry.
+
+    Args:
+        n: Number of patients
+        seed: Random seed
+
+    Returns:
+        List of patient dictionaries
+    """
+    rng = random.Random(seed)
+    patients = []
+    for i in range(n):
+        conditions = {name: int(rng.random() < 0.3) for name in (
+            'has_diabetes', 'has_hypertension', 'has_heart_disease', 'has_kidney_disease',
+            'has_stroke', 'has_copd', 'has_depression', 'has_cancer'
+        )}
+        inpatient, emergency, outpatient = rng.randint(0, 3), rng.randint(0, 4), rng.randint(0, 12)
+        medications = rng.randint(0, 12)
+        patients.append({
+            'patient_id': f"warmup-{seed}-{i}",
+            'age': rng.randint(25, 95),
+            'gender_male': rng.randint(0, 1),
+            **conditions,
+            'total_conditions': sum(conditions.values()),
+            'comorbidity_count': max(sum(conditions.values()) - 1, 0),
+            'bmi': round(rng.uniform(17.0, 48.0), 1),
+            'systolic_bp': round(rng.uniform(95.0, 190.0), 1),
+            'diastolic_bp': round(rng.uniform(55.0, 115.0), 1),
+            'heart_rate': round(rng.uniform(50.0, 120.0), 1),
+            'glucose': round(rng.uniform(70.0, 280.0), 1),
+            'hba1c': round(rng.uniform(4.8, 12.0), 1),
+            'cholesterol': round(rng.uniform(130.0, 320.0), 1),
+            'has_glucose_data': rng.randint(0, 1),
+            'has_hba1c_data': rng.randint(0, 1),
+            'total_encounters': inpatient + emergency + outpatient,
+            'inpatient_visits': inpatient,
+            'emergency_visits': emergency,
+            'outpatient_visits': outpatient,
+            'has_inpatient': int(inpatient > 0),
+            'has_emergency': int(emergency > 0),
+            'medication_count': medications,
+            'polypharmacy': int(medications > 5),
+        })
+    return patients
+
+def warm_up_predictor(predictor, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, seed: int = 0):
+    """Run one synthetic call of each batch size directly on a predictor"""
+    for size in batch_sizes:
+        patients = synthetic_patients(size, seed=seed * 1000 + size)
+        if size == 1:
+            predictor.predict_risk(patients[0])
+        else:
+            predictor.predict_risk_batch(patients)
+
+def batch_sizes_from_env() -> List[int]:
+    """WARMUP_BATCH_SIZES as a list of ints"""
+    value = os.getenv("WARMUP_BATCH_SIZES")
+    if not value:
+        return list(DEFAULT_BATCH_SIZES)
+    return [int(size) for size in value.split(",") if size.strip()]
+
+class StartupWarmup:
+    """
+    Warm-up phase that gates readiness
+
+    Synthetic traffic takes the same route as /predict after request
+    parsing: single patients go through the micro-batcher when it is
+    enabled, batches straight to the inference pool (so every worker, the
+    prediction cache and the recommendation engine are exercised), and
+    every result is encoded by the orjson response encoder. HTTP parsing and
+    Pydantic validation are not covered. Each configured batch size is sent
+    ``rounds`` times over, then a latency check times ``check_requests``
+    single predictions along the same route; the process reports ready once
+    their p99 is within ``max_latency_ms``. A failed check or an error warms
+    up again and retries; after ``max_attempts`` failed attempts the process
+    reports ready anyway, flagged as degraded, so a slow or broken machine
+    still settles instead of retrying forever.
+    """
+
+    def __init__(self, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, rounds: int = 3,
+                 check_requests: int = 50, max_latency_ms: float = 250.0, retry_seconds: float = 5.0,
+                 max_attempts: int = 5):
+        """
+        Configure the warm-up
+
+        Args:
+            batch_sizes: Patients per synthetic call; 1 uses predict_risk, larger sizes predict_risk_batch
+            rounds: Passes over ``batch_sizes`` (0 skips warm-up)
+            check_requests: Single predictions timed by the latency check
+            max_latency_ms: p99 the latency check must meet (0 skips the check)
+            retry_seconds: Pause before warming up again after a failed check
+            max_attempts: Failed attempts (latency check misses or errors) before reporting
+                ready regardless (0 retries forever)
+        """
+        self.batch_sizes = list(batch_sizes)
+        self.rounds = rounds
+        self.check_requests = check_requests
+        self.max_latency_ms = max_latency_ms
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+
+        self.state = "pending"
+        self.attempts = 0
+        self.degraded = False
+        self.warmup_ms: Dict[str, List[float]] = {}
+        self.last_check: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ready_after_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._seed = 0
+        self._pool = None
+        self._micro_batcher = None
+        self._encoder = None
+
+    @classmethod
+    def from_env(cls) -> "StartupWarmup":
+        """Create the warm-up from WARMUP_BATCH_SIZES, WARMUP_ROUNDS and READINESS_* settings"""
+        return cls(
+            batch_sizes=batch_sizes_from_env(),
+            rounds=int(os.getenv("WARMUP_ROUNDS", "3")),
+            check_requests=int(os.getenv("READINESS_CHECK_REQUESTS", "50")),
+            max_latency_ms=float(os.getenv("READINESS_MAX_LATENCY_MS", "250")),
+            max_attempts=int(os.getenv("READINESS_MAX_ATTEMPTS", "5"))
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self, pool, micro_batcher=None, encoder=None):
+        """
+        Run warm-up and the latency check in the background on the running event loop
+
+        Args:
+            pool: Inference pool serving predictions
+            micro_batcher: The /predict micro-batcher, if enabled
+            encoder: Response encoder /predict uses, if any
+        """
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self.run(pool, micro_batcher, encoder))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self, pool, micro_batcher=None, encoder=None):
+        """Warm up and check latency until the check passes or ``max_attempts`` attempts have failed"""
+        self._pool, self._micro_batcher, self._encoder = pool, micro_batcher, encoder
+        failed_attempts = 0
+        while True:
+            self.attempts += 1
+            try:
+                self.state = "warming_up"
+                await self._warm_up(pool)
+                self.state = "checking"
+                if await self._check_latency(pool):
+                    break
+                failure = f"p99 {self.last_check['p99_ms']:.1f} ms > {self.max_latency_ms:.1f} ms"
+                logger.warning(f"⚠️ Readiness latency check failed: {failure}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = failure = str(e)
+                logger.error(f"❌ Warm-up attempt {self.attempts} failed: {e}")
+            failed_attempts += 1
+            if self.max_attempts and failed_attempts >= self.max_attempts:
+                self.degraded = True
+                logger.warning(f"⚠️ Warm-up failed {failed_attempts} times (last: {failure}); reporting ready anyway")
+                break
+            self.state = "warming_up"
+            await asyncio.sleep(self.retry_seconds)
+
+        self.state = "ready"
+        self.ready_after_seconds = time.monotonic() - self.started_at if self.started_at else None
+        logger.info(f"✅ Ready after {self.attempts} warm-up attempt(s)"
+                    + (f", p99 {self.last_check['p99_ms']:.1f} ms" if self.last_check else ""))
+
+    async def _predict(self, patient: Dict):
+        """One single-patient prediction along the /predict route"""
+        if self._micro_batcher is not None:
+            prediction, _ = await self._micro_batcher.submit(patient)
+        else:
+            prediction, _ = await self._pool.run("predict_risk", patient)
+        if self._encoder is not None:
+            self._encoder.encode(prediction)
+
+    async def _predict_batch(self, patients: List[Dict]):
+        predictions, _ = await self._pool.run("predict_risk_batch", patients)
+        if self._encoder is not None:
+            for prediction in predictions:
+                self._encoder.encode(prediction)
+
+    async def _warm_up(self, pool):
+        # One call per worker at a time, so process workers all get warmed;
+        # concurrent single patients also exercise micro-batch formation
+        concurrency = max(getattr(pool, 'max_workers', 1), 1)
+        self.warmup_ms = {}
+        for _ in range(self.rounds):
+            for size in self.batch_sizes:
+                calls = []
+                for _ in range(concurrency):
+                    self._seed += 1
+                    patients = synthetic_patients(size, seed=self._seed)
+                    calls.append(self._predict(patients[0]) if size == 1 else self._predict_batch(patients))
+                start = time.perf_counter()
+                await asyncio.gather(*calls)
+                self.warmup_ms.setdefault(str(size), []).append(round((time.perf_counter() - start) * 1000, 3))
+
+    async def _check_latency(self, pool) -> bool:
+        if self.max_latency_ms <= 0 or self.check_requests <= 0:
+            return True
+        self._seed += 1
+        latencies = []
+        for patient in synthetic_patients(self.check_requests, seed=self._seed):
+            start = time.perf_counter()
+            await self._predict(patient)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+        self.last_check = {
+            'requests': len(latencies),
+            'p50_ms': round(latencies[len(latencies) // 2], 3),
+            'p99_ms': round(p99, 3),
+            'max_latency_ms': self.max_latency_ms,
+            'passed': p99 <= self.max_latency_ms,
+        }
+        return self.last_check['passed']
+
+    def status(self) -> Dict:
+        """Readiness state, warm-up timings and the last latency check"""
+        return {
+            'ready': self.ready,
+            'state': self.state,
+            'degraded': self.degraded,
+            'attempts': self.attempts,
+            'ready_after_seconds': round(self.ready_after_seconds, 3) if self.ready_after_seconds is not None else None,
+            'warmup': {
+                'batch_sizes': self.batch_sizes,
+                'rounds': self.rounds,
+                'call_ms': self.warmup_ms,
+            },
+            'latency_check': self.last_check,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Offline bulk cohort scoring
+
+Streams a feature file with the primary_dataset.csv schema (CSV, a Parquet
+file, or a Parquet directory such as the feature store) through the
+RiskPredictor in fixed-size chunks and writes one score row per patient.
+Memory is bounded by the chunk size. Progress is checkpointed after every
+chunk, so an interrupted run resumes from the last completed chunk.
+
+With --state, the run is incremental: a fingerprint of each patient's
+encoded features and the model version is kept from the previous run, and
+only new or changed patients (or everyone, after a model upgrade) go
+through the model. Unchanged patients' previous scores are carried forward.
+
+Outputs:
+    *.csv      one CSV file, appended chunk by chunk
+    otherwise  a directory of Parquet parts (part-000000.parquet, ...)
+
+Usage:
+    python score_cohort.py input output [--chunksize N] [--threads N] [--restart] [--state DIR]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from models.risk_predictor import RiskPredictor, DEFAULT_MODEL_PATH
+from models.feature_store import FeatureStore, read_feature_chunks
+from models.score_state import ScoreState, ScoreStateWriter, feature_fingerprints, patient_keys
+
+DEFAULT_CHUNK_SIZE = 200000
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+def input_signature(path: str) -> Dict:
+    """Size and modification time of the input, to refuse resuming against changed data"""
+    files = sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True)) if os.path.isdir(path) else [path]
+    stats = [os.stat(f) for f in files]
+    return {
+        'path': os.path.abspath(path),
+        'files': len(files),
+        'bytes': sum(s.st_size for s in stats),
+        'mtime': max((s.st_mtime for s in stats), default=0.0),
+    }
+
+def load_checkpoint(checkpoint_path: str, signature: Dict, model_version: str,
+                    state_path: Optional[str] = None) -> Optional[Dict]:
+    """Return the saved progress if it belongs to this input, model and state, else None"""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, 'r') as f:
+        state = json.load(f)
+    if (state.get('input') != signature or state.get('model_version') != model_version
+            or state.get('state_path') != state_path):
+        print("⚠️ Checkpoint is for a different input, model version or state; starting over")
+        return None
+    return state
+
+def save_checkpoint(checkpoint_path: str, state: Dict):
+    """Atomically replace the checkpoint file"""
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+class ScoreWriter:
+    """Chunk-at-a-time score output that can be rolled back to the last checkpoint"""
+
+    def __init__(self, output_path: str, resume_state: Optional[Dict]):
+        self.output_path = output_path
+        self.is_csv = output_path.endswith(".csv")
+
+        if self.is_csv:
+            if resume_state is None or not os.path.exists(output_path):
+                self._file = open(output_path, 'wb')
+                self._write_header = True
+            else:
+                # Drop anything written after the last completed chunk
+                self._file = open(output_path, 'r+b')
+                self._file.truncate(resume_state['output_bytes'])
+                self._file.seek(resume_state['output_bytes'])
+                self._write_header = resume_state['output_bytes'] == 0
+        else:
+            os.makedirs(output_path, exist_ok=True)
+            if resume_state is None:
+                for part in glob.glob(os.path.join(output_path, "part-*.parquet")):
+                    os.remove(part)
+
+    def write(self, chunk_index: int, scores: pd.DataFrame) -> int:
+        """Durably write one chunk of scores, returning the output position"""
+        table = pa.Table.from_pandas(scores, preserve_index=False)
+        if self.is_csv:
+            # Arrow's CSV writer is several times faster than DataFrame.to_csv
+            pacsv.write_csv(table, self._file, pacsv.WriteOptions(include_header=self._write_header,
+                                                                  quoting_style='needed'))
+            self._write_header = False
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            return self._file.tell()
+
+        part_path = os.path.join(self.output_path, f"part-{chunk_index:06d}.parquet")
+        pq.write_table(table, part_path + ".tmp", compression='zstd')
+        os.replace(part_path + ".tmp", part_path)
+        return chunk_index + 1
+
+    def close(self):
+        if self.is_csv:
+            self._file.close()
+
+def score_cohort(predictor: RiskPredictor, input_path: str, output_path: str,
+                 chunksize: int = DEFAULT_CHUNK_SIZE, restart: bool = False,
+                 state_path: Optional[str] = None) -> Dict:
+    """
+    Score every patient in ``input_path`` and stream the results to ``output_path``
+
+    Args:
+        predictor: Loaded risk predictor
+        input_path: CSV, Parquet file or Parquet directory with the primary_dataset schema
+        output_path: .csv file or Parquet output directory
+        chunksize: Patients scored per model call
+        restart: Ignore any checkpoint and start from the first chunk
+        state_path: Fingerprint state directory from the previous run; enables
+            incremental scoring and is replaced with this run's state on success
+
+    Returns:
+        Run summary (rows, rescored, skipped, chunks, seconds, rows_per_second, resumed_from_chunk)
+    """
+    checkpoint_path = output_path.rstrip(os.sep) + CHECKPOINT_SUFFIX
+    signature = input_signature(input_path)
+    if state_path is not None:
+        state_path = os.path.abspath(state_path)
+    state = None if restart else load_checkpoint(checkpoint_path, signature, predictor.model_version, state_path)
+    if state is None:
+        state = {'input': signature, 'model_version': predictor.model_version, 'state_path': state_path,
+                 'chunksize': chunksize, 'chunks_done': 0, 'rows_done': 0, 'output_bytes': 0,
+                 'rescored': 0, 'skipped': 0}
+        resume_state = None
+    else:
+        chunksize = state['chunksize']
+        resume_state = state
+        print(f"🔄 Resuming after chunk {state['chunks_done']} ({state['rows_done']:,} rows already scored)")
+
+    writer = ScoreWriter(output_path, resume_state)
+    encoder = predictor.feature_encoder
+    class_names = predictor.label_encoder.classes_
+    resumed_from = state['chunks_done']
+    rows_scored = 0
+
+    previous = None
+    state_writer = None
+    if state_path is not None:
+        previous = ScoreState.load(state_path, class_names)
+        state_writer = ScoreStateWriter(state_path, class_names, predictor.model_version, resume_state is not None)
+        if previous.model_version is None:
+            print("🔄 No previous score state; scoring every patient")
+        elif previous.model_version != predictor.model_version:
+            print(f"🔄 Model upgraded ({previous.model_version} -> {predictor.model_version}); "
+                  f"rescoring every patient")
+        else:
+            print(f"✅ Loaded fingerprints for {len(previous):,} patients")
+    start = time.perf_counter()
+
+    try:
+        for chunk_index, chunk in enumerate(read_feature_chunks(input_path, encoder.feature_names, chunksize)):
+            if chunk_index < state['chunks_done']:
+                continue
+
+            X = encoder.encode_columns(chunk, len(chunk))
+            if previous is None:
+                probabilities = predictor.score_matrix(X)
+                rescored = len(chunk)
+            else:
+                keys = patient_keys(chunk['patient_id'].values)
+                fingerprints = feature_fingerprints(X, predictor.model_version)
+                unchanged, positions = previous.match(keys, fingerprints)
+
+                probabilities = np.empty((len(chunk), len(class_names)), dtype=np.float32)
+                probabilities[unchanged] = previous.probabilities[positions[unchanged]]
+                changed = ~unchanged
+                rescored = int(changed.sum())
+                if rescored:
+                    probabilities[changed] = predictor.score_matrix(X[changed])
+                state_writer.write(chunk_index, keys, fingerprints, probabilities)
+
+            scores = FeatureStore.scores_frame(chunk['patient_id'].values, probabilities, class_names,
+                                               predictor.model_version)
+
+            state['output_bytes'] = writer.write(chunk_index, scores)
+            state['chunks_done'] = chunk_index + 1
+            state['rows_done'] += len(chunk)
+            state['rescored'] += rescored
+            state['skipped'] += len(chunk) - rescored
+            save_checkpoint(checkpoint_path, state)
+
+            rows_scored += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"  Chunk {chunk_index}: {state['rows_done']:,} rows total, {rescored:,} rescored "
+                  f"({rows_scored / elapsed:,.0f} rows/s)")
+    finally:
+        writer.close()
+
+    if state_writer is not None:
+        state_writer.commit(state['chunks_done'], state['rows_done'])
+    elapsed = time.perf_counter() - start
+    os.remove(checkpoint_path)
+    return {
+        'rows': state['rows_done'],
+        'rescored': state['rescored'],
+        'skipped': state['skipped'],
+        'rows_scored_this_run': rows_scored,
+        'chunks': state['chunks_done'],
+        'resumed_from_chunk': resumed_from,
+        'seconds': elapsed,
+        'rows_per_second': rows_scored / elapsed if elapsed > 0 else 0.0,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Score a whole patient cohort offline")
+    parser.add_argument("input", help="Feature CSV, Parquet file or Parquet directory (primary_dataset schema)")
+    parser.add_argument("output", help="Output .csv file or Parquet directory")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Patients per chunk (default: %(default)s)")
+    parser.add_argument("--model-path", default=os.getenv("MODEL_PATH", DEFAULT_MODEL_PATH),
+                        help="Production model directory (default: MODEL_PATH or %(default)s)")
+    parser.add_argument("--backend", default=os.getenv("INFERENCE_BACKEND", "xgboost"),
+                        choices=RiskPredictor.INFERENCE_BACKENDS, help="Inference backend (default: %(default)s)")
+    parser.add_argument("--threads", type=int, default=None, help="XGBoost threads (default: all cores)")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--state", default=None,
+                        help="Fingerprint state directory; only patients changed since the last run are rescored")
+    args = parser.parse_args()
+
+    predictor = RiskPredictor(args.model_path, inference_backend=args.backend)
+    if args.threads:
+        predictor.set_num_threads(args.threads)
+
+    summary = score_cohort(predictor, args.input, args.output, args.chunksize, args.restart, args.state)
+    print(f"✅ Scored {summary['rows']:,} patients into {args.output} "
+          f"({summary['rows_per_second']:,.0f} rows/s, {summary['seconds']:.1f}s)")
+    print(f"   Rescored: {summary['rescored']:,}  Skipped (unchanged): {summary['skipped']:,}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Bulk upload tests: chunked parsing and parity with /predict/batch
+"""
+
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+
+os.environ.setdefault("COHORT_DATA_PATH", "")
+os.environ.setdefault("REQUEST_LOG_SAMPLE_RATE", "0")
+os.environ.setdefault("BULK_CHUNK_ROWS", "64")
+
+from fastapi.testclient import TestClient
+
+import main
+from benchmark import sample_patients
+from models.bulk_scoring import RecordChunker
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(BACKEND_DIR, "..", "ml_pipeline", "primary_dataset.csv")
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture(scope="module")
+def patients():
+    return sample_patients(DATASET_PATH, 300)
+
+def upload_pieces(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def test_record_chunker_keeps_whole_lines():
+    """Blocks split only at line ends, each CSV block carries the header, nothing is lost"""
+    data = pd.read_csv(DATASET_PATH).to_csv(index=False).encode()
+    header, body = data.split(b"\n", 1)
+    chunker = RecordChunker(chunk_rows=100, fmt="csv")
+
+    blocks = [block for piece in upload_pieces(data, 777) for block in chunker.feed(piece)]
+    blocks += list(chunker.finish())
+
+    assert chunker.header == header + b"\n"
+    assert b"".join(blocks) == body
+    assert all(block.endswith(b"\n") for block in blocks)
+    assert all(len(pd.read_csv(io.BytesIO(chunker.header + block))) >= 100 for block in blocks[:-1])
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_bulk_upload_matches_batch_predictions(client, patients, fmt):
+    """Streamed uploads score every row, in order, exactly like /predict/batch"""
+    if fmt == "csv":
+        body, content_type = pd.DataFrame(patients).to_csv(index=False).encode(), "text/csv"
+    else:
+        body, content_type = "\n".join(json.dumps(p) for p in patients).encode(), "application/x-ndjson"
+
+    response = client.post("/predict/bulk", content=upload_pieces(body), headers={"Content-Type": content_type})
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    expected = client.post("/predict/batch", json={"patients": patients}).json()["predictions"]
+
+    assert response.headers["X-Rows"] == str(len(patients))
+    assert [r["row"] for r in records] == list(range(len(patients)))
+    for record, prediction in zip(records, expected):
+        assert record["patient_id"] == prediction["patient_id"]
+        assert record["risk_level"] == prediction["risk_assessment"]["risk_level"]
+        assert record["deterioration_probability"] == pytest.approx(
+            prediction["risk_assessment"]["deterioration_probability"], abs=1e-5
+        )
+
+def test_bulk_upload_reports_invalid_rows(client):
+    """Rows missing required fields become error records; malformed files are rejected"""
+    body = (b'{"patient_id": "ok", "age": 70, "bmi": 31, "systolic_bp": 145, "diastolic_bp": 90}\n'
+            b'{"patient_id": "no-vitals", "age": 70}\n')
+    response = client.post("/predict/bulk?format=ndjson", content=body)
+    records = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["X-Row-Errors"] == "1"
+    assert records[0]["patient_id"] == "ok" and "risk_level" in records[0]
+    assert records[1] == {"row": 1, "patient_id": "no-vitals",
+                          "error": "missing required field(s): bmi, systolic_bp, diastolic_bp"}
+
+    assert client.post("/predict/bulk", content=body).status_code == 415
+    malformed = b"patient_id,age,bmi,systolic_bp,diastolic_bp\np1,old,30,140,90\n"
+    assert client.post("/predict/bulk", content=malformed, headers={"Content-Type": "text/csv"}).status_code == 400
+
+def test_bulk_upload_defaults_absent_columns(client, patients):
+    """A CSV with only the required columns scores like /predict/batch with those fields"""
+    required = ["patient_id", "age", "bmi", "systolic_bp", "diastolic_bp"]
+    minimal = [{name: p[name] for name in required} for p in patients[:50]]
+    body = pd.DataFrame(minimal).to_csv(index=False).encode()
+
+    response = client.post("/predict/bulk", content=body, headers={"Content-Type": "text/csv"})
+    records = [json.loads(line) for line in response.text.splitlines()]
+    expected = client.post("/predict/batch", json={"patients": minimal}).json()["predictions"]
+
+    assert len(records) == len(minimal)
+    # The current model does not split on these flags, so check the columns handed to it too
+    header, block = body.split(b"\n", 1)
+    columns, rows, errors = main.bulk_scorer._prepare(block, "csv", header + b"\n", 0)
+    assert not errors and len(rows) == len(minimal)
+    for name in ("has_bmi_data", "has_bp_data", "heart_rate", "glucose", "hba1c", "cholesterol"):
+        assert (columns[name] == main.PatientData.model_fields[name].default).all()
+    for record, prediction in zip(records, expected):
+        assert record["risk_level"] == prediction["risk_assessment"]["risk_level"]
+        assert record["deterioration_probability"] == pytest.approx(
+            prediction["risk_assessment"]["deterioration_probability"], abs=1e-5
+        )
+
+def test_bulk_upload_rejects_out_of_range_rows(client):
+    """Values /predict rejects with 422 become error records instead of scores"""
+    body = (b"patient_id,age,bmi,systolic_bp,diastolic_bp,heart_rate,has_diabetes\n"
+            b"ok,70,31,145,90,,1\n"
+            b"bad,500,5,900,-20,,0\n"
+            b"edge,120,30,140,90,30,0\n"
+            b"flag,70,31,145,90,80,2\n")
+    response = client.post("/predict/bulk", content=body, headers={"Content-Type": "text/csv"})
+    records = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["X-Row-Errors"] == "3"
+    assert "risk_level" in records[0]
+    assert records[1] == {"row": 1, "patient_id": "bad", "error": (
+        "out of range: age must be <= 120, bmi must be > 10, systolic_bp must be < 250, diastolic_bp must be > 40"
+    )}
+    assert records[2]["error"] == "out of range: heart_rate must be > 30"
+    assert records[3]["error"] == "out of range: has_diabetes must be <= 1"
+
+    rejected = {"patient_id": "bad", "age": 500, "bmi": 5, "systolic_bp": 900, "diastolic_bp": -20}
+    assert client.post("/predict", json=rejected).status_code == 422
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Cohort analytics tests: incremental aggregates and indexes vs a pandas recomputation
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.cohort_analytics import CONDITION_FLAGS, PATIENT_COLUMNS, PROBABILITY_BINS, RISK_LEVELS, CohortAnalytics
+from models.feature_encoder import FeatureEncoder
+
+FEATURE_NAMES = [*PATIENT_COLUMNS, *CONDITION_FLAGS, 'bmi']
+CLASSES = np.array(['high', 'low', 'medium'])
+
+class FakePredictor:
+    """Deterministic stand-in for RiskPredictor; ``shift`` changes every score"""
+
+    def __init__(self, model_version: str, shift: float = 0.0):
+        self.model_version = model_version
+        self.shift = shift
+        self.feature_encoder = FeatureEncoder(FEATURE_NAMES)
+        self.label_encoder = type('LabelEncoder', (), {'classes_': CLASSES})
+
+    def score_matrix(self, X: np.ndarray) -> np.ndarray:
+        index = self.feature_encoder.column_index
+        u = np.mod(X[:, index['bmi']] * 0.37 + X[:, index['age']] * 0.11 + self.shift, 1.0).astype(np.float64)
+        high, low = u ** 2, (1 - u) ** 2
+        return np.column_stack([high, low, 1 - high - low])
+
+    def predict(self, patient: dict) -> dict:
+        X = self.feature_encoder.encode_batch([patient])
+        probabilities = self.score_matrix(X)[0]
+        columns = dict(zip(CLASSES, probabilities))
+        return {
+            'patient_id': patient['patient_id'],
+            'risk_assessment': {
+                'risk_level': CLASSES[np.argmax(probabilities)],
+                'deterioration_probability': columns['high'] + 0.5 * columns['medium'],
+            },
+        }
+
+def make_patients(n: int, seed: int, prefix: str = "p") -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'patient_id': f"{prefix}{i}",
+            'age': int(rng.integers(18, 95)),
+            'comorbidity_count': int(rng.integers(0, 6)),
+            'medication_count': int(rng.integers(0, 12)),
+            **{flag: int(rng.random() < 0.3) for flag in CONDITION_FLAGS},
+            'bmi': round(float(rng.uniform(16, 45)), 1),
+        }
+        for i in range(n)
+    ]
+
+class Truth:
+    """Plain pandas view of what the cohort should contain: last result per patient wins"""
+
+    def __init__(self):
+        self.frame = pd.DataFrame()
+
+    def upsert(self, patients: list, predictor: FakePredictor, model_version: str):
+        rows = []
+        for patient in patients:
+            prediction = predictor.predict(patient)['risk_assessment']
+            rows.append({
+                'patient_id': patient['patient_id'],
+                'risk_level': prediction['risk_level'],
+                'deterioration_probability': np.float32(prediction['deterioration_probability']),
+                'model_version': model_version,
+                **{name: float(patient[name]) for name in PATIENT_COLUMNS},
+                **{flag: bool(patient[flag]) for flag in CONDITION_FLAGS},
+            })
+        updates = pd.DataFrame(rows).drop_duplicates('patient_id', keep='last').set_index('patient_id')
+        kept = self.frame.drop(index=updates.index, errors='ignore') if len(self.frame) else self.frame
+        self.frame = pd.concat([kept, updates]) if len(kept) else updates
+
+def assert_matches(cohort: CohortAnalytics, truth: Truth, model_version: str):
+    frame = truth.frame
+    probabilities = frame['deterioration_probability'].astype(np.float64)
+
+    summary = cohort.summary()
+    assert summary['total_patients'] == len(frame)
+    assert summary['risk_levels'] == {level: int((frame['risk_level'] == level).sum()) for level in RISK_LEVELS}
+    assert summary['average_deterioration_probability'] == pytest.approx(probabilities.mean(), rel=1e-6)
+    for level in RISK_LEVELS:
+        in_level = probabilities[frame['risk_level'] == level]
+        expected = in_level.mean() if len(in_level) else 0.0
+        assert summary['average_deterioration_probability_by_level'][level] == pytest.approx(expected, rel=1e-6)
+    bins = np.minimum((probabilities * PROBABILITY_BINS).astype(int), PROBABILITY_BINS - 1)
+    assert [b['count'] for b in summary['risk_distribution']] == np.bincount(bins, minlength=PROBABILITY_BINS).tolist()
+    assert summary['model_version'] == model_version
+    assert summary['model_versions'] == frame['model_version'].value_counts().to_dict()
+    assert summary['stale_patients'] == int((frame['model_version'] != model_version).sum())
+
+    for entry in cohort.condition_breakdown():
+        with_condition = frame[frame[entry['condition']]]
+        assert entry['patients'] == len(with_condition)
+        assert entry['risk_levels'] == {level: int((with_condition['risk_level'] == level).sum())
+                                        for level in RISK_LEVELS}
+        expected = with_condition['deterioration_probability'].astype(np.float64).mean() if len(with_condition) else 0.0
+        assert entry['average_deterioration_probability'] == pytest.approx(expected, rel=1e-6)
+
+    for risk_level in (None, *RISK_LEVELS):
+        for condition in (None, 'has_diabetes'):
+            for sort_by in ('deterioration_probability', 'age'):
+                for descending in (True, False):
+                    assert_worklist(cohort, frame, risk_level, condition, sort_by, descending)
+
+def assert_worklist(cohort, frame, risk_level, condition, sort_by, descending):
+    expected = frame
+    if risk_level is not None:
+        expected = expected[expected['risk_level'] == risk_level]
+    if condition is not None:
+        expected = expected[expected[condition]]
+    # Ties on the sort key may come back in any order, so compare keys page by page and IDs as a set
+    expected_keys = sorted(expected[sort_by].astype(np.float32), reverse=descending)
+
+    page_size = 7
+    records = []
+    for page in range(1, max(1, -(-len(expected) // page_size)) + 1):
+        result = cohort.worklist(risk_level, condition, sort_by, descending, page, page_size)
+        assert result['total'] == len(expected)
+        records.extend(result['patients'])
+    assert [np.float32(r[sort_by]) for r in records] == expected_keys
+    assert sorted(r['patient_id'] for r in records) == sorted(expected.index)
+    for record in records:
+        row = expected.loc[record['patient_id']]
+        assert record['risk_level'] == row['risk_level']
+        assert record['deterioration_probability'] == pytest.approx(row['deterioration_probability'], rel=1e-6)
+        assert record['model_version'] == row['model_version']
+        assert record['conditions'] == [flag for flag in CONDITION_FLAGS if row[flag]]
+
+def record(cohort: CohortAnalytics, patients: list, predictor: FakePredictor, model_version: str):
+    cohort.record_predictions(patients, [predictor.predict(p) for p in patients], model_version)
+
+@pytest.fixture
+def cohort_file(tmp_path):
+    patients = make_patients(80, seed=16)
+    # A patient listed twice in the file keeps its last row
+    patients.append({**patients[3], 'bmi': patients[3]['bmi'] + 7.3})
+    path = tmp_path / "cohort.csv"
+    pd.DataFrame(patients).to_csv(path, index=False)
+    return str(path), patients
+
+def test_load_matches_pandas(cohort_file):
+    """A chunked load gives the same aggregates and worklists as recomputing from scratch"""
+    path, patients = cohort_file
+    predictor, truth = FakePredictor("v1"), Truth()
+    cohort = CohortAnalytics(capacity=4)
+    cohort.load(path, predictor, "v1", chunksize=9)
+    truth.upsert(patients, predictor, "v1")
+    assert_matches(cohort, truth, "v1")
+
+def test_live_updates_match_pandas(cohort_file):
+    """Upserts, tier changes, new patients and duplicate IDs in one batch keep every view exact"""
+    path, patients = cohort_file
+    predictor, truth = FakePredictor("v1"), Truth()
+    cohort = CohortAnalytics(capacity=4)
+    cohort.load(path, predictor, "v1", chunksize=9)
+    truth.upsert(patients, predictor, "v1")
+
+    rng = np.random.default_rng(17)
+    tiers_changed = 0
+    for round_number in range(5):
+        batch = []
+        for patient in rng.choice(patients[:80], size=20, replace=False):
+            updated = {**patient, 'bmi': round(patient['bmi'] + float(rng.uniform(-6, 6)), 1),
+                       'medication_count': int(rng.integers(0, 12))}
+            tiers_changed += predictor.predict(updated)['risk_assessment']['risk_level'] != \
+                predictor.predict(patient)['risk_assessment']['risk_level']
+            batch.append(updated)
+        batch += make_patients(5, seed=100 + round_number, prefix=f"new{round_number}-")
+        # The same patient twice in one batch: the later result wins
+        batch += [batch[0], {**batch[0], 'bmi': batch[0]['bmi'] + 3.1}]
+        record(cohort, batch, predictor, "v1")
+        truth.upsert(batch, predictor, "v1")
+        assert_matches(cohort, truth, "v1")
+    assert tiers_changed > 0
+
+    # Results from another model version are ignored
+    record(cohort, make_patients(5, seed=99, prefix="other-"), FakePredictor("v0", 0.3), "v0")
+    assert_matches(cohort, truth, "v1")
+
+def test_refresh_rescores_with_new_version(cohort_file):
+    """A refresh rescores the source file; live-only patients keep the old scores and count as stale"""
+    path, patients = cohort_file
+    v1, v2 = FakePredictor("v1"), FakePredictor("v2", shift=0.41)
+    truth = Truth()
+    cohort = CohortAnalytics(capacity=4)
+    cohort.load(path, v1, "v1", chunksize=9)
+    truth.upsert(patients, v1, "v1")
+    live_only = make_patients(6, seed=5, prefix="live-")
+    record(cohort, live_only, v1, "v1")
+    truth.upsert(live_only, v1, "v1")
+
+    cohort.refresh(v2, "v2", chunksize=9)
+    truth.upsert(patients, v2, "v2")
+    assert_matches(cohort, truth, "v2")
+    assert cohort.stats()['stale_patients'] == len(live_only)
+    assert cohort.stats()['refreshes'] == 1
+
+    # After the swap only the new version's results are taken, and they clear staleness
+    record(cohort, live_only[:2], v1, "v1")
+    record(cohort, live_only[2:], v2, "v2")
+    truth.upsert(live_only[2:], v2, "v2")
+    assert_matches(cohort, truth, "v2")
+    assert cohort.stats()['stale_patients'] == 2
+
+    # Live updates after a refresh go back to incremental index maintenance
+    batch = [{**p, 'bmi': p['bmi'] + 2.2} for p in patients[10:30]]
+    record(cohort, batch, v2, "v2")
+    truth.upsert(batch, v2, "v2")
+    assert_matches(cohort, truth, "v2")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Parity test: precompiled float32 encoder vs the previous pandas feature path
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.feature_encoder import FeatureEncoder
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "ml_pipeline", "production_models")
+
+with open(os.path.join(MODEL_PATH, "feature_metadata.json")) as f:
+    FEATURE_NAMES = json.load(f)['feature_names']
+
+def pandas_prepare_features(patient_data: dict) -> np.ndarray:
+    """RiskPredictor._prepare_features before the encoder (the scaler was never applied)"""
+    df = pd.DataFrame([patient_data])
+    for feature in FEATURE_NAMES:
+        if feature not in df.columns:
+            default_values = {
+                'age': 50,
+                'gender_male': 0,
+                'bmi': 25.0,
+                'systolic_bp': 120.0,
+                'diastolic_bp': 80.0,
+                'heart_rate': 70.0,
+                'glucose': 100.0,
+                'hba1c': 6.0,
+                'cholesterol': 200.0
+            }
+            df[feature] = default_values.get(feature, 0)
+    # None becomes NaN when the model converts the object array to floats
+    return df[FEATURE_NAMES].values.astype(np.float64).astype(np.float32)
+
+def random_patients(n: int, seed: int = 7) -> list:
+    """Patients mixing supplied, omitted, None/NaN and out-of-range values"""
+    rng = np.random.default_rng(seed)
+    extremes = [-1.0, 0.0, 0.5, 999.0, 1e6, -1e6, 3.4e38]
+    patients = []
+    for i in range(n):
+        patient = {'patient_id': f"p{i}"}
+        for name in FEATURE_NAMES:
+            draw = rng.random()
+            if draw < 0.25:
+                continue
+            elif draw < 0.35:
+                patient[name] = None
+            elif draw < 0.4:
+                patient[name] = float("nan")
+            elif draw < 0.5:
+                patient[name] = float(rng.choice(extremes))
+            elif draw < 0.75:
+                patient[name] = int(rng.integers(0, 200))
+            else:
+                patient[name] = float(rng.normal(100, 50))
+        patients.append(patient)
+    return patients
+
+@pytest.fixture(scope="module")
+def encoder():
+    return FeatureEncoder(FEATURE_NAMES)
+
+@pytest.mark.parametrize("patient", [
+    {},
+    {'patient_id': "defaults-only"},
+    {name: None for name in FEATURE_NAMES},
+    {'age': 150, 'bmi': 0.0, 'systolic_bp': -20, 'diastolic_bp': 1e9, 'glucose': float("nan")},
+], ids=["empty", "id-only", "all-none", "out-of-range"])
+def test_encode_matches_pandas_path(encoder, patient):
+    """Defaults, None/NaN and out-of-range values encode exactly as before"""
+    np.testing.assert_array_equal(encoder.encode(patient), pandas_prepare_features(patient))
+
+def test_encode_batch_matches_pandas_path(encoder):
+    """Every row of a randomized batch matches the per-patient pandas encoding"""
+    patients = random_patients(500)
+    expected = np.vstack([pandas_prepare_features(p) for p in patients])
+
+    np.testing.assert_array_equal(encoder.encode_batch(patients), expected)
+    for patient, row in zip(patients[:50], expected):
+        np.testing.assert_array_equal(encoder.encode(patient)[0], row)
+
+def test_encode_columns_matches_pandas_path(encoder):
+    """Column-oriented input, with some features absent, matches the dict path"""
+    patients = random_patients(500, seed=11)
+    omitted = set(FEATURE_NAMES[::4])
+    patients = [{k: v for k, v in p.items() if k not in omitted} for p in patients]
+    # Within a column, a patient that leaves the feature out gets NaN from the
+    # DataFrame, so give every patient the column for a like-for-like comparison
+    present = [name for name in FEATURE_NAMES if name not in omitted]
+    for patient in patients:
+        for name in present:
+            patient.setdefault(name, None)
+    frame = pd.DataFrame(patients)
+    expected = np.vstack([pandas_prepare_features(p) for p in patients])
+
+    np.testing.assert_array_equal(encoder.encode_columns(frame, len(frame)), expected)
+    columns = {name: frame[name].to_numpy() for name in present}
+    np.testing.assert_array_equal(encoder.encode_columns(columns, len(frame)), expected)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Feature store tests: Parquet round trips, schema pinning, partition filters and score history
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.feature_store import SCHEMA_FILE, FeatureStore, patient_buckets
+
+FEATURE_NAMES = ['age', 'bmi', 'systolic_bp', 'has_diabetes', 'comorbidity_count']
+NUM_BUCKETS = 4
+
+def make_features(n: int = 300, seed: int = 13) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Columns deliberately out of model order and in other dtypes than the store's float32
+    return pd.DataFrame({
+        'comorbidity_count': rng.integers(0, 6, n),
+        'patient_id': [f"p{i:04d}" for i in range(n)],
+        'bmi': rng.uniform(16, 45, n),
+        'has_diabetes': rng.integers(0, 2, n),
+        'age': rng.integers(18, 95, n),
+        'systolic_bp': rng.uniform(95, 190, n),
+        'risk_level': rng.choice(['low', 'medium', 'high'], n),
+        'unrelated': 'ignored',
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(str(tmp_path / "store"), FEATURE_NAMES, num_buckets=NUM_BUCKETS)
+
+def by_patient(patient_ids: np.ndarray, X: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame(X, columns=FEATURE_NAMES, index=pd.Index(patient_ids, name='patient_id')).sort_index()
+
+def test_write_then_load_matrix_round_trip(store):
+    """load_matrix returns float32 features in model column order for every patient written"""
+    features = make_features()
+    assert store.write_features(features) == len(features)
+
+    patient_ids, X = store.load_matrix()
+    assert X.dtype == np.float32 and X.flags['C_CONTIGUOUS']
+    assert X.shape == (len(features), len(FEATURE_NAMES))
+    expected = features.set_index('patient_id')[FEATURE_NAMES].astype(np.float32).sort_index()
+    pd.testing.assert_frame_equal(by_patient(patient_ids, X), expected)
+
+    loaded = store.load_features()
+    assert 'unrelated' not in loaded.columns and 'bucket' not in loaded.columns
+    assert set(loaded['risk_level']) == set(features['risk_level'])
+
+def test_overwrite_and_append(store):
+    """write_features replaces the features by default and appends with overwrite=False"""
+    store.write_features(make_features(100))
+    store.write_features(make_features(40, seed=1))
+    assert len(store.load_matrix()[0]) == 40
+    more = make_features(10, seed=2).assign(patient_id=[f"extra{i}" for i in range(10)])
+    store.write_features(more, overwrite=False)
+    assert len(store.load_matrix()[0]) == 50
+    assert store.stats()['features']['rows'] == 50
+
+def test_schema_mismatch_rejected(store):
+    """Reopening a store with another feature list (or order) fails; the same list keeps the buckets"""
+    store.write_features(make_features(20))
+    with pytest.raises(ValueError):
+        FeatureStore(store.root, list(reversed(FEATURE_NAMES)))
+    with pytest.raises(ValueError):
+        FeatureStore(store.root, FEATURE_NAMES + ['cholesterol'])
+
+    reopened = FeatureStore(store.root, FEATURE_NAMES, num_buckets=64)
+    assert reopened.num_buckets == NUM_BUCKETS
+    assert os.path.exists(os.path.join(store.root, SCHEMA_FILE))
+
+def test_write_requires_every_feature(store):
+    """A frame missing a model feature is refused rather than written with gaps"""
+    with pytest.raises(ValueError):
+        store.write_features(make_features(10).drop(columns=['bmi']))
+
+def test_partition_and_feature_filters(store):
+    """Bucket filters return exactly that partition's patients; feature filters apply per row"""
+    features = make_features()
+    store.write_features(features)
+    buckets = patient_buckets(features['patient_id'], NUM_BUCKETS)
+
+    for bucket in range(NUM_BUCKETS):
+        patient_ids, X = store.load_matrix(filters=[('bucket', '==', bucket)])
+        assert sorted(patient_ids) == sorted(features['patient_id'][buckets == bucket])
+
+    patient_ids, X = store.load_matrix(filters=[('has_diabetes', '==', 1), ('age', '>=', 65)])
+    expected = features[(features['has_diabetes'] == 1) & (features['age'] >= 65)]
+    assert len(expected) > 0
+    assert sorted(patient_ids) == sorted(expected['patient_id'])
+    assert (X[:, FEATURE_NAMES.index('age')] >= 65).all()
+
+def scores_for(patient_ids, probability: float, model_version: str, scored_at: str) -> pd.DataFrame:
+    n = len(patient_ids)
+    return pd.DataFrame({
+        'patient_id': patient_ids,
+        'model_version': model_version,
+        'risk_level': 'high' if probability >= 0.5 else 'low',
+        'deterioration_probability': np.full(n, probability),
+        'high_risk': np.full(n, probability),
+        'medium_risk': np.zeros(n),
+        'low_risk': np.full(n, 1 - probability),
+        'scored_at': pd.Timestamp(scored_at, tz='UTC'),
+    })
+
+def test_append_scores_then_latest_only(store):
+    """Every run is kept; latest_only returns each patient's most recent score"""
+    ids = [f"p{i:04d}" for i in range(30)]
+    store.append_scores(scores_for(ids, 0.2, "v1", "2026-01-01"))
+    # A later run for some patients, appended before an even later run for fewer
+    store.append_scores(scores_for(ids[10:], 0.6, "v2", "2026-02-01"))
+    store.append_scores(scores_for(ids[25:], 0.9, "v3", "2026-03-01"))
+    # Appended last but scored earliest: must not win
+    store.append_scores(scores_for(ids[:5], 0.4, "v0", "2025-12-01"))
+
+    assert len(store.load_scores()) == 30 + 20 + 5 + 5
+    latest = store.load_scores(latest_only=True).set_index('patient_id').sort_index()
+    assert list(latest.index) == ids
+    expected_versions = ["v1"] * 10 + ["v2"] * 15 + ["v3"] * 5
+    assert list(latest['model_version']) == expected_versions
+    assert latest['deterioration_probability'].dtype == np.float32
+
+    high = store.load_scores(filters=[('model_version', '==', 'v3')])
+    assert sorted(high['patient_id']) == ids[25:]
+
+def test_scores_default_scored_at(store):
+    """append_scores stamps runs without scored_at"""
+    scores = scores_for(["a", "b"], 0.3, "v1", "2026-01-01").drop(columns=['scored_at'])
+    store.append_scores(scores)
+    loaded = store.load_scores()
+    assert loaded['scored_at'].notna().all()
+
+def test_empty_store_loads_empty(store):
+    """Reading sections that were never written gives empty results, not errors"""
+    patient_ids, X = store.load_matrix()
+    assert len(patient_ids) == 0 and X.shape == (0, len(FEATURE_NAMES))
+    assert store.load_scores(latest_only=True).empty
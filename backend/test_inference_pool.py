@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Inference concurrency tests: queue back-pressure and micro-batch formation
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("COHORT_DATA_PATH", "")
+os.environ.setdefault("REQUEST_LOG_SAMPLE_RATE", "0")
+
+from fastapi.testclient import TestClient
+
+import main
+import models.inference_pool as inference_pool_module
+from models.inference_pool import InferencePool, QueueFullError
+from models.micro_batcher import MicroBatcher
+
+PATIENT = {"patient_id": "p1", "age": 70, "bmi": 31.0, "systolic_bp": 145.0, "diastolic_bp": 90.0}
+
+def test_pool_rejects_beyond_workers_plus_queue(monkeypatch):
+    """With every worker busy and the queue full, the next call fails fast with QueueFullError"""
+    release = threading.Event()
+    started = []
+
+    def blocking_call(method_name, payload, options, model_version, follow_active, submitted_at):
+        started.append(payload)
+        release.wait(10)
+        return payload, "v1", 0.0, 0.0, {}
+
+    monkeypatch.setattr(inference_pool_module, "_run_predictor_method", blocking_call)
+    pool = InferencePool(max_workers=1, max_queue_depth=2)
+
+    async def scenario():
+        calls = [asyncio.create_task(pool.run("predict_risk", i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert pool.in_flight == 3 and pool.queue_depth == 2
+
+        with pytest.raises(QueueFullError):
+            await pool.run("predict_risk", 3)
+        assert pool.rejected == 1
+
+        release.set()
+        results = await asyncio.gather(*calls)
+        assert [result for result, _ in results] == [0, 1, 2]
+        assert pool.in_flight == 0
+        # Capacity is back once the backlog drains
+        assert (await pool.run("predict_risk", 4))[0] == 4
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_predict_returns_503_when_pool_is_full():
+    """A saturated pool turns /predict and /predict/batch into 503 with Retry-After instead of queueing"""
+    with TestClient(main.app) as client:
+        pool = main.inference_pool
+        # Let warm-up finish so its own calls are not rejected below
+        deadline = time.monotonic() + 60
+        while client.get("/health/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert client.post("/predict", json=PATIENT).status_code == 200
+
+        rejected_before = pool.rejected
+        pool.in_flight += pool.max_workers + pool.max_queue_depth
+        try:
+            response = client.post("/predict", json=PATIENT)
+            batch_response = client.post("/predict/batch", json={"patients": [PATIENT]})
+        finally:
+            pool.in_flight -= pool.max_workers + pool.max_queue_depth
+
+        assert response.status_code == 503 and batch_response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert pool.rejected == rejected_before + 2
+        assert client.post("/predict", json=PATIENT).status_code == 200
+
+class RecordingPool:
+    """Inference pool stand-in that records each batch and echoes patients back"""
+
+    max_workers = 1
+    max_queue_depth = 0
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def run(self, method_name, patients, **options):
+        assert method_name == "predict_risk_batch"
+        self.batches.append([p["patient_id"] for p in patients])
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise RuntimeError("model failed")
+        predictions = [{"patient_id": p["patient_id"], "position": i} for i, p in enumerate(patients)]
+        return predictions, {"queue_wait_ms": 0.5, "compute_ms": 2.0, "stages_ms": {}, "model_version": "v1"}
+
+def test_concurrent_requests_share_batches_in_order():
+    """Concurrent submits are scored together in bounded batches, each caller getting its own result"""
+    pool = RecordingPool()
+
+    async def scenario():
+        batcher = MicroBatcher(pool, max_batch_size=4, max_wait_ms=50, max_pending=16)
+        batcher.start()
+        try:
+            submits = asyncio.gather(*(batcher.submit({"patient_id": f"p{i}"}) for i in range(10)))
+            return await asyncio.wait_for(submits, timeout=5), batcher
+        finally:
+            await batcher.stop()
+
+    results, batcher = asyncio.run(scenario())
+    assert pool.batches == [["p0", "p1", "p2", "p3"], ["p4", "p5", "p6", "p7"], ["p8", "p9"]]
+    assert [prediction["patient_id"] for prediction, _ in results] == [f"p{i}" for i in range(10)]
+    assert [prediction["position"] for prediction, _ in results] == [0, 1, 2, 3, 0, 1, 2, 3, 0, 1]
+    assert [timing["batch_size"] for _, timing in results] == [4] * 8 + [2] * 2
+    assert all(timing["queue_wait_ms"] >= 0.5 and timing["model_version"] == "v1" for _, timing in results)
+    assert batcher.batches_dispatched == 3
+
+def test_lone_request_dispatched_after_max_wait():
+    """A request with no company is still scored once max_wait_ms passes"""
+    pool = RecordingPool()
+
+    async def scenario():
+        batcher = MicroBatcher(pool, max_batch_size=32, max_wait_ms=5)
+        batcher.start()
+        try:
+            return await asyncio.wait_for(batcher.submit({"patient_id": "alone"}), timeout=5)
+        finally:
+            await batcher.stop()
+
+    prediction, timing = asyncio.run(scenario())
+    assert prediction["patient_id"] == "alone" and timing["batch_size"] == 1
+    assert pool.batches == [["alone"]]
+
+def test_batch_failure_reaches_every_caller():
+    """An error scoring a batch is raised to every request in it"""
+    pool = RecordingPool(fail=True)
+
+    async def scenario():
+        batcher = MicroBatcher(pool, max_batch_size=4, max_wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit({"patient_id": f"p{i}"}) for i in range(3)),
+                                        return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3 and all(isinstance(r, RuntimeError) for r in results)
+
+def test_full_micro_batch_queue_rejects():
+    """Beyond max_pending waiting requests, submit fails fast with QueueFullError"""
+    pool = RecordingPool()
+
+    async def scenario():
+        batcher = MicroBatcher(pool, max_batch_size=4, max_wait_ms=20, max_pending=2)
+        batcher.start()
+        await asyncio.sleep(0)
+        try:
+            return await asyncio.gather(*(batcher.submit({"patient_id": f"p{i}"}) for i in range(3)),
+                                        return_exceptions=True), batcher
+        finally:
+            await batcher.stop()
+
+    results, batcher = asyncio.run(scenario())
+    assert [type(r) for r in results[:2]] == [tuple, tuple]
+    assert isinstance(results[2], QueueFullError)
+    assert batcher.requests_rejected == 1
+
+def test_stop_while_batch_is_forming():
+    """stop() returns promptly even when it lands while the collector is gathering a batch"""
+    pool = RecordingPool()
+
+    async def scenario():
+        batcher = MicroBatcher(pool, max_batch_size=4, max_wait_ms=50)
+        batcher.start()
+        with pytest.raises(QueueFullError):
+            await asyncio.gather(*(batcher.submit({"patient_id": f"p{i}"}) for i in range(10)))
+
+        started = time.monotonic()
+        await asyncio.wait_for(batcher.stop(), timeout=5)
+        assert batcher._collector.done()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1.0
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Model registry tests: hot reload, atomic swap and the ACTIVE file
+"""
+
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("COHORT_DATA_PATH", "")
+
+import main
+import models.model_registry as model_registry_module
+from models.model_registry import ACTIVE_FILE, ModelRegistry
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BACKEND_DIR, "..", "ml_pipeline", "production_models")
+PATIENT = {"patient_id": "registry-test", "age": 72, "bmi": 31.0, "systolic_bp": 150.0, "diastolic_bp": 92.0}
+
+@pytest.fixture
+def root(tmp_path):
+    """Registry root with two versions sharing the production artifacts"""
+    for name in ("v1", "v2"):
+        os.symlink(os.path.abspath(MODEL_DIR), tmp_path / name)
+    return str(tmp_path)
+
+def make_registry(root: str, **kwargs) -> ModelRegistry:
+    return ModelRegistry(root=root, warmup_batch_sizes=[1], **kwargs)
+
+def write_active(root: str, name: str):
+    with open(os.path.join(root, ACTIVE_FILE), "w") as f:
+        f.write(name + "\n")
+
+def test_swap_keeps_in_flight_predictor_until_released(root):
+    """Activating a new version while a request holds the old one leaves it usable until the request ends"""
+    registry = make_registry(root, initial_version="v1")
+    assert registry.active_version == "v1"
+
+    with registry.use() as old_predictor:
+        registry.activate("v2", warm_up=False)
+        assert registry.active_version == "v2"
+        assert registry.stats()["loaded"]["v1"]["retired"] is True
+        assert registry.stats()["loaded"]["v1"]["in_flight"] == 1
+        # The retired version still answers for the request that holds it
+        assert old_predictor.predict_risk(PATIENT)["risk_assessment"]["risk_level"] in ("low", "medium", "high")
+        with registry.use() as new_predictor:
+            assert new_predictor is not old_predictor
+        with pytest.raises(KeyError):
+            registry.get("v1")
+
+    assert "v1" not in registry.stats()["loaded"]
+    assert registry.loaded_versions() == ["v2"]
+    assert registry.swaps == 2
+
+def test_keep_previous_allows_rollback(root):
+    """With keep_previous the replaced version stays loaded and reactivates without a reload"""
+    registry = make_registry(root, initial_version="v1", keep_previous=1)
+    v1 = registry.active()
+    registry.activate("v2", warm_up=False)
+    assert registry.get("v1") is v1
+    assert registry.activate("v1", warm_up=False) is v1
+    assert sorted(registry.loaded_versions()) == ["v1", "v2"]
+
+def test_unloading_active_version_is_refused(root):
+    """The active version cannot be unloaded; others can, and unknown ones raise KeyError"""
+    registry = make_registry(root, initial_version="v1", keep_previous=1)
+    assert registry.active_version == "v1"
+    registry.activate("v2", warm_up=False)
+    with pytest.raises(ValueError):
+        registry.unload("v2")
+    registry.unload("v1")
+    assert registry.loaded_versions() == ["v2"]
+    with pytest.raises(KeyError):
+        registry.unload("v3")
+
+def test_active_file_selects_version(root):
+    """The ACTIVE file wins over the initial and latest versions; unknown names are ignored"""
+    registry = make_registry(root, initial_version="v1")
+    assert registry.desired_version() == "v1"
+    write_active(root, "v2")
+    assert registry.desired_version() == "v2"
+    assert registry.active_version == "v2"
+    write_active(root, "v9")
+    assert registry.desired_version() == "v1"
+    os.remove(os.path.join(root, ACTIVE_FILE))
+    assert make_registry(root).desired_version() == "v2"
+
+def test_poll_activates_version_named_in_active_file(root, monkeypatch):
+    """The background poll swaps to whatever the ACTIVE file names"""
+    registry = make_registry(root)
+    write_active(root, "v1")
+    assert registry.active_version == "v1"
+    monkeypatch.setattr(model_registry_module, "model_registry", registry)
+    monkeypatch.setattr(main, "MODEL_REGISTRY_POLL_SECONDS", 0.01)
+
+    async def follow():
+        task = asyncio.get_running_loop().create_task(main._follow_registry())
+        try:
+            await asyncio.sleep(0.05)
+            assert registry.active_version == "v1"
+            write_active(root, "v2")
+            for _ in range(500):
+                if registry.active_version == "v2":
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+    asyncio.run(follow())
+    assert registry.active_version == "v2"
+    assert registry.loaded_versions() == ["v2"]
+
+def test_thread_limit_applies_to_every_loaded_version(root):
+    """num_threads reaches versions loaded after startup too, not just the first active one"""
+    registry = make_registry(root, initial_version="v1", keep_previous=1, num_threads=2)
+    assert registry.active_version == "v1"
+    registry.activate("v2", warm_up=False)
+    for name in ("v1", "v2"):
+        predictor = registry.get(name)
+        predictor.predict_risk(PATIENT)
+        assert predictor.model.get_params()["n_jobs"] == 2
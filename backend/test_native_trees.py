@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Parity test: native tree evaluator vs the pickled XGBoost model
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from models.risk_predictor import RiskPredictor
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "ml_pipeline", "production_models")
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "ml_pipeline", "primary_dataset.csv")
+
+def _load_feature_matrix() -> np.ndarray:
+    with open(os.path.join(MODEL_PATH, "feature_metadata.json")) as f:
+        feature_names = json.load(f)['feature_names']
+    return pd.read_csv(DATASET_PATH)[feature_names].values.astype(np.float32)
+
+def test_native_backend_matches_xgboost():
+    """Probabilities agree to float32 precision on the full training population"""
+    predictor = RiskPredictor(MODEL_PATH, inference_backend="native")
+    X = _load_feature_matrix()
+
+    expected = predictor.model.predict_proba(X)
+    actual = predictor.compiled_model.predict_proba(X)
+
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+    assert (actual.argmax(axis=1) == expected.argmax(axis=1)).all()
+
+def test_native_backend_handles_missing_values():
+    """NaN features follow each split's default direction like XGBoost"""
+    predictor = RiskPredictor(MODEL_PATH, inference_backend="native")
+    X = _load_feature_matrix()
+    X[np.random.default_rng(42).random(X.shape) < 0.2] = np.nan
+
+    expected = predictor.model.predict_proba(X)
+    actual = predictor.compiled_model.predict_proba(X)
+
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+
+def test_native_backend_single_row_prediction():
+    """The full predict_risk output is the same whichever backend is selected"""
+    xgboost_predictor = RiskPredictor(MODEL_PATH)
+    native_predictor = RiskPredictor(MODEL_PATH, inference_backend="native")
+    patient = {"age": 72, "bmi": 31.5, "systolic_bp": 150, "diastolic_bp": 92,
+               "has_diabetes": 1, "comorbidity_count": 3, "medication_count": 8}
+
+    expected = xgboost_predictor.predict_risk(patient)
+    actual = native_predictor.predict_risk(patient)
+
+    assert actual['risk_assessment']['risk_level'] == expected['risk_assessment']['risk_level']
+    assert actual['recommendations'] == expected['recommendations']
+    for key, value in expected['class_probabilities'].items():
+        assert abs(actual['class_probabilities'][key] - value) < 1e-6
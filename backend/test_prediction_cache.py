@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Prediction cache tests: TTL expiry, LRU eviction and model-version keying
+"""
+
+import numpy as np
+import pytest
+
+import models.prediction_cache as prediction_cache_module
+from models.prediction_cache import PredictionCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prediction_cache_module.time, "monotonic", clock.monotonic)
+    return clock
+
+def row(value: float) -> np.ndarray:
+    return np.array([value, 1.0, 2.0], dtype=np.float32)
+
+def bound_cache(**kwargs) -> PredictionCache:
+    cache = PredictionCache(**kwargs)
+    cache.bind_model_version("v1")
+    return cache
+
+def test_entries_expire_after_ttl(clock):
+    """An entry is served until its TTL passes, then counts as an expiration and a miss"""
+    cache = bound_cache(ttl_seconds=10.0)
+    key = cache.key(row(1))
+    cache.put(key, "cached")
+
+    clock.now += 9.999
+    assert cache.get(key) == "cached"
+    clock.now += 0.002
+    assert cache.get(key) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 1, 1)
+
+def test_no_ttl_keeps_entries(clock):
+    """ttl_seconds=None never expires entries"""
+    cache = bound_cache(ttl_seconds=None)
+    key = cache.key(row(1))
+    cache.put(key, "cached")
+    clock.now += 10 ** 9
+    assert cache.get(key) == "cached"
+
+def test_least_recently_used_is_evicted(clock):
+    """Beyond max_size the least recently used entry goes; a get counts as a use"""
+    cache = bound_cache(max_size=3)
+    keys = [cache.key(row(i)) for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, i)
+    assert cache.get(keys[0]) == 0
+
+    cache.put(keys[3], 3)
+    assert len(cache) == 3 and cache.evictions == 1
+    assert cache.get(keys[1]) is None
+    assert [cache.get(keys[i]) for i in (0, 2, 3)] == [0, 2, 3]
+
+    # Re-putting an existing key refreshes it rather than growing the cache
+    cache.put(keys[0], "again")
+    cache.put(cache.key(row(5)), 5)
+    assert cache.get(keys[0]) == "again" and cache.get(keys[2]) is None
+
+def test_keys_change_with_model_version():
+    """Binding another model version clears the cache and changes every key, so no stale hit is possible"""
+    cache = bound_cache()
+    features = row(1)
+    old_key = cache.key(features)
+    cache.put(old_key, "v1 prediction")
+
+    cache.bind_model_version("v2")
+    new_key = cache.key(features)
+    assert new_key != old_key
+    assert len(cache) == 0 and cache.invalidations == 1
+    assert cache.get(new_key) is None
+
+    # Even an entry written under the old key after the swap (a late writer) is never found
+    cache.put(old_key, "v1 prediction")
+    assert cache.get(cache.key(features)) is None
+
+    # Re-binding the same version keeps entries
+    cache.put(new_key, "v2 prediction")
+    cache.bind_model_version("v2")
+    assert cache.get(new_key) == "v2 prediction"
+
+def test_keys_distinguish_rows_and_variants():
+    """Identical float32 rows share a key; any other bit pattern or variant does not"""
+    cache = bound_cache()
+    assert cache.key(row(1)) == cache.key(np.array([1.0, 1.0, 2.0], dtype=np.float32))
+    assert cache.key(row(1)) != cache.key(row(np.nextafter(np.float32(1), np.float32(2))))
+    assert cache.key(row(1)) != cache.key(row(1), variant="explain")
+
+def test_from_env(monkeypatch):
+    """PREDICTION_CACHE_SIZE=0 disables the cache and PREDICTION_CACHE_TTL=0 means no expiry"""
+    monkeypatch.setenv("PREDICTION_CACHE_SIZE", "0")
+    assert PredictionCache.from_env() is None
+    monkeypatch.setenv("PREDICTION_CACHE_SIZE", "5")
+    monkeypatch.setenv("PREDICTION_CACHE_TTL", "0")
+    cache = PredictionCache.from_env()
+    assert cache.max_size == 5 and cache.ttl_seconds is None
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Parity test: declarative recommendation rules vs the previous if-chain
+"""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from models.recommendations import VECTORIZE_MIN_BATCH, RecommendationEngine, risk_tiers
+
+def if_chain_recommendations(patient_data: dict, risk_prob: float, risk_level: str) -> list:
+    """RiskPredictor._generate_recommendations before the rule table"""
+    recommendations = []
+    if risk_level == "high" or risk_prob >= 0.7:
+        recommendations.extend([
+            {"category": "IMMEDIATE_ACTION", "recommendation": "Schedule immediate clinical review within 24 hours",
+             "priority": "CRITICAL", "rationale": "High risk of deterioration detected"},
+            {"category": "CARE_COORDINATION", "recommendation": "Contact patient to assess current status",
+             "priority": "HIGH", "rationale": "Proactive monitoring required"},
+            {"category": "MEDICATION_REVIEW", "recommendation": "Review all medications for optimization",
+             "priority": "HIGH", "rationale": "Medication adjustment may reduce risk"},
+        ])
+    elif risk_level == "medium" or risk_prob >= 0.3:
+        recommendations.extend([
+            {"category": "FOLLOW_UP", "recommendation": "Schedule follow-up appointment within 2 weeks",
+             "priority": "MEDIUM", "rationale": "Moderate risk requires monitoring"},
+            {"category": "CARE_PLAN_REVIEW", "recommendation": "Review care plan and medication adherence",
+             "priority": "MEDIUM", "rationale": "Optimization may prevent deterioration"},
+        ])
+    else:
+        recommendations.append(
+            {"category": "ROUTINE_CARE", "recommendation": "Continue current care plan with routine monitoring",
+             "priority": "LOW", "rationale": "Low risk allows standard care approach"}
+        )
+
+    bmi = patient_data.get('bmi', 25)
+    if bmi > 30:
+        recommendations.append({"category": "LIFESTYLE", "recommendation": "Refer to weight management program",
+                                "priority": "MEDIUM", "rationale": f"BMI {bmi:.1f} indicates obesity risk"})
+    systolic_bp = patient_data.get('systolic_bp', 120)
+    if systolic_bp > 140:
+        recommendations.append({"category": "BLOOD_PRESSURE", "recommendation": "Optimize blood pressure management",
+                                "priority": "HIGH", "rationale": f"Systolic BP {systolic_bp:.0f} above target"})
+    hba1c = patient_data.get('hba1c', 6.0)
+    if hba1c > 8.0:
+        recommendations.append({"category": "DIABETES_MANAGEMENT", "recommendation": "Intensify diabetes management",
+                                "priority": "HIGH", "rationale": f"HbA1c {hba1c:.1f}% indicates poor glucose control"})
+    has_diabetes = patient_data.get('has_diabetes', 0)
+    if has_diabetes == 1:
+        recommendations.append({"category": "DIABETES_MONITORING", "recommendation": "Monitor glucose levels closely",
+                                "priority": "MEDIUM", "rationale": "Diabetes requires ongoing management"})
+    comorbidity_count = patient_data.get('comorbidity_count', 0)
+    if comorbidity_count >= 3:
+        recommendations.append({"category": "CARE_COORDINATION", "recommendation": "Coordinate multi-specialty care",
+                                "priority": "HIGH", "rationale": f"{comorbidity_count} comorbidities require coordination"})
+    return recommendations
+
+# Values on, just inside and just outside every threshold; None means the key is left out
+BOUNDARY_VALUES = {
+    'bmi': [None, 30, 30.0, 30.04, 30.05, 29.99, np.nextafter(30, 31), 45.25, 12],
+    'systolic_bp': [None, 140, 140.0, 140.4, 140.5, 141, 139.99, 200],
+    'hba1c': [None, 8, 8.0, 8.04, 8.05, 8.1, 7.99, 14.0],
+    'has_diabetes': [None, 0, 1, 1.0, True, False, 2],
+    'comorbidity_count': [None, 0, 2, 3, 3.0, 4, 8],
+}
+RISK_INPUTS = [('high', 0.1), ('medium', 0.1), ('low', 0.29999), ('low', 0.3), ('low', 0.69999),
+               ('low', 0.7), ('medium', 0.95), ('low', 0.0)]
+
+def boundary_patients():
+    patients = []
+    for combination in itertools.product(*BOUNDARY_VALUES.values()):
+        patients.append({name: value for name, value in zip(BOUNDARY_VALUES, combination) if value is not None})
+    return patients
+
+def random_patients(n: int, seed: int = 18):
+    rng = random.Random(seed)
+    patients = []
+    for _ in range(n):
+        patient = {}
+        if rng.random() < 0.9:
+            patient['bmi'] = round(rng.uniform(15, 50), rng.choice([0, 1, 2, 3]))
+        if rng.random() < 0.9:
+            patient['systolic_bp'] = rng.choice([rng.randint(90, 200), round(rng.uniform(90, 200), 2)])
+        if rng.random() < 0.9:
+            patient['hba1c'] = round(rng.uniform(4, 14), rng.choice([1, 2]))
+        if rng.random() < 0.9:
+            patient['has_diabetes'] = rng.randint(0, 1)
+        if rng.random() < 0.9:
+            patient['comorbidity_count'] = rng.randint(0, 8)
+        patients.append(patient)
+    return patients
+
+def generate(engine, patients, risk_inputs):
+    levels = np.array([level for level, _ in risk_inputs])
+    probabilities = np.array([probability for _, probability in risk_inputs])
+    return engine.generate(patients, risk_tiers(levels, probabilities))
+
+@pytest.mark.parametrize("patients", [boundary_patients(), random_patients(5000)], ids=["boundary", "random"])
+def test_rules_match_if_chain(patients):
+    """Batched and single-patient evaluation give exactly the old if-chain's output"""
+    engine = RecommendationEngine()
+    risk_inputs = [RISK_INPUTS[i % len(RISK_INPUTS)] for i in range(len(patients))]
+    expected = [if_chain_recommendations(p, prob, level) for p, (level, prob) in zip(patients, risk_inputs)]
+
+    assert len(patients) >= VECTORIZE_MIN_BATCH
+    assert generate(engine, patients, risk_inputs) == expected
+    for i in range(0, len(patients), 7):
+        assert generate(engine, patients[i:i + 1], risk_inputs[i:i + 1]) == expected[i:i + 1]
+        # Small batches take the scalar path
+        assert generate(engine, patients[i:i + 3], risk_inputs[i:i + 3]) == expected[i:i + 3]
+
+def test_intern_cache_is_bounded():
+    """Distinct templated rationales don't accumulate without limit"""
+    engine = RecommendationEngine(intern_cache_size=64)
+    patients = [{'bmi': 30.1 + i / 10} for i in range(1000)]
+    recommendations = generate(engine, patients, [('low', 0.0)] * len(patients))
+
+    assert engine._interned.cache_info().currsize == 64
+    assert [r[-1]['rationale'] for r in recommendations] == [f"BMI {p['bmi']:.1f} indicates obesity risk" for p in patients]
+    again = generate(engine, patients[-1:], [('low', 0.0)])
+    assert again[0][-1] is recommendations[-1][-1]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Offline cohort scoring tests: checkpoint/resume and incremental score state
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.feature_encoder import FeatureEncoder
+from models.score_state import ScoreState
+from score_cohort import CHECKPOINT_SUFFIX, score_cohort
+
+FEATURE_NAMES = ['age', 'bmi', 'systolic_bp', 'has_diabetes']
+CHUNKSIZE = 10
+
+class CountingPredictor:
+    """Deterministic stand-in for RiskPredictor that counts rows and can fail part-way"""
+
+    def __init__(self, model_version: str = "v1", fail_on_call: int = None):
+        self.model_version = model_version
+        self.feature_encoder = FeatureEncoder(FEATURE_NAMES)
+        self.label_encoder = type('LabelEncoder', (), {'classes_': np.array(['high', 'low', 'medium'])})
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.rows_scored = 0
+
+    def score_matrix(self, X: np.ndarray) -> np.ndarray:
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("interrupted")
+        self.rows_scored += len(X)
+        salt = 0.0 if self.model_version == "v1" else 0.3
+        u = np.mod(X[:, 1] * 0.37 + X[:, 0] * 0.11 + X[:, 2] * 0.013 + salt, 1.0)
+        high, low = u ** 2, (1 - u) ** 2
+        return np.column_stack([high, low, 1 - high - low]).astype(np.float32)
+
+def write_patients(path: str, n: int = 47, seed: int = 17) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    patients = pd.DataFrame({
+        'patient_id': [f"p{i:03d}" for i in range(n)],
+        'age': rng.integers(18, 95, n),
+        'bmi': rng.uniform(16, 45, n).round(1),
+        'systolic_bp': rng.integers(95, 190, n),
+        'has_diabetes': rng.integers(0, 2, n),
+    })
+    patients.to_csv(path, index=False)
+    return patients
+
+def fresh_scores(tmp_path, input_path: str, model_version: str = "v1") -> pd.DataFrame:
+    """Scores from a plain run without any state, for comparison"""
+    output_path = str(tmp_path / f"fresh-{model_version}-{len(os.listdir(tmp_path))}.csv")
+    score_cohort(CountingPredictor(model_version), input_path, output_path, chunksize=CHUNKSIZE)
+    return pd.read_csv(output_path)
+
+@pytest.fixture
+def paths(tmp_path):
+    input_path = str(tmp_path / "patients.csv")
+    return input_path, str(tmp_path / "scores.csv"), str(tmp_path / "state")
+
+def test_incremental_runs_rescore_only_what_changed(tmp_path, paths):
+    """First run scores everyone, then only changed or new patients, then everyone after an upgrade"""
+    input_path, output_path, state_path = paths
+    patients = write_patients(input_path)
+
+    predictor = CountingPredictor()
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+    assert (summary['rescored'], summary['skipped']) == (len(patients), 0)
+    assert predictor.rows_scored == len(patients)
+    assert len(ScoreState.load(state_path, ['high', 'low', 'medium'])) == len(patients)
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), fresh_scores(tmp_path, input_path))
+
+    # One patient's features change and one new patient appears
+    patients.loc[5, 'bmi'] += 4.2
+    patients = pd.concat([patients, pd.DataFrame([{'patient_id': 'p999', 'age': 61, 'bmi': 33.3,
+                                                   'systolic_bp': 150, 'has_diabetes': 1}])])
+    patients.to_csv(input_path, index=False)
+    predictor = CountingPredictor()
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+    assert (summary['rescored'], summary['skipped']) == (2, len(patients) - 2)
+    assert predictor.rows_scored == 2
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), fresh_scores(tmp_path, input_path))
+
+    # Nothing changed: nothing goes through the model
+    predictor = CountingPredictor()
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+    assert (summary['rescored'], predictor.rows_scored) == (0, 0)
+
+    # A new model version invalidates every fingerprint
+    predictor = CountingPredictor("v2")
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+    assert (summary['rescored'], summary['skipped']) == (len(patients), 0)
+    assert ScoreState.load(state_path, ['high', 'low', 'medium']).model_version == "v2"
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), fresh_scores(tmp_path, input_path, "v2"))
+
+def test_interrupted_incremental_run_resumes(tmp_path, paths):
+    """An interrupted run keeps the previous state; resuming finishes the staged state and swaps it in"""
+    input_path, output_path, state_path = paths
+    patients = write_patients(input_path)
+    score_cohort(CountingPredictor(), input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+
+    # Change one patient in each of the first and last chunks; the second model call, for the last
+    # chunk, fails
+    patients.loc[[2, 45], 'bmi'] += 3.0
+    patients.to_csv(input_path, index=False)
+    with pytest.raises(RuntimeError):
+        score_cohort(CountingPredictor(fail_on_call=2), input_path, output_path, chunksize=CHUNKSIZE,
+                     state_path=state_path)
+    assert os.path.exists(output_path + CHECKPOINT_SUFFIX)
+    assert os.path.isdir(state_path + ".new")
+    # The committed state is still the previous run's
+    previous = ScoreState.load(state_path, ['high', 'low', 'medium'])
+    assert previous.model_version == "v1" and len(previous) == len(patients)
+
+    predictor = CountingPredictor()
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+    assert summary['resumed_from_chunk'] == 4
+    assert predictor.rows_scored == 1
+    assert (summary['rescored'], summary['skipped']) == (2, len(patients) - 2)
+    assert not os.path.exists(state_path + ".new")
+    assert not os.path.exists(output_path + CHECKPOINT_SUFFIX)
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), fresh_scores(tmp_path, input_path))
+
+    # The swapped-in state covers every chunk, including the ones written before the interruption
+    predictor = CountingPredictor()
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, state_path=state_path)
+    assert (summary['rescored'], predictor.rows_scored) == (0, 0)
+
+def test_resume_truncates_partial_chunk_and_matches_uninterrupted(tmp_path, paths):
+    """Stopping after chunk N and resuming gives byte-for-byte the output of an uninterrupted run"""
+    input_path, output_path, _ = paths
+    write_patients(input_path)
+    uninterrupted_path = str(tmp_path / "uninterrupted.csv")
+    score_cohort(CountingPredictor(), input_path, uninterrupted_path, chunksize=CHUNKSIZE)
+
+    # Stop while scoring chunk 3, after a partial write of it reached the file
+    with pytest.raises(RuntimeError):
+        score_cohort(CountingPredictor(fail_on_call=4), input_path, output_path, chunksize=CHUNKSIZE)
+    with open(output_path + CHECKPOINT_SUFFIX) as f:
+        checkpoint = json.load(f)
+    assert checkpoint['chunks_done'] == 3 and checkpoint['output_bytes'] == os.path.getsize(output_path)
+    with open(output_path, 'ab') as f:
+        # Longer than the rest of the output, so only truncation can remove it
+        f.write(b'p030,v1,partial chunk\n' * 500 + b'p031,v1,0.1')
+
+    predictor = CountingPredictor()
+    # A resumed run keeps the checkpoint's chunk size even if asked for another
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE * 3)
+    assert summary['resumed_from_chunk'] == 3
+    assert summary['rows'] == 47 and predictor.rows_scored == 47 - 3 * CHUNKSIZE
+    with open(output_path, 'rb') as resumed, open(uninterrupted_path, 'rb') as expected:
+        assert resumed.read() == expected.read()
+    assert not os.path.exists(output_path + CHECKPOINT_SUFFIX)
+
+def test_restart_ignores_checkpoint(tmp_path, paths):
+    """--restart rescores from the first chunk and rewrites the output"""
+    input_path, output_path, _ = paths
+    write_patients(input_path)
+    with pytest.raises(RuntimeError):
+        score_cohort(CountingPredictor(fail_on_call=3), input_path, output_path, chunksize=CHUNKSIZE)
+
+    predictor = CountingPredictor()
+    summary = score_cohort(predictor, input_path, output_path, chunksize=CHUNKSIZE, restart=True)
+    assert summary['resumed_from_chunk'] == 0 and predictor.rows_scored == 47
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), fresh_scores(tmp_path, input_path))
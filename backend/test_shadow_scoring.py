@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Shadow scoring tests: sampled fraction of live traffic
+"""
+
+import random
+
+import pytest
+
+from models.shadow_scoring import ShadowScorer
+
+SAMPLE_RATE = 0.2
+REQUESTS = 20000
+
+def make_scorer(sample_rate: float = SAMPLE_RATE) -> ShadowScorer:
+    # The registry is never consulted for sampling decisions
+    return ShadowScorer("candidate", sample_rate=sample_rate, registry=object())
+
+@pytest.mark.parametrize("patient_id", [None, "unknown"])
+def test_anonymous_traffic_sampled_at_configured_rate(patient_id):
+    """Requests without a real ID are shadowed at the configured fraction, not all or nothing"""
+    random.seed(23)
+    scorer = make_scorer()
+    rate = sum(scorer.selected(patient_id) for _ in range(REQUESTS)) / REQUESTS
+    assert rate == pytest.approx(SAMPLE_RATE, abs=0.02)
+
+def test_patient_ids_sampled_at_configured_rate_and_sticky():
+    """Real IDs hit the configured fraction overall, and each patient's decision never changes"""
+    scorer = make_scorer()
+    patient_ids = [f"patient-{i}" for i in range(REQUESTS)]
+    selected = [scorer.selected(patient_id) for patient_id in patient_ids]
+
+    assert sum(selected) / REQUESTS == pytest.approx(SAMPLE_RATE, abs=0.02)
+    assert [scorer.selected(patient_id) for patient_id in patient_ids] == selected
+
+def test_full_sample_rate_shadows_everything():
+    """sample_rate=1.0 shadows every request, anonymous or not"""
+    scorer = make_scorer(1.0)
+    assert all(scorer.selected(patient_id) for patient_id in [None, "unknown", "patient-1"])
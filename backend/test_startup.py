@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Cold-start tests: native booster parity, time to first prediction and readiness gating
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.risk_predictor import RiskPredictor
+from models.booster_model import BoosterClassifier, LabelClasses, NATIVE_MODEL_FILE
+from models.warmup import StartupWarmup
+from export_artifacts import export_compiled_trees, export_native_model
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BACKEND_DIR, "..", "ml_pipeline", "production_models")
+DATASET_PATH = os.path.join(BACKEND_DIR, "..", "ml_pipeline", "primary_dataset.csv")
+
+# Seconds from importing main to the first /predict response in a fresh process
+TIME_TO_FIRST_PREDICTION_BUDGET = {
+    "native": float(os.getenv("TTFP_BUDGET_NATIVE", "1.5")),
+    "xgboost": float(os.getenv("TTFP_BUDGET_XGBOOST", "5.0")),
+}
+
+FIRST_PREDICTION_SCRIPT = """
+import json, time
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+import main
+with TestClient(main.app) as client:
+    response = client.post("/predict", json={"patient_id": "p1", "age": 70, "bmi": 31.0,
+                                             "systolic_bp": 145.0, "diastolic_bp": 90.0})
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"status": response.status_code, "seconds": elapsed,
+                      "profile": client.get("/startup/profile").json()}))
+"""
+
+READINESS_SCRIPT = """
+import json, time
+from fastapi.testclient import TestClient
+import main
+with TestClient(main.app) as client:
+    live = client.get("/health/live").status_code
+    deadline = time.monotonic() + 60
+    while (response := client.get("/health/ready")).status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    print(json.dumps({"live": live, "ready_status": response.status_code, "ready": response.json()}))
+"""
+
+@pytest.fixture(scope="module")
+def exported_model_path(tmp_path_factory):
+    """Copy of the production models with compiled trees and the native booster exported"""
+    model_path = str(tmp_path_factory.mktemp("models") / "production_models")
+    shutil.copytree(MODEL_PATH, model_path)
+    predictor = RiskPredictor(model_path)
+    export_compiled_trees(predictor)
+    export_native_model(predictor)
+    return model_path
+
+def test_native_booster_matches_pickled_model(exported_model_path):
+    """The UBJSON booster gives exactly the pickled XGBClassifier's probabilities"""
+    with open(os.path.join(MODEL_PATH, "feature_metadata.json")) as f:
+        feature_names = json.load(f)['feature_names']
+    X = pd.read_csv(DATASET_PATH)[feature_names].values.astype(np.float32)
+
+    expected = RiskPredictor(MODEL_PATH).model.predict_proba(X)
+    actual = BoosterClassifier.load(os.path.join(exported_model_path, NATIVE_MODEL_FILE)).predict_proba(X)
+
+    np.testing.assert_array_equal(actual, expected)
+
+def test_exports_are_used_when_current(exported_model_path):
+    """Exports stamped with the metadata's training_date replace the pickles"""
+    predictor = RiskPredictor(exported_model_path, inference_backend="native")
+    assert isinstance(predictor.label_encoder, LabelClasses)
+    assert isinstance(predictor.compiled_model.feature, np.memmap)
+    assert isinstance(predictor.model, BoosterClassifier)
+
+def test_stale_exports_fall_back_to_pickles(exported_model_path, tmp_path):
+    """After retraining without re-exporting, the pickled model is served, not the old exports"""
+    model_path = str(tmp_path / "retrained")
+    shutil.copytree(exported_model_path, model_path)
+    metadata_file = os.path.join(model_path, "model_metadata.json")
+    with open(metadata_file) as f:
+        metadata = json.load(f)
+    metadata['training_date'] = "retrained"
+    with open(metadata_file, "w") as f:
+        json.dump(metadata, f)
+
+    predictor = RiskPredictor(model_path, inference_backend="native")
+    assert predictor.model_version == "retrained"
+    assert not isinstance(predictor.label_encoder, LabelClasses)
+    assert not isinstance(predictor.compiled_model.feature, np.memmap)
+    assert not isinstance(predictor.model, BoosterClassifier)
+
+@pytest.mark.parametrize("backend", ["native", "xgboost"])
+def test_time_to_first_prediction(exported_model_path, backend):
+    """A fresh process answers its first prediction within the startup budget"""
+    env = dict(os.environ, MODEL_PATH=exported_model_path, INFERENCE_BACKEND=backend, COHORT_DATA_PATH="")
+    result = subprocess.run([sys.executable, "-c", FIRST_PREDICTION_SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["status"] == 200
+    assert report["profile"]["complete"]
+    assert report["seconds"] < TIME_TO_FIRST_PREDICTION_BUDGET[backend], report["profile"]
+    if backend == "native":
+        # Exported trees make the xgboost/scikit-learn import unnecessary
+        assert not report["profile"]["heavy_modules_loaded"]["xgboost"]
+        assert not report["profile"]["heavy_modules_loaded"]["sklearn"]
+
+def test_readiness_waits_for_warmup(exported_model_path):
+    """/health/ready turns 200 only after warm-up ran every batch size and the latency check passed"""
+    env = dict(os.environ, MODEL_PATH=exported_model_path, COHORT_DATA_PATH="",
+               WARMUP_BATCH_SIZES="1,16", WARMUP_ROUNDS="2", READINESS_MAX_LATENCY_MS="1000")
+    result = subprocess.run([sys.executable, "-c", READINESS_SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["live"] == 200
+    assert report["ready_status"] == 200
+    assert report["ready"]["warmup"]["call_ms"].keys() == {"1", "16"}
+    assert all(len(calls) == 2 for calls in report["ready"]["warmup"]["call_ms"].values())
+    assert report["ready"]["latency_check"]["passed"]
+
+class SlowPool:
+    """Inference pool stand-in whose calls always take longer than the readiness budget"""
+
+    max_workers = 1
+
+    async def run(self, method_name, payload, **options):
+        await asyncio.sleep(0.002)
+        return ([{}] * len(payload) if method_name == "predict_risk_batch" else {}), {}
+
+def test_readiness_gives_up_on_latency_after_max_attempts():
+    """A machine that never meets the latency budget still becomes ready, flagged as degraded"""
+    warmup = StartupWarmup(batch_sizes=[1, 4], rounds=1, check_requests=5, max_latency_ms=1.0,
+                           retry_seconds=0, max_attempts=3)
+    asyncio.run(warmup.run(SlowPool()))
+
+    assert warmup.ready and warmup.degraded
+    assert warmup.attempts == 3
+    assert not warmup.status()['latency_check']['passed']
+
+class BrokenPool:
+    """Inference pool stand-in whose every call fails, like a broken model artifact"""
+
+    max_workers = 1
+
+    async def run(self, method_name, payload, **options):
+        raise RuntimeError("corrupt model file")
+
+def test_readiness_gives_up_on_errors_after_max_attempts():
+    """Warm-up errors count as failed attempts, so readiness settles as degraded instead of looping"""
+    warmup = StartupWarmup(batch_sizes=[1], rounds=1, check_requests=5, max_latency_ms=250.0,
+                           retry_seconds=0, max_attempts=3)
+    asyncio.run(asyncio.wait_for(warmup.run(BrokenPool()), timeout=10))
+
+    assert warmup.ready and warmup.degraded
+    assert warmup.attempts == 3
+    assert warmup.status()['last_error'] == "corrupt model file"
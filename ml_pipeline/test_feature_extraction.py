@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Parity tests: vectorized and parallel feature extraction vs the original per-patient loop
+"""
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+import feature_extraction
+from feature_extraction import FEATURE_COLUMNS, extract_features, load_synthea_tables
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_data", "synthea")
+
+def reference_features(data_dir: str) -> pd.DataFrame:
+    """step1_data_extraction.ipynb's row-by-row extraction, kept as the reference"""
+    patients_df = pd.read_csv(f"{data_dir}/patients.csv")
+    conditions_df = pd.read_csv(f"{data_dir}/conditions.csv")
+    encounters_df = pd.read_csv(f"{data_dir}/encounters.csv")
+    observations_df = pd.read_csv(f"{data_dir}/observations.csv")
+    medications_df = pd.read_csv(f"{data_dir}/medications.csv")
+
+    patients_df['BIRTHDATE'] = pd.to_datetime(patients_df['BIRTHDATE'])
+    patients_df['age'] = (pd.to_datetime('2024-01-01') - patients_df['BIRTHDATE']).dt.days // 365
+
+    def extract_patient_features(patient_id):
+        patient = patients_df[patients_df['Id'] == patient_id].iloc[0]
+        features = {
+            'patient_id': patient_id,
+            'age': patient['age'],
+            'gender_male': 1 if patient['GENDER'] == 'M' else 0,
+            'race_white': 1 if patient.get('RACE', '').lower() == 'white' else 0,
+            'race_black': 1 if patient.get('RACE', '').lower() == 'black' else 0,
+            'race_asian': 1 if patient.get('RACE', '').lower() == 'asian' else 0,
+            'race_hispanic': 1 if patient.get('ETHNICITY', '').lower() == 'hispanic' else 0,
+        }
+
+        patient_conditions = conditions_df[conditions_df['PATIENT'] == patient_id]
+        condition_text = ' '.join(patient_conditions['DESCRIPTION'].fillna('').str.lower())
+        features.update({
+            'has_diabetes': 1 if 'diabetes' in condition_text else 0,
+            'has_hypertension': 1 if 'hypertension' in condition_text else 0,
+            'has_heart_disease': 1 if any(term in condition_text for term in ['heart', 'cardiac', 'coronary']) else 0,
+            'has_kidney_disease': 1 if any(term in condition_text for term in ['kidney', 'renal']) else 0,
+            'has_stroke': 1 if 'stroke' in condition_text else 0,
+            'has_copd': 1 if any(term in condition_text for term in ['copd', 'pulmonary']) else 0,
+            'has_depression': 1 if 'depression' in condition_text else 0,
+            'has_cancer': 1 if 'cancer' in condition_text else 0,
+            'total_conditions': len(patient_conditions),
+        })
+        features['comorbidity_count'] = sum(features[flag] for flag in feature_extraction.CONDITION_FLAGS)
+
+        patient_obs = observations_df[observations_df['PATIENT'] == patient_id]
+        vitals = dict.fromkeys(feature_extraction.VITALS)
+        for _, obs in patient_obs.iterrows():
+            desc = str(obs.get('DESCRIPTION', '')).lower()
+            try:
+                value = float(obs.get('VALUE', 0)) if pd.notna(obs.get('VALUE')) else None
+                if value is None:
+                    continue
+                if 'body mass index' in desc:
+                    vitals['bmi'] = value
+                elif 'systolic blood pressure' in desc:
+                    vitals['systolic_bp'] = value
+                elif 'diastolic blood pressure' in desc:
+                    vitals['diastolic_bp'] = value
+                elif 'heart rate' in desc:
+                    vitals['heart_rate'] = value
+                elif 'glucose' in desc and 'random' not in desc:
+                    vitals['glucose'] = value
+                elif 'hemoglobin a1c' in desc:
+                    vitals['hba1c'] = value
+                elif 'total cholesterol' in desc:
+                    vitals['cholesterol'] = value
+            except (TypeError, ValueError):
+                continue
+
+        age_factor = max(0, (features['age'] - 40) / 40)
+        diabetes_factor = 1.2 if features['has_diabetes'] else 1.0
+        features.update({
+            'bmi': vitals['bmi'] if vitals['bmi'] is not None else (25 + age_factor * 3),
+            'systolic_bp': vitals['systolic_bp'] if vitals['systolic_bp'] is not None else (120 + age_factor * 15),
+            'diastolic_bp': vitals['diastolic_bp'] if vitals['diastolic_bp'] is not None else (80 + age_factor * 8),
+            'heart_rate': vitals['heart_rate'] if vitals['heart_rate'] is not None else 72,
+            'glucose': vitals['glucose'] if vitals['glucose'] is not None else (100 * diabetes_factor),
+            'hba1c': vitals['hba1c'] if vitals['hba1c'] is not None else (6.0 * diabetes_factor),
+            'cholesterol': vitals['cholesterol'] if vitals['cholesterol'] is not None else (200 + age_factor * 20),
+            'has_bmi_data': 1 if vitals['bmi'] is not None else 0,
+            'has_bp_data': 1 if vitals['systolic_bp'] is not None else 0,
+            'has_glucose_data': 1 if vitals['glucose'] is not None else 0,
+            'has_hba1c_data': 1 if vitals['hba1c'] is not None else 0,
+        })
+
+        patient_encounters = encounters_df[encounters_df['PATIENT'] == patient_id]
+        inpatient_count = len(patient_encounters[patient_encounters['ENCOUNTERCLASS'] == 'inpatient'])
+        emergency_count = len(patient_encounters[patient_encounters['ENCOUNTERCLASS'] == 'emergency'])
+        outpatient_count = len(patient_encounters[patient_encounters['ENCOUNTERCLASS'] == 'outpatient'])
+        features.update({
+            'total_encounters': len(patient_encounters),
+            'inpatient_visits': inpatient_count,
+            'emergency_visits': emergency_count,
+            'outpatient_visits': outpatient_count,
+            'has_inpatient': 1 if inpatient_count > 0 else 0,
+            'has_emergency': 1 if emergency_count > 0 else 0,
+        })
+
+        patient_meds = medications_df[medications_df['PATIENT'] == patient_id]
+        features.update({
+            'medication_count': len(patient_meds),
+            'polypharmacy': 1 if len(patient_meds) >= 5 else 0,
+        })
+        return features
+
+    adult_patients = patients_df[patients_df['age'] >= 18]
+    return pd.DataFrame([extract_patient_features(patient_id) for patient_id in adult_patients['Id']])
+
+def assert_same_features(actual: pd.DataFrame, expected: pd.DataFrame):
+    columns = ['patient_id', *FEATURE_COLUMNS]
+    pd.testing.assert_frame_equal(actual[columns].reset_index(drop=True), expected[columns].reset_index(drop=True),
+                                  check_dtype=False, check_exact=True)
+
+@pytest.fixture(scope="module")
+def expected():
+    return reference_features(FIXTURE_DIR)
+
+def test_fixture_covers_edge_cases(expected):
+    """The fixture exercises the cases the vectorized path has to get right"""
+    observations = pd.read_csv(os.path.join(FIXTURE_DIR, "observations.csv"))
+    assert observations['VALUE'].isna().any()
+    assert observations['DESCRIPTION'].str.contains('random').any()
+    assert (expected['medication_count'] == 4).any() and (expected['medication_count'] == 5).any()
+    assert expected[feature_extraction.CONDITION_FLAGS].to_numpy().any(axis=0).all()
+    assert (expected['has_bmi_data'] == 0).any() and (expected['has_bmi_data'] == 1).any()
+
+def test_vectorized_matches_reference_loop(expected):
+    """extract_features reproduces the per-patient loop on every patient and feature"""
+    assert_same_features(extract_features(load_synthea_tables(FIXTURE_DIR)), expected)
+
+def test_last_valid_vital_wins(expected):
+    """An empty VALUE after a valid reading leaves the earlier reading in place"""
+    observations = pd.read_csv(os.path.join(FIXTURE_DIR, "observations.csv"))
+    bmi_rows = observations[observations['DESCRIPTION'] == 'Body Mass Index']
+    last_row = bmi_rows.groupby('PATIENT').tail(1)
+    valid = bmi_rows[bmi_rows['VALUE'].notna()].groupby('PATIENT')['VALUE']
+    checked = [patient_id for patient_id in last_row.loc[last_row['VALUE'].isna(), 'PATIENT']
+               if patient_id in valid.groups and len(valid.get_group(patient_id)) > 1]
+    assert checked
+
+    actual = extract_features(load_synthea_tables(FIXTURE_DIR)).set_index('patient_id')
+    for patient_id in checked:
+        assert actual.loc[patient_id, 'bmi'] == float(valid.get_group(patient_id).iloc[-1])
+        assert actual.loc[patient_id, 'has_bmi_data'] == 1
+
+def test_polypharmacy_threshold(expected):
+    """Five or more medications counts as polypharmacy, four does not"""
+    actual = extract_features(load_synthea_tables(FIXTURE_DIR))
+    assert (actual.loc[actual['medication_count'] == 4, 'polypharmacy'] == 0).all()
+    assert (actual.loc[actual['medication_count'] == 5, 'polypharmacy'] == 1).all()
+
+@pytest.mark.parametrize("workers, split_bytes, chunksize", [(2, 4096, 25), (3, 1500, 7), (4, 64 << 20, 100)])
+def test_parallel_matches_single_process(workers, split_bytes, chunksize):
+    """Byte-range workers produce the single-process frame exactly, in the same order"""
+    expected = extract_features(load_synthea_tables(FIXTURE_DIR))
+    actual = feature_extraction.extract_features_parallel(FIXTURE_DIR, workers=workers, chunksize=chunksize,
+                                                          split_bytes=split_bytes)
+    pd.testing.assert_frame_equal(actual, expected)
+
+def test_byte_ranges_split_patients():
+    """Small splits put one patient's rows in several ranges, and every row in exactly one"""
+    path = os.path.join(FIXTURE_DIR, "observations.csv")
+    names, ranges = feature_extraction.csv_splits(path, 40)
+    with open(path, 'rb') as f:
+        parts = []
+        for start, end in ranges:
+            f.seek(start)
+            parts.append(pd.read_csv(io.BytesIO(f.read(end - start)), header=None, names=names))
+
+    assert len(ranges) > 10
+    assert sum(len(part) for part in parts) == len(pd.read_csv(path))
+    ranges_per_patient = pd.concat([part[['PATIENT']].drop_duplicates().assign(split=i)
+                                    for i, part in enumerate(parts)]).groupby('PATIENT').size()
+    assert (ranges_per_patient > 1).any()